@@ -0,0 +1,122 @@
+"""
+Latência dos filtros do update_dashboard, antes e depois do índice de filtros.
+
+Usa registros_detalhados sintéticos (mesmo formato do
+bench_memoria_dashboard) e compara, por seleção do header:
+- antes: df.copy() e isin encadeados nas colunas de texto do DataFrame
+- máscara: só o OR dos bitmaps por dimensão e AND entre dimensões
+  (dashboard/indice.py)
+- DataFrame: máscara + seleção das linhas, como nos rollups
+- Arrow: máscara + filtro da tabela mapeada + conversão só das linhas
+  selecionadas, como nos registros (o DataFrame inteiro não existe mais)
+
+Os rollups sintéticos têm poucas dezenas de linhas, então a coluna
+DataFrame, no mesmo volume dos registros, é a referência para rollups
+grandes. Confere que todas as formas devolvem as mesmas linhas e mostra o
+tempo de montagem e o tamanho do índice (uma vez por snapshot).
+
+Uso:
+    python benchmarks/bench_filtros_dashboard.py --linhas 10000 100000 1000000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "dashboard"))
+
+from bench_memoria_dashboard import tabela_registros  # noqa: E402
+from indice import IndiceFiltros  # noqa: E402
+from projecao import COLUNAS_REGISTROS, FILTROS_REGISTROS, compactar, para_pandas  # noqa: E402
+
+
+LINHAS = [10_000, 100_000, 1_000_000]
+REPETICOES = 7
+
+
+def selecoes(df: pd.DataFrame, colunas: dict) -> dict:
+    """Seleções típicas do header com valores presentes nos dados"""
+    def valores(filtro, n):
+        return list(df[colunas[filtro]].dropna().unique()[:n])
+
+    return {
+        "sem filtro": {},
+        "1 ano": {"ano": valores("ano", 1)},
+        "ano + 2 secretarias": {"ano": valores("ano", 1), "secretaria": valores("secretaria", 2)},
+        "4 filtros": {
+            "ano": valores("ano", 2), "secretaria": valores("secretaria", 3),
+            "funcao": valores("funcao", 2), "fonte": valores("fonte", 2),
+        },
+    }
+
+
+def antes(df: pd.DataFrame, colunas: dict, selecao: dict) -> pd.DataFrame:
+    """Como o callback filtrava: cópia e isin encadeados"""
+    df = df.copy()
+    for filtro, valores in selecao.items():
+        if valores:
+            df = df[df[colunas[filtro]].isin(valores)]
+    return df
+
+
+def indice_dataframe(df: pd.DataFrame, indice: IndiceFiltros, selecao: dict) -> pd.DataFrame:
+    mascara = indice.mascara(selecao)
+    return df if mascara is None else df[mascara]
+
+
+def indice_arrow(tabela, indice: IndiceFiltros, selecao: dict) -> pd.DataFrame:
+    mascara = indice.mascara(selecao)
+    return para_pandas(tabela if mascara is None else tabela.filter(mascara))
+
+
+def cronometrar(funcao, *args) -> tuple:
+    """Mediana em ms de REPETICOES execuções e o último resultado"""
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), resultado
+
+
+def medir(tabela, colunas: dict):
+    df = para_pandas(tabela)
+    inicio = time.perf_counter()
+    indice = IndiceFiltros(tabela, colunas)
+    montagem = time.perf_counter() - inicio
+    print(
+        f"{tabela.num_rows:,} linhas | índice: {montagem * 1000:.0f}ms, "
+        f"{indice.nbytes() / 1024**2:.2f} MB"
+    )
+
+    for nome, selecao in selecoes(df, colunas).items():
+        t_antes, r_antes = cronometrar(antes, df, colunas, selecao)
+        t_mascara, _ = cronometrar(indice.mascara, selecao)
+        t_df, r_df = cronometrar(indice_dataframe, df, indice, selecao)
+        t_arrow, r_arrow = cronometrar(indice_arrow, tabela, indice, selecao)
+        assert len(r_antes) == len(r_df) == len(r_arrow), (nome, len(r_antes), len(r_df), len(r_arrow))
+        print(
+            f"   {nome:<22} {len(r_df):>10,} {t_antes:>9.2f}ms {t_mascara:>9.2f}ms "
+            f"{t_df:>9.2f}ms {t_arrow:>9.2f}ms"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latência dos filtros do dashboard com e sem índice")
+    parser.add_argument("--linhas", type=int, nargs="+", default=LINHAS)
+    args = parser.parse_args(argv)
+
+    print(f"pandas {pd.__version__}; mediana de {REPETICOES} execuções\n")
+    print(f"   {'seleção':<22} {'linhas':>10} {'antes':>11} {'máscara':>11} {'DataFrame':>11} {'Arrow':>11}")
+    for linhas in args.linhas:
+        medir(compactar(tabela_registros(linhas).select(COLUNAS_REGISTROS)), FILTROS_REGISTROS)
+        print()
+
+
+if __name__ == "__main__":
+    main()
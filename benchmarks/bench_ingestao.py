@@ -0,0 +1,290 @@
+"""
+Benchmark da ingestão contra uma API local.
+
+Gera payloads sintéticos de despesas_pagas (formato da API, valores pt-BR)
+com N registros, serve por um http.server local e roda o pipeline completo
+(download, parse, dedup, gravação no lake Parquet) coletando o relatório
+de ingestao.metricas. Cada tamanho roda em um processo separado para que
+o pico de RSS seja do próprio tamanho.
+
+Duas passagens por tamanho:
+- inicial: índice vazio, todos os registros são gravados
+- reexecucao: mesmo payload com --force, todos caem na deduplicação
+
+Uso:
+    python benchmarks/bench_ingestao.py --tamanhos 10000 100000 1000000
+    python benchmarks/bench_ingestao.py --tamanhos 100000 --comparar benchmarks/resultados/base.json
+"""
+
+import argparse
+import dataclasses
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from ingestao.cache_respostas import CacheRespostas  # noqa: E402
+from ingestao.fontes import FONTES  # noqa: E402
+from ingestao.indice_ids import IndiceIds  # noqa: E402
+from ingestao.metricas import Metricas, imprimir_resumo  # noqa: E402
+from ingestao.pipeline import download_years, process_years  # noqa: E402
+from ingestao.sinks import ParquetLakeSink  # noqa: E402
+
+
+ANO = 2025
+TAMANHOS = [10_000, 100_000, 1_000_000]
+SAIDA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+# Piora máxima aceita em --comparar (fração sobre a base)
+TOLERANCIA = 0.20
+
+SECRETARIAS = [
+    "SECRETARIA MUNICIPAL DE SAUDE", "SECRETARIA MUNICIPAL DE EDUCACAO",
+    "SECRETARIA MUNICIPAL DE OBRAS", "SECRETARIA MUNICIPAL DE FAZENDA",
+    "GABINETE DO PREFEITO", "SECRETARIA MUNICIPAL DE ASSISTENCIA SOCIAL",
+]
+FUNCOES = ["SAUDE", "EDUCACAO", "URBANISMO", "ADMINISTRACAO", "ASSISTENCIA SOCIAL"]
+FONTES_RECURSO = ["TESOURO", "FUNDEB", "SUS", "ROYALTIES"]
+
+
+def valor_ptbr(centavos: int) -> str:
+    inteiro, frac = divmod(centavos, 100)
+    return f"{inteiro:,}".replace(",", ".") + f",{frac:02d}"
+
+
+def registro(i: int, ano: int) -> dict:
+    mes = 1 + i % 12
+    dia = 1 + i % 28
+    valor = valor_ptbr(1000 + (i * 7919) % 10_000_000)
+    return {
+        "codigo_interno": str(ano * 10_000_000 + i),
+        "EMP_PROCESSO_COMPLETO": f"{ano}/{i % 5000:05d}",
+        "empenho": str(i % 90000),
+        "OP": str(i % 7000),
+        "NR_OP": str(i),
+        "Codigo_Liquidacao": str(i * 3),
+        "Despesa": str(i % 400),
+        "CPF_CNPJ_FORMATADA": f"{i % 99:02d}.{i % 999:03d}.{i % 997:03d}/0001-{i % 97:02d}",
+        "descricao_favorecido": f"FORNECEDOR {i % 3000}",
+        "dotacao": f"{i % 50}.{i % 20}.{i % 9}",
+        "unidade_orcamentaria": f"UNIDADE {i % 40}",
+        "natureza_despeza": f"3.3.90.{i % 99:02d}",
+        "fonte": FONTES_RECURSO[i % len(FONTES_RECURSO)],
+        "funcao": FUNCOES[i % len(FUNCOES)],
+        "subfuncao": f"SUBFUNCAO {i % 30}",
+        "orgao": f"ORGAO {i % 12}",
+        "secretaria": SECRETARIAS[i % len(SECRETARIAS)],
+        "acao": f"ACAO {i % 200}",
+        "programa": f"PROGRAMA {i % 60}",
+        "catagoria_economica": "3",
+        "catagoria_descricao": "DESPESAS CORRENTES",
+        "grupo_despesa": "3",
+        "grupo_descricao": "OUTRAS DESPESAS CORRENTES",
+        "elemento_despesa": f"{i % 50:02d}",
+        "desspesas_descricao": f"ELEMENTO {i % 50}",
+        "modalidade_licitacao": ["PREGAO", "DISPENSA", "INEXIGIBILIDADE"][i % 3],
+        "numero_licitacao": f"{i % 800}/{ano}",
+        "Tipo": ["PAGAMENTO", "ESTORNO"][i % 2],
+        "descricao_despesa": f"PAGAMENTO REFERENTE AO EMPENHO {i}",
+        "valor_despesa": valor,
+        "valor_despesa_total": valor,
+        "Valor_Estornado": "0,00",
+        "RETIDO": valor_ptbr(i % 5000),
+        "Estorno_do_Pagamento": None,
+        "data_despesa": f"{ano}-{mes:02d}-{dia:02d} 00:00:00.0",
+        "data_liquidacao": f"{ano}-{mes:02d}-{dia:02d} 00:00:00.0",
+        "exercicio": str(ano),
+        "URL": f"https://transparencia.example/doc/{i}",
+    }
+
+
+def gerar_payload(caminho: str, linhas: int, ano: int = ANO):
+    """Escreve {"dados": [...]} em streaming, sem montar a lista em memória"""
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write('{"dados": [')
+        for i in range(linhas):
+            if i:
+                f.write(",")
+            f.write(json.dumps(registro(i, ano), ensure_ascii=False))
+        f.write("]}")
+
+
+def servir(caminho: str, comprimido: bool):
+    """Serve o payload em qualquer GET; retorna (servidor, url)"""
+
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if comprimido:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(os.path.getsize(caminho)))
+            self.end_headers()
+            with open(caminho, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/sincronia/apidados.rule"
+
+
+def executar_passagem(fonte, diretorio: str, batch_size: int, force: bool) -> dict:
+    metricas = Metricas()
+    cache = CacheRespostas(os.path.join(diretorio, "cache_respostas.json"))
+    indice = IndiceIds(os.path.join(diretorio, "indice_ids"))
+    sink = ParquetLakeSink(os.path.join(diretorio, "lake"), coluna_data=fonte.coluna_data)
+
+    downloads, _ = download_years(fonte, [ANO], cache, max_workers=1, force=force, metricas=metricas)
+    try:
+        list(process_years(fonte, sink, downloads, indice, cache,
+                           batch_size=batch_size, metricas=metricas))
+    finally:
+        sink.fechar()
+        indice.salvar()
+
+    return metricas.relatorio()
+
+
+def executar_tamanho(linhas: int, batch_size: int, comprimido: bool) -> dict:
+    """Roda as passagens de um tamanho (no processo atual)"""
+    with tempfile.TemporaryDirectory(prefix="bench_ingestao_") as diretorio:
+        payload = os.path.join(diretorio, "payload.json")
+        gerar_payload(payload, linhas)
+        tamanho_json = os.path.getsize(payload)
+
+        if comprimido:
+            with open(payload, "rb") as origem, gzip.open(payload + ".gz", "wb", compresslevel=6) as destino:
+                shutil.copyfileobj(origem, destino)
+            os.remove(payload)
+            payload += ".gz"
+
+        servidor, url = servir(payload, comprimido)
+        fonte = dataclasses.replace(FONTES["queimados_despesas_pagas"], url=url, ano_inicial=ANO)
+
+        try:
+            passagens = {
+                "inicial": executar_passagem(fonte, diretorio, batch_size, force=False),
+                "reexecucao": executar_passagem(fonte, diretorio, batch_size, force=True),
+            }
+        finally:
+            servidor.shutdown()
+
+    return {
+        "linhas": linhas,
+        "bytes_json": tamanho_json,
+        "gzip": comprimido,
+        "batch_size": batch_size,
+        "passagens": passagens,
+    }
+
+
+def comparar(atual: dict, base: dict, tolerancia: float = TOLERANCIA):
+    """Lista as métricas que pioraram mais que a tolerância em relação à base"""
+    regressoes = []
+    base_por_tamanho = {r["linhas"]: r for r in base["resultados"]}
+
+    for resultado in atual["resultados"]:
+        referencia = base_por_tamanho.get(resultado["linhas"])
+        if referencia is None:
+            continue
+        for nome, passagem in resultado["passagens"].items():
+            anterior = referencia["passagens"].get(nome)
+            if not anterior:
+                continue
+            metricas = [
+                ("duracao_s", passagem["duracao_s"], anterior["duracao_s"]),
+                ("pico_rss_mb", passagem["pico_rss_mb"], anterior["pico_rss_mb"]),
+            ]
+            for fase, dados in passagem["fases"].items():
+                if fase in anterior["fases"]:
+                    metricas.append((f"fase.{fase}", dados["segundos"], anterior["fases"][fase]["segundos"]))
+
+            for metrica, valor, valor_base in metricas:
+                if valor_base > 0 and valor > valor_base * (1 + tolerancia):
+                    regressoes.append(
+                        f"{resultado['linhas']} linhas/{nome}/{metrica}: "
+                        f"{valor_base:.2f} → {valor:.2f} (+{(valor / valor_base - 1) * 100:.0f}%)"
+                    )
+    return regressoes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da ingestão contra API local sintética")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS,
+                        help=f"Registros por payload (padrão: {TAMANHOS}; até 5M)")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--gzip", action="store_true", help="Serve o payload com Content-Encoding: gzip")
+    parser.add_argument("--saida", default=None,
+                        help=f"Arquivo JSON de resultados (padrão: {SAIDA}/ingestao-<data>.json)")
+    parser.add_argument("--comparar", default=None,
+                        help="Resultado anterior; sai com erro se alguma métrica piorar além da tolerância")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    # Uso interno: roda um único tamanho e imprime o JSON na última linha
+    parser.add_argument("--um-tamanho", type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.um_tamanho is not None:
+        resultado = executar_tamanho(args.um_tamanho, args.batch_size, args.gzip)
+        print(json.dumps(resultado))
+        return
+
+    resultados = []
+    for linhas in args.tamanhos:
+        print(f"🏁 {linhas:,} registros...")
+        comando = [sys.executable, os.path.abspath(__file__), "--um-tamanho", str(linhas),
+                   "--batch-size", str(args.batch_size)]
+        if args.gzip:
+            comando.append("--gzip")
+        saida = subprocess.run(comando, check=True, capture_output=True, text=True).stdout
+        resultado = json.loads(saida.strip().splitlines()[-1])
+        resultados.append(resultado)
+
+        for nome, passagem in resultado["passagens"].items():
+            print(f"\n  [{nome}]", end="")
+            imprimir_resumo(passagem)
+
+    relatorio = {
+        "gerado_em": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "plataforma": sys.platform,
+        "cpus": os.cpu_count(),
+        "resultados": resultados,
+    }
+
+    saida = args.saida or os.path.join(
+        SAIDA, f"ingestao-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"\n📝 Resultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regressoes = comparar(relatorio, base, args.tolerancia)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressões acima de {args.tolerancia:.0%}:")
+            for linha in regressoes:
+                print(f"   {linha}")
+            raise SystemExit(1)
+        print(f"\n✅ Nenhuma regressão acima de {args.tolerancia:.0%} em relação a {args.comparar}")
+
+
+if __name__ == "__main__":
+    main()
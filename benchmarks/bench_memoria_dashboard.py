@@ -0,0 +1,125 @@
+"""
+Memória por linha dos dados do dashboard, antes e depois da projeção compacta.
+
+Monta tabelas Arrow sintéticas com o formato do que o BigQuery devolve
+para registros_detalhados e rollup_mensal e compara:
+- antes: SELECT * e to_pandas direto (textos como objetos str, mês "AAAA-MM")
+- depois: colunas usadas pelos callbacks, dicionários -> Categorical,
+  valores float64, anos/contagens Int32 e mês como chave AAAAMM
+  (dashboard/projecao.py)
+
+Uso:
+    python benchmarks/bench_memoria_dashboard.py --linhas 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "scripts"))
+sys.path.insert(0, os.path.join(RAIZ, "dashboard"))
+
+from bench_ingestao import registro  # noqa: E402
+from ingestao.schemas import DESPESAS_PAGAS, construir_tabela  # noqa: E402
+from projecao import COLUNAS_REGISTROS, colunas_rollup, compactar, para_float, para_pandas  # noqa: E402
+
+
+LINHAS = [100_000, 1_000_000]
+
+# Colunas de registros_detalhados (models/marts) -> coluna de origem no bruto
+REGISTROS = {
+    "codigo_interno": "codigo_interno", "data_despesa": "data_despesa", "ano": "exercicio",
+    "secretaria": "secretaria", "orgao": "orgao", "unidade_orcamentaria": "unidade_orcamentaria",
+    "funcao": "funcao", "subfuncao": "subfuncao", "programa": "programa", "acao": "acao",
+    "elemento_despesa": "elemento_despesa", "despesa_descricao": "desspesas_descricao",
+    "natureza_despesa": "natureza_despeza", "fonte": "fonte",
+    "categoria_economica": "catagoria_economica", "categoria_descricao": "catagoria_descricao",
+    "grupo_despesa": "grupo_despesa", "grupo_descricao": "grupo_descricao",
+    "modalidade_licitacao": "modalidade_licitacao", "numero_licitacao": "numero_licitacao",
+    "favorecido": "descricao_favorecido", "cpf_cnpj": "CPF_CNPJ_FORMATADA", "tipo": "Tipo",
+    "valor_despesa": "valor_despesa", "valor_estornado": "Valor_Estornado", "valor_retido": "RETIDO",
+    "empenho": "empenho", "op": "OP", "processo": "EMP_PROCESSO_COMPLETO",
+}
+
+
+def tabela_registros(linhas: int) -> pa.Table:
+    bruto = construir_tabela([registro(i, 2024 + i % 2) for i in range(linhas)], DESPESAS_PAGAS)
+    return pa.table({destino: bruto[origem] for destino, origem in REGISTROS.items()})
+
+
+def tabela_rollup(registros: pa.Table) -> pa.Table:
+    """rollup_mensal agregado dos registros, como o BigQuery devolveria"""
+    mes = pc.strftime(registros["data_despesa"].cast(pa.timestamp("s")), format="%Y-%m")
+    base = pa.table({
+        "ano_exercicio": registros["ano"], "ano_mes": mes,
+        "secretaria_padronizada": registros["secretaria"], "funcao": registros["funcao"],
+        "fonte": registros["fonte"], "valor_despesa": registros["valor_despesa"],
+    })
+    chaves = ["ano_exercicio", "ano_mes", "secretaria_padronizada", "funcao", "fonte"]
+    agregado = base.group_by(chaves).aggregate([("valor_despesa", "count"), ("valor_despesa", "sum")])
+    return pa.table({
+        **{c: agregado[c] for c in chaves},
+        "total_registros": agregado["valor_despesa_count"],
+        "total_despesa": agregado["valor_despesa_sum"],
+        "valor_liquido": agregado["valor_despesa_sum"],
+    })
+
+
+def antes_registros(tabela: pa.Table):
+    i = tabela.schema.get_field_index("valor_despesa")
+    tabela = tabela.set_column(i, "valor_despesa", pc.fill_null(para_float(tabela["valor_despesa"]), 0.0))
+    return tabela.to_pandas(date_as_object=False)
+
+
+def antes_rollup(tabela: pa.Table):
+    for coluna in ("total_despesa", "valor_liquido"):
+        i = tabela.schema.get_field_index(coluna)
+        tabela = tabela.set_column(i, coluna, pc.fill_null(para_float(tabela[coluna]), 0.0))
+    return tabela.to_pandas()
+
+
+def depois(tabela: pa.Table) -> pd.DataFrame:
+    return para_pandas(compactar(tabela))
+
+
+def medir(nome: str, funcao, tabela: pa.Table):
+    inicio = time.perf_counter()
+    df = funcao(tabela)
+    segundos = time.perf_counter() - inicio
+    total = df.memory_usage(deep=True, index=False).sum()
+    return nome, len(df), len(df.columns), total, segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memória por linha dos dados do dashboard")
+    parser.add_argument("--linhas", type=int, nargs="+", default=LINHAS)
+    args = parser.parse_args(argv)
+
+    # No pandas 3 o "antes" já usa strings Arrow; no pandas 2 são objetos str (bem maiores)
+    print(f"pandas {pd.__version__}, pyarrow {pa.__version__}\n")
+    print(f"{'conjunto':<28} {'linhas':>10} {'colunas':>8} {'MB':>9} {'bytes/linha':>12} {'conversão':>10}")
+    for linhas in args.linhas:
+        registros = tabela_registros(linhas)
+        rollup = tabela_rollup(registros)
+        casos = [
+            medir("registros (antes)", antes_registros, registros),
+            medir("registros (depois)", depois, registros.select(COLUNAS_REGISTROS)),
+            medir("rollup_mensal (antes)", antes_rollup, rollup),
+            medir("rollup_mensal (depois)", depois, rollup.select(colunas_rollup("mensal"))),
+        ]
+        for nome, n, colunas, total, segundos in casos:
+            print(
+                f"{nome:<28} {n:>10,} {colunas:>8} {total / 1024**2:>9.1f} "
+                f"{total / max(n, 1):>12.0f} {segundos:>9.2f}s"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
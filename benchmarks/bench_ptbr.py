@@ -0,0 +1,112 @@
+"""
+Microbenchmark da conversão pt-BR (scripts/ingestao/ptbr.py) contra pandas.
+
+Compara, para valores "1.234,56" e datas "YYYY-MM-DD HH:MM:SS.S":
+- pandas: str.replace + pd.to_numeric / pd.to_datetime (abordagem anterior)
+- ptbr (lista): a partir da lista de valores do JSON, como na ingestão
+- ptbr (arrow): a partir de um array Arrow de strings já montado
+
+Uso:
+    python benchmarks/bench_ptbr.py --linhas 1000000 --repeticoes 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from ingestao import ptbr  # noqa: E402
+
+
+LINHAS = 1_000_000
+REPETICOES = 5
+# Fração de valores inválidos/vazios misturados aos válidos
+INVALIDOS = 0.01
+
+
+def gerar_valores(linhas: int, semente: int = 42):
+    rng = random.Random(semente)
+    valores = []
+    datas = []
+    for _ in range(linhas):
+        centavos = rng.randrange(1, 10**10)
+        inteiro, frac = divmod(centavos, 100)
+        valores.append(f"{inteiro:,}".replace(",", ".") + f",{frac:02d}")
+        datas.append(f"{rng.randrange(2015, 2027)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} 00:00:00.0")
+
+    for i in rng.sample(range(linhas), int(linhas * INVALIDOS)):
+        valores[i] = rng.choice(["", None, "n/d"])
+        datas[i] = rng.choice(["", None, "0000-00-00 00:00:00.0"])
+    return valores, datas
+
+
+def pandas_numerico(valores):
+    s = pd.Series(valores, dtype=object)
+    s = s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
+def pandas_data(datas):
+    return pd.to_datetime(pd.Series(datas, dtype=object).str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+
+
+def medir(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da conversão pt-BR")
+    parser.add_argument("--linhas", type=int, default=LINHAS)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    args = parser.parse_args(argv)
+
+    print(f"🧪 Gerando {args.linhas:,} valores e datas...")
+    valores, datas = gerar_valores(args.linhas)
+    valores_arrow = pa.array(valores, type=pa.string())
+    datas_arrow = pa.array(datas, type=pa.string())
+
+    # Mesmo resultado nas duas abordagens
+    esperado = pandas_numerico(valores).to_numpy()
+    obtido = ptbr.numerico(valores_arrow).valores.cast(pa.float64()).to_numpy(zero_copy_only=False)
+    assert np.allclose(esperado, obtido, equal_nan=True), "valores divergem do pandas"
+    esperado = pandas_data(datas).isna().sum()
+    assert esperado == ptbr.data(datas_arrow).valores.null_count, "datas divergem do pandas"
+
+    casos = [
+        ("valor", "pandas", lambda: pandas_numerico(valores)),
+        ("valor", "ptbr (lista)", lambda: ptbr.numerico(valores)),
+        ("valor", "ptbr (arrow)", lambda: ptbr.numerico(valores_arrow)),
+        ("data", "pandas", lambda: pandas_data(datas)),
+        ("data", "ptbr (lista)", lambda: ptbr.data(datas)),
+        ("data", "ptbr (arrow)", lambda: ptbr.data(datas_arrow)),
+    ]
+
+    print(f"\n{'coluna':<6} {'método':<13} {'mediana':>9} {'linhas/s':>13} {'x pandas':>9}")
+    base = {}
+    for coluna, metodo, funcao in casos:
+        segundos = medir(funcao, args.repeticoes)
+        base.setdefault(coluna, segundos)
+        print(
+            f"{coluna:<6} {metodo:<13} {segundos:>8.3f}s {args.linhas / segundos:>13,.0f} "
+            f"{base[coluna] / segundos:>8.1f}x"
+        )
+
+    falhas = ptbr.numerico(valores_arrow).falhas
+    print(f"\n⚠️ Falhas de conversão contadas em valor: {falhas:,}")
+
+
+if __name__ == "__main__":
+    main()
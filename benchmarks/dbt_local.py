@@ -0,0 +1,168 @@
+"""
+Dados sintéticos e benchmark do projeto dbt no DuckDB (profiles/duckdb).
+
+Os registros vêm do mesmo gerador do benchmark de ingestão e passam pela
+tipagem da ingestão (ingestao.schemas), então têm exatamente o formato de
+raw_despesas_pagas, com colunas de controle e algumas correções (novas
+versões de ids já carregados).
+
+    # seed pequeno versionado em seeds/raw_despesas_pagas.csv
+    python benchmarks/dbt_local.py seed --linhas 300
+
+    # carga completa + uma execução incremental por tamanho
+    python benchmarks/dbt_local.py bench --tamanhos 100000 1000000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "scripts"))
+
+from bench_ingestao import registro  # noqa: E402
+from dbt_perfil import ler_run_results  # noqa: E402
+from ingestao.schemas import DESPESAS_PAGAS, com_controle, construir_tabela, hash_conteudo  # noqa: E402
+
+
+ANOS = [2024, 2025]
+TAMANHOS = [100_000, 1_000_000]
+SEED = os.path.join(RAIZ, "seeds", "raw_despesas_pagas.csv")
+PROFILES = os.path.join(RAIZ, "profiles", "duckdb")
+
+# Schema do seed/source no profile local: <schema do target>_despesas_queimados
+SCHEMA_RAW = "local_despesas_queimados"
+
+# Fração do volume que chega na execução incremental (metade correções)
+DELTA = 0.01
+
+INICIO = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+
+
+def gerar_raw(linhas: int, anos=ANOS, inicio: int = 0, ingerido_em: datetime = INICIO,
+              alterados: int = 0, lote: str = "sintetico") -> pa.Table:
+    """
+    `linhas` registros novos (ids a partir de `inicio`) distribuídos pelos
+    anos, mais `alterados` novas versões de ids já existentes (valor e mês
+    diferentes), como a ingestão gravaria num lote.
+    """
+    registros = []
+    for i in range(inicio, inicio + linhas):
+        registros.append(registro(i, anos[i % len(anos)]))
+
+    for i in range(alterados):
+        antigo = registro(i, anos[i % len(anos)])
+        novo = registro(i + 7, anos[i % len(anos)])
+        antigo.update(valor_despesa=novo["valor_despesa"], data_despesa=novo["data_despesa"])
+        registros.append(antigo)
+
+    tabela = construir_tabela(registros, DESPESAS_PAGAS)
+    marcados = np.zeros(len(registros), dtype=bool)
+    marcados[linhas:] = True
+    return com_controle(tabela, hash_conteudo(tabela), marcados, ingerido_em, lote_id=lote)
+
+
+def gerar_seed(linhas: int, caminho: str = SEED):
+    """CSV com uma carga inicial e um segundo lote com correções"""
+    inicial = gerar_raw(linhas, lote="seed-1")
+    delta = gerar_raw(
+        linhas // 10, inicio=linhas, ingerido_em=INICIO + timedelta(days=1),
+        alterados=linhas // 20, lote="seed-2"
+    )
+    tabela = pa.concat_tables([inicial, delta])
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    pacsv.write_csv(tabela, caminho)
+    print(f"🌱 Seed gravado: {caminho} ({tabela.num_rows} linhas)")
+
+
+def dbt(diretorio: str, *argumentos):
+    """Comando do dbt no DuckDB do diretório, com target/ e logs/ dentro dele"""
+    env = dict(os.environ, DBT_DUCKDB_PATH=os.path.join(diretorio, "bench.duckdb"))
+    subprocess.run(
+        ["dbt", *argumentos, "--profiles-dir", PROFILES, "--project-dir", RAIZ,
+         "--target-path", os.path.join(diretorio, "target"),
+         "--log-path", os.path.join(diretorio, "logs"), "--quiet"],
+        env=env, check=True
+    )
+
+
+def dbt_run(diretorio: str, *extra) -> dict:
+    """Roda o dbt no DuckDB do diretório e devolve o tempo por modelo"""
+    alvo = os.path.join(diretorio, "target")
+    inicio = time.perf_counter()
+    dbt(diretorio, "run", *extra)
+    total = time.perf_counter() - inicio
+    modelos = {p.modelo: p.tempo_s for p in ler_run_results(os.path.join(alvo, "run_results.json"))}
+    return {"total": total, "modelos": modelos}
+
+
+def carregar_raw(diretorio: str, tabela: pa.Table, substituir: bool):
+    con = duckdb.connect(os.path.join(diretorio, "bench.duckdb"))
+    con.execute(f"create schema if not exists {SCHEMA_RAW}")
+    con.register("lote", tabela)
+    if substituir:
+        con.execute(f"create or replace table {SCHEMA_RAW}.raw_despesas_pagas as select * from lote")
+    else:
+        con.execute(f"insert into {SCHEMA_RAW}.raw_despesas_pagas select * from lote")
+    con.close()
+
+
+def bench(tamanhos):
+    resultados = []
+    for linhas in tamanhos:
+        print(f"\n🧪 {linhas:,} registros")
+        with tempfile.TemporaryDirectory(prefix="dbt_local_") as diretorio:
+            inicio = time.perf_counter()
+            carregar_raw(diretorio, gerar_raw(linhas), substituir=True)
+            print(f"   dados gerados e carregados em {time.perf_counter() - inicio:.1f}s")
+
+            completo = dbt_run(diretorio, "--full-refresh")
+
+            delta = int(linhas * DELTA)
+            carregar_raw(diretorio, gerar_raw(
+                delta // 2, inicio=linhas, ingerido_em=INICIO + timedelta(days=1),
+                alterados=delta // 2, lote="delta"
+            ), substituir=False)
+            incremental = dbt_run(diretorio)
+
+        resultados.append((linhas, completo, incremental))
+
+    print(f"\n{'modelo':<45} {'linhas':>10} {'completo':>9} {'incremental':>12}")
+    for linhas, completo, incremental in resultados:
+        for modelo in sorted(completo["modelos"]):
+            print(
+                f"{modelo:<45} {linhas:>10,} {completo['modelos'][modelo]:>8.2f}s "
+                f"{incremental['modelos'].get(modelo, 0):>11.2f}s"
+            )
+        print(f"{'(dbt run, total)':<45} {linhas:>10,} {completo['total']:>8.2f}s {incremental['total']:>11.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seeds sintéticos e benchmark do dbt no DuckDB")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_seed = sub.add_parser("seed", help="Gera seeds/raw_despesas_pagas.csv")
+    p_seed.add_argument("--linhas", type=int, default=300)
+    p_seed.add_argument("--saida", default=SEED)
+
+    p_bench = sub.add_parser("bench", help="Mede dbt run completo e incremental por volume")
+    p_bench.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS)
+
+    args = parser.parse_args(argv)
+    if args.comando == "seed":
+        gerar_seed(args.linhas, args.saida)
+    else:
+        bench(args.tamanhos)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,9 @@ Elaborado por Christian Basilio
 """
 
 import dash
+import flask
 from dash import dcc, html, dash_table
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
@@ -14,7 +15,21 @@ from google.cloud import bigquery
 from google.oauth2 import service_account
 import os
 import json
+import hashlib
 import tempfile
+from functools import lru_cache, partial
+
+from armazem import ArmazemSnapshot
+from cache import CacheResultados, normalizar
+from dados import GerenciadorDados
+from indice import IndiceFiltros
+from paginacao import (
+    ORDEM, estado_inicial, filtrar_tabela, navegar, ordenar, posicoes, recortar, total_paginas,
+)
+from projecao import (
+    COLUNAS_REGISTROS, FILTROS_REGISTROS, FILTROS_ROLLUP, colunas_rollup, compactar, consulta, para_pandas,
+    rotulo_mes,
+)
 
 # ============================================
 # CONFIGURAÇÃO
@@ -22,7 +37,15 @@ import tempfile
 
 PROJECT_ID = "monitorpublico"
 DATASET = "staging_marts_queimados"
-TABLE = "gastos_por_secretaria"
+# Rollups mensais por dimensão de gráfico (models/marts/rollups), todos com
+# as dimensões de filtro: ano_exercicio, secretaria_padronizada, funcao e fonte
+ROLLUPS = {
+    "mensal": "rollup_mensal",
+    "tipo": "rollup_tipo",
+    "unidade_orcamentaria": "rollup_unidade_orcamentaria",
+    "modalidade_licitacao": "rollup_modalidade_licitacao",
+    "subfuncao": "rollup_subfuncao",
+}
 TABLE_DETALHADA = "registros_detalhados"
 
 # ============================================
@@ -52,75 +75,86 @@ def get_credentials():
     raise RuntimeError("Credenciais não encontradas")
 
 
-def load_data():
-    credentials = get_credentials()
-    client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
-
-    query = f"""
-    SELECT *
-    FROM `{PROJECT_ID}.{DATASET}.{TABLE}`
-    """
-
-    df = client.query(query).to_dataframe()
+@lru_cache(maxsize=1)
+def get_client():
+    """Um cliente por processo, reaproveitado em todas as cargas"""
+    return bigquery.Client(credentials=get_credentials(), project=PROJECT_ID)
 
-    # Conversões
-    df["total_despesa"] = pd.to_numeric(df["total_despesa"], errors="coerce").fillna(0)
-    df["valor_liquido"] = pd.to_numeric(df["valor_liquido"], errors="coerce").fillna(0)
-    df["total_estornado"] = pd.to_numeric(df["total_estornado"], errors="coerce").fillna(0)
-    df["total_retido"] = pd.to_numeric(df["total_retido"], errors="coerce").fillna(0)
-    df["total_registros"] = pd.to_numeric(df["total_registros"], errors="coerce").fillna(0)
-    df["ano_exercicio"] = pd.to_numeric(df["ano_exercicio"], errors="coerce")
-    df["data_despesa"] = pd.to_datetime(df["data_despesa"], errors="coerce")
-    df["ano_mes"] = df["data_despesa"].dt.to_period("M").astype(str)
-    df["mes"] = df["data_despesa"].dt.month
-    df["mes_nome"] = df["data_despesa"].dt.strftime("%b")
 
-    return df
+def load_rollup(nome: str):
+    """Carrega um rollup mensal (Arrow, tipos compactos)"""
+    # Só as colunas usadas nos callbacks
+    query = consulta(f"{PROJECT_ID}.{DATASET}.{ROLLUPS[nome]}", colunas_rollup(nome))
+    return compactar(get_client().query(query).to_arrow())
 
 
 def load_data_detalhada():
-    """Carrega registros individuais (não agregados)"""
-    credentials = get_credentials()
-    client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
+    """Carrega registros individuais (não agregados), já na ordem da tabela detalhada"""
+    query = consulta(f"{PROJECT_ID}.{DATASET}.{TABLE_DETALHADA}", COLUNAS_REGISTROS)
+    return ordenar(compactar(get_client().query(query).to_arrow()))
 
-    query = f"""
-    SELECT *
-    FROM `{PROJECT_ID}.{DATASET}.{TABLE_DETALHADA}`
-    """
-
-    df = client.query(query).to_dataframe()
-
-    # Conversões básicas
-    df["valor_despesa"] = pd.to_numeric(df["valor_despesa"], errors="coerce").fillna(0)
-    df["ano"] = pd.to_numeric(df["ano"], errors="coerce")
-    df["data_despesa"] = pd.to_datetime(df["data_despesa"], errors="coerce")
 
-    return df
+def montar_dados(tabelas: dict) -> dict:
+    """
+    Rollups (pequenos) viram DataFrames; os registros ficam no Arrow mapeado
+    do snapshot em disco, compartilhado entre os workers, e só as linhas de
+    uma página viram DataFrame no callback. Os índices dos filtros são
+    montados uma vez aqui, para todas as interações com este snapshot.
+    """
+    indices = {nome: IndiceFiltros(tabelas[f"rollup_{nome}"], FILTROS_ROLLUP) for nome in ROLLUPS}
+    indices["registros"] = IndiceFiltros(tabelas["registros"], FILTROS_REGISTROS)
+    return {
+        "rollups": {nome: para_pandas(tabelas[f"rollup_{nome}"]) for nome in ROLLUPS},
+        "registros": tabelas["registros"],
+        "indices": indices,
+    }
 
 
 # ============================================
-# CARREGAR DADOS
+# CARREGAR DADOS (em segundo plano)
 # ============================================
 
-try:
-    df = load_data()
-    print("✅ Dados agregados carregados do BigQuery")
-except Exception as e:
-    print(f"❌ Erro ao carregar dados agregados: {e}")
-    df = pd.DataFrame()
+# Intervalo entre recargas dos dados, em segundos
+REFRESH_S = int(os.getenv("DASHBOARD_REFRESH_S", "3600"))
+
+# Snapshot em disco (Arrow IPC) lido por todos os workers do gunicorn
+SNAPSHOT_DIR = os.getenv("DASHBOARD_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "monitorpublico_snapshot"))
+
+# Tabelas, colunas e ordem dos registros gravados no snapshot: um snapshot
+# em disco de outra versão do código não é aberto, e sim recriado. Mudanças
+# de tipo em projecao.compactar também exigem trocar FORMATO_SNAPSHOT.
+FORMATO_SNAPSHOT = 1
+ESQUEMA_SNAPSHOT = hashlib.sha256(json.dumps({
+    "formato": FORMATO_SNAPSHOT,
+    "rollups": {nome: colunas_rollup(nome) for nome in ROLLUPS},
+    "registros": COLUNAS_REGISTROS,
+    "ordem": ORDEM,
+}, sort_keys=True).encode()).hexdigest()[:16]
+
+# As consultas rodam em paralelo, fora do boot do worker e em um worker por
+# vez; os outros abrem a versão gravada. Os callbacks leem dados.snapshot,
+# trocado inteiro a cada recarga. A carga começa no fim do módulo, depois
+# que os callbacks (usados no aquecimento do cache) estão definidos.
+carregadores = {f"rollup_{nome}": partial(load_rollup, nome) for nome in ROLLUPS}
+carregadores["registros"] = load_data_detalhada
+dados = GerenciadorDados(
+    carregadores,
+    intervalo_s=REFRESH_S,
+    armazem=ArmazemSnapshot(SNAPSHOT_DIR, esquema=ESQUEMA_SNAPSHOT),
+    montar=montar_dados,
+)
 
-try:
-    df_registros = load_data_detalhada()
-    print(f"✅ Registros detalhados carregados: {len(df_registros)} registros")
-except Exception as e:
-    print(f"❌ Erro ao carregar registros detalhados: {e}")
-    df_registros = pd.DataFrame()
+# Resultados do update_dashboard por versão do snapshot + filtros (LRU)
+CACHE_MAX = int(os.getenv("DASHBOARD_CACHE_MAX", "64"))
+cache = CacheResultados(CACHE_MAX)
+# Páginas da tabela detalhada por versão + filtros + ordenação + página
+cache_paginas = CacheResultados(CACHE_MAX)
 
 # ============================================
 # APP
 # ============================================
 
-app = dash.Dash(__name__, title="Monitor Público - Queimados")
+app = dash.Dash(__name__, title="Monitor Público - Queimados", suppress_callback_exceptions=True)
 
 # ============================================
 # CORES (paleta institucional)
@@ -192,6 +226,17 @@ kpi_label_style = {
     "fontWeight": "500"
 }
 
+botao_style = {
+    "backgroundColor": COLORS["card"],
+    "color": COLORS["primary"],
+    "border": f"1px solid {COLORS['primary']}",
+    "borderRadius": "8px",
+    "padding": "6px 14px",
+    "fontSize": "12px",
+    "fontWeight": "600",
+    "cursor": "pointer"
+}
+
 # ============================================
 # FUNÇÕES AUXILIARES
 # ============================================
@@ -211,6 +256,10 @@ def fmt_number(v):
     """Formata número grande para exibição"""
     return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
+def anos_padrao(df):
+    """Anos selecionados ao abrir o dashboard (todos)"""
+    return sorted(int(ano) for ano in df["ano_exercicio"].dropna().unique())
+
 def fmt_label(v):
     """Formata valor para label do gráfico (B para bilhões, M para milhões)"""
     if v >= 1_000_000_000:
@@ -222,362 +271,411 @@ def fmt_label(v):
 # LAYOUT
 # ============================================
 
-app.layout = html.Div([
-
-    # ========== HEADER ==========
-    html.Div([
+def layout_carregando():
+    """Página exibida enquanto o primeiro snapshot não fica pronto; recarrega sozinha"""
+    return html.Div([
+        dcc.Location(id="recarregar", refresh=True),
+        dcc.Interval(id="aguardando-dados", interval=3000),
         html.Div([
-            # Logo + Nome
-            html.Div([
-                html.Img(
-                    src=LOGO_SVG_BASE64,
-                    style={
-                        "width": "42px",
-                        "height": "42px"
-                    }
-                ),
-                html.Div([
-                    html.H1("Monitor Público", style={
-                        "fontSize": "22px",
-                        "fontWeight": "700",
-                        "color": "white",
-                        "margin": "0",
-                        "letterSpacing": "0.5px"
-                    }),
-                    html.P("Queimados • Despesas Pagas", style={
-                        "fontSize": "12px",
-                        "color": "rgba(255,255,255,0.8)",
-                        "margin": "2px 0 0 0"
-                    })
-                ], style={"marginLeft": "12px"})
-            ], style={"display": "flex", "alignItems": "center"})
-        ], style={"flex": "1"}),
+            html.Img(src=LOGO_SVG_BASE64, style={"width": "42px", "height": "42px"}),
+            html.H1("Monitor Público", style={"fontSize": "22px", "fontWeight": "700", "color": "white", "margin": "10px 0 0 0"}),
+            html.P("Carregando dados do BigQuery...", style={"fontSize": "13px", "color": "rgba(255,255,255,0.8)"})
+        ], style={
+            "display": "flex", "flexDirection": "column", "alignItems": "center",
+            "padding": "40px 30px",
+            "background": f"linear-gradient(135deg, {COLORS['primary']} 0%, {COLORS['primary_dark']} 100%)"
+        })
+    ], style={"fontFamily": "'Inter', 'Segoe UI', sans-serif", "backgroundColor": COLORS["bg"], "minHeight": "100vh"})
 
-        # Filtros no header
-        html.Div([
-            dcc.Dropdown(
-                id="filtro-ano",
-                options=[{"label": str(int(ano)), "value": int(ano)}
-                         for ano in sorted(df["ano_exercicio"].dropna().unique(), reverse=True)] if not df.empty else [],
-                value=list(df["ano_exercicio"].dropna().unique()) if not df.empty else [],
-                multi=True,
-                placeholder="Ano",
-                style={"width": "250px", "fontSize": "13px"},
-                className="filter-dropdown"
-            ),
-            dcc.Dropdown(
-                id="filtro-secretaria",
-                options=[{"label": s[:35], "value": s} for s in sorted(df["secretaria_padronizada"].dropna().unique())] if not df.empty else [],
-                value=[],
-                multi=True,
-                placeholder="Secretaria",
-                style={"width": "250px", "fontSize": "13px"},
-                className="filter-dropdown"
-            ),
-            dcc.Dropdown(
-                id="filtro-funcao",
-                options=[{"label": f, "value": f} for f in sorted(df["funcao"].dropna().unique())] if not df.empty else [],
-                value=[],
-                multi=True,
-                placeholder="Função",
-                style={"width": "250px", "fontSize": "13px"},
-                className="filter-dropdown"
-            ),
-            dcc.Dropdown(
-                id="filtro-fonte",
-                options=[{"label": str(f)[:30], "value": f} for f in sorted(df["fonte"].dropna().unique())] if not df.empty and "fonte" in df.columns else [],
-                value=[],
-                multi=True,
-                placeholder="Fonte",
-                style={"width": "250px", "fontSize": "13px"},
-                className="filter-dropdown"
-            ),
-        ], style={"display": "flex", "gap": "10px", "alignItems": "center"})
 
-    ], style={
-        "display": "flex",
-        "justifyContent": "space-between",
-        "alignItems": "center",
-        "padding": "15px 30px",
-        "background": f"linear-gradient(135deg, {COLORS['primary']} 0%, {COLORS['primary_dark']} 100%)",
-        "boxShadow": "0 4px 20px rgba(91, 110, 225, 0.3)"
-    }),
-
-    # ========== CONTEÚDO PRINCIPAL ==========
-    html.Div([
-
-        # ========== LINHA 1: KPIs ==========
-        html.Div([
-            # KPI 1 - Total Despesas Pagas
-            html.Div([
-                html.Div(style={
-                    "position": "absolute",
-                    "top": "-20px",
-                    "right": "-20px",
-                    "width": "80px",
-                    "height": "80px",
-                    "borderRadius": "50%",
-                    "background": f"linear-gradient(135deg, {COLORS['primary']}20 0%, {COLORS['primary']}05 100%)"
-                }),
-                html.Div(id="kpi-total", style={**kpi_value_style, "color": COLORS["primary"]}),
-                html.Div("Total Despesas Pagas", style=kpi_label_style)
-            ], style=kpi_card_style),
-
-            # KPI 2 - Média Mensal
-            html.Div([
-                html.Div(style={
-                    "position": "absolute",
-                    "top": "-20px",
-                    "right": "-20px",
-                    "width": "80px",
-                    "height": "80px",
-                    "borderRadius": "50%",
-                    "background": f"linear-gradient(135deg, {COLORS['secondary']}20 0%, {COLORS['secondary']}05 100%)"
-                }),
-                html.Div(id="kpi-media", style={**kpi_value_style, "color": COLORS["secondary"]}),
-                html.Div("Média Mensal de Pagamentos", style=kpi_label_style)
-            ], style=kpi_card_style),
-
-            # KPI 3 - Total de Registros
-            html.Div([
-                html.Div(style={
-                    "position": "absolute",
-                    "top": "-20px",
-                    "right": "-20px",
-                    "width": "80px",
-                    "height": "80px",
-                    "borderRadius": "50%",
-                    "background": f"linear-gradient(135deg, {COLORS['accent']}20 0%, {COLORS['accent']}05 100%)"
-                }),
-                html.Div(id="kpi-registros", style={**kpi_value_style, "color": COLORS["accent"]}),
-                html.Div("Total de Pagamentos Efetuados", style=kpi_label_style)
-            ], style=kpi_card_style),
+def serve_layout():
+    """Layout montado a cada acesso, com as opções de filtro do snapshot atual"""
+    snapshot = dados.snapshot
+    if not snapshot.pronto:
+        return layout_carregando()
+    df = snapshot.dados["rollups"]["mensal"]
 
-        ], style={
-            "display": "grid",
-            "gridTemplateColumns": "repeat(3, 1fr)",
-            "gap": "20px",
-            "marginBottom": "20px"
-        }),
+    return html.Div([
 
-        # ========== LINHA 2: Gráficos principais ==========
+        # ========== HEADER ==========
         html.Div([
-            # Gráfico Evolução Temporal
             html.Div([
-                html.Div("Evolução Mensal das Despesas Pagas", style=title_style),
-                dcc.Graph(id="grafico-temporal", config={"displayModeBar": False})
-            ], style={**card_style, "flex": "2"}),
-
-            # Gráfico Tipo (Barras)
+                # Logo + Nome
+                html.Div([
+                    html.Img(
+                        src=LOGO_SVG_BASE64,
+                        style={
+                            "width": "42px",
+                            "height": "42px"
+                        }
+                    ),
+                    html.Div([
+                        html.H1("Monitor Público", style={
+                            "fontSize": "22px",
+                            "fontWeight": "700",
+                            "color": "white",
+                            "margin": "0",
+                            "letterSpacing": "0.5px"
+                        }),
+                        html.P("Queimados • Despesas Pagas", style={
+                            "fontSize": "12px",
+                            "color": "rgba(255,255,255,0.8)",
+                            "margin": "2px 0 0 0"
+                        })
+                    ], style={"marginLeft": "12px"})
+                ], style={"display": "flex", "alignItems": "center"})
+            ], style={"flex": "1"}),
+
+            # Filtros no header
             html.Div([
-                html.Div("Despesas Pagas por Tipo de Credor", style=title_style),
-                dcc.Graph(id="grafico-tipo", config={"displayModeBar": False})
-            ], style={**card_style, "flex": "1"}),
+                dcc.Dropdown(
+                    id="filtro-ano",
+                    options=[{"label": str(int(ano)), "value": int(ano)}
+                             for ano in sorted(df["ano_exercicio"].dropna().unique(), reverse=True)] if not df.empty else [],
+                    value=anos_padrao(df) if not df.empty else [],
+                    multi=True,
+                    placeholder="Ano",
+                    style={"width": "250px", "fontSize": "13px"},
+                    className="filter-dropdown"
+                ),
+                dcc.Dropdown(
+                    id="filtro-secretaria",
+                    options=[{"label": s[:35], "value": s} for s in sorted(df["secretaria_padronizada"].dropna().unique())] if not df.empty else [],
+                    value=[],
+                    multi=True,
+                    placeholder="Secretaria",
+                    style={"width": "250px", "fontSize": "13px"},
+                    className="filter-dropdown"
+                ),
+                dcc.Dropdown(
+                    id="filtro-funcao",
+                    options=[{"label": f, "value": f} for f in sorted(df["funcao"].dropna().unique())] if not df.empty else [],
+                    value=[],
+                    multi=True,
+                    placeholder="Função",
+                    style={"width": "250px", "fontSize": "13px"},
+                    className="filter-dropdown"
+                ),
+                dcc.Dropdown(
+                    id="filtro-fonte",
+                    options=[{"label": str(f)[:30], "value": f} for f in sorted(df["fonte"].dropna().unique())] if not df.empty and "fonte" in df.columns else [],
+                    value=[],
+                    multi=True,
+                    placeholder="Fonte",
+                    style={"width": "250px", "fontSize": "13px"},
+                    className="filter-dropdown"
+                ),
+            ], style={"display": "flex", "gap": "10px", "alignItems": "center"})
 
         ], style={
             "display": "flex",
-            "gap": "20px",
-            "marginBottom": "20px"
+            "justifyContent": "space-between",
+            "alignItems": "center",
+            "padding": "15px 30px",
+            "background": f"linear-gradient(135deg, {COLORS['primary']} 0%, {COLORS['primary_dark']} 100%)",
+            "boxShadow": "0 4px 20px rgba(91, 110, 225, 0.3)"
         }),
 
-        # ========== LINHA 3: Secretarias e Unidade Orçamentária ==========
+        # ========== CONTEÚDO PRINCIPAL ==========
         html.Div([
-            # Barras - Todas Secretarias (com scroll)
+
+            # ========== LINHA 1: KPIs ==========
             html.Div([
-                html.Div("Despesas Pagas por Secretaria", style=title_style),
+                # KPI 1 - Total Despesas Pagas
+                html.Div([
+                    html.Div(style={
+                        "position": "absolute",
+                        "top": "-20px",
+                        "right": "-20px",
+                        "width": "80px",
+                        "height": "80px",
+                        "borderRadius": "50%",
+                        "background": f"linear-gradient(135deg, {COLORS['primary']}20 0%, {COLORS['primary']}05 100%)"
+                    }),
+                    html.Div(id="kpi-total", style={**kpi_value_style, "color": COLORS["primary"]}),
+                    html.Div("Total Despesas Pagas", style=kpi_label_style)
+                ], style=kpi_card_style),
+
+                # KPI 2 - Média Mensal
+                html.Div([
+                    html.Div(style={
+                        "position": "absolute",
+                        "top": "-20px",
+                        "right": "-20px",
+                        "width": "80px",
+                        "height": "80px",
+                        "borderRadius": "50%",
+                        "background": f"linear-gradient(135deg, {COLORS['secondary']}20 0%, {COLORS['secondary']}05 100%)"
+                    }),
+                    html.Div(id="kpi-media", style={**kpi_value_style, "color": COLORS["secondary"]}),
+                    html.Div("Média Mensal de Pagamentos", style=kpi_label_style)
+                ], style=kpi_card_style),
+
+                # KPI 3 - Total de Registros
                 html.Div([
-                    dcc.Graph(id="grafico-secretarias", config={"displayModeBar": False})
-                ], style={"maxHeight": "400px", "overflowY": "auto"})
-            ], style={**card_style, "flex": "1"}),
+                    html.Div(style={
+                        "position": "absolute",
+                        "top": "-20px",
+                        "right": "-20px",
+                        "width": "80px",
+                        "height": "80px",
+                        "borderRadius": "50%",
+                        "background": f"linear-gradient(135deg, {COLORS['accent']}20 0%, {COLORS['accent']}05 100%)"
+                    }),
+                    html.Div(id="kpi-registros", style={**kpi_value_style, "color": COLORS["accent"]}),
+                    html.Div("Total de Pagamentos Efetuados", style=kpi_label_style)
+                ], style=kpi_card_style),
+
+            ], style={
+                "display": "grid",
+                "gridTemplateColumns": "repeat(3, 1fr)",
+                "gap": "20px",
+                "marginBottom": "20px"
+            }),
 
-            # Barras - Unidade Orçamentária (com scroll)
+            # ========== LINHA 2: Gráficos principais ==========
             html.Div([
-                html.Div("Despesas Pagas por Unidade Orçamentária", style=title_style),
+                # Gráfico Evolução Temporal
                 html.Div([
-                    dcc.Graph(id="grafico-unidade", config={"displayModeBar": False})
-                ], style={"maxHeight": "400px", "overflowY": "auto"})
-            ], style={**card_style, "flex": "1"}),
+                    html.Div("Evolução Mensal das Despesas Pagas", style=title_style),
+                    dcc.Graph(id="grafico-temporal", config={"displayModeBar": False})
+                ], style={**card_style, "flex": "2"}),
 
-        ], style={
-            "display": "flex",
-            "gap": "20px",
-            "marginBottom": "20px"
-        }),
+                # Gráfico Tipo (Barras)
+                html.Div([
+                    html.Div("Despesas Pagas por Tipo de Credor", style=title_style),
+                    dcc.Graph(id="grafico-tipo", config={"displayModeBar": False})
+                ], style={**card_style, "flex": "1"}),
 
-        # ========== LINHA 4: Função e Modalidade ==========
-        html.Div([
-            # Barras - Por Função (com scroll)
+            ], style={
+                "display": "flex",
+                "gap": "20px",
+                "marginBottom": "20px"
+            }),
+
+            # ========== LINHA 3: Secretarias e Unidade Orçamentária ==========
             html.Div([
-                html.Div("Despesas Pagas por Função", style=title_style),
+                # Barras - Todas Secretarias (com scroll)
+                html.Div([
+                    html.Div("Despesas Pagas por Secretaria", style=title_style),
+                    html.Div([
+                        dcc.Graph(id="grafico-secretarias", config={"displayModeBar": False})
+                    ], style={"maxHeight": "400px", "overflowY": "auto"})
+                ], style={**card_style, "flex": "1"}),
+
+                # Barras - Unidade Orçamentária (com scroll)
                 html.Div([
-                    dcc.Graph(id="grafico-funcao", config={"displayModeBar": False})
-                ], style={"maxHeight": "350px", "overflowY": "auto"})
-            ], style={**card_style, "flex": "1"}),
+                    html.Div("Despesas Pagas por Unidade Orçamentária", style=title_style),
+                    html.Div([
+                        dcc.Graph(id="grafico-unidade", config={"displayModeBar": False})
+                    ], style={"maxHeight": "400px", "overflowY": "auto"})
+                ], style={**card_style, "flex": "1"}),
 
-            # Barras - Modalidade Licitação (com scroll)
+            ], style={
+                "display": "flex",
+                "gap": "20px",
+                "marginBottom": "20px"
+            }),
+
+            # ========== LINHA 4: Função e Modalidade ==========
             html.Div([
-                html.Div("Despesas Pagas por Modalidade de Licitação", style=title_style),
+                # Barras - Por Função (com scroll)
                 html.Div([
-                    dcc.Graph(id="grafico-modalidade", config={"displayModeBar": False})
-                ], style={"maxHeight": "350px", "overflowY": "auto"})
-            ], style={**card_style, "flex": "1"}),
+                    html.Div("Despesas Pagas por Função", style=title_style),
+                    html.Div([
+                        dcc.Graph(id="grafico-funcao", config={"displayModeBar": False})
+                    ], style={"maxHeight": "350px", "overflowY": "auto"})
+                ], style={**card_style, "flex": "1"}),
 
-        ], style={
-            "display": "flex",
-            "gap": "20px",
-            "marginBottom": "20px"
-        }),
+                # Barras - Modalidade Licitação (com scroll)
+                html.Div([
+                    html.Div("Despesas Pagas por Modalidade de Licitação", style=title_style),
+                    html.Div([
+                        dcc.Graph(id="grafico-modalidade", config={"displayModeBar": False})
+                    ], style={"maxHeight": "350px", "overflowY": "auto"})
+                ], style={**card_style, "flex": "1"}),
 
-        # ========== LINHA 5: Tabela Agregada ==========
-        html.Div([
-            html.Div("Despesas Pagas por Secretaria, Função e Subfunção", style=title_style),
-            html.Div(id="tabela-container")
-        ], style=card_style),
+            ], style={
+                "display": "flex",
+                "gap": "20px",
+                "marginBottom": "20px"
+            }),
 
-        # ========== LINHA 6: Tabela de Registros Detalhados ==========
-        html.Div([
+            # ========== LINHA 5: Tabela Agregada ==========
             html.Div([
-                html.Span("Registros Detalhados", style={
-                    **title_style,
-                    "display": "inline-block",
-                    "marginBottom": "0",
-                    "marginRight": "15px"
-                }),
-                html.Span("Dados não agregados • Visualize cada registro individualmente", style={
-                    "fontSize": "11px",
-                    "color": COLORS["text_light"],
-                    "fontStyle": "italic"
-                })
-            ], style={"marginBottom": "15px"}),
-            html.Div(id="tabela-detalhada-container", style={"overflowX": "auto"})
-        ], style={**card_style, "marginTop": "20px"}),
+                html.Div("Despesas Pagas por Secretaria, Função e Subfunção", style=title_style),
+                html.Div(id="tabela-container")
+            ], style=card_style),
 
-        # ========== SOBRE O PROJETO ==========
-        html.Div([
+            # ========== LINHA 6: Tabela de Registros Detalhados ==========
             html.Div([
                 html.Div([
-                    html.H3("Sobre o Projeto", style={
-                        "fontSize": "18px",
-                        "fontWeight": "700",
-                        "color": COLORS["text"],
-                        "marginBottom": "15px",
-                        "display": "flex",
-                        "alignItems": "center",
-                        "gap": "10px"
+                    html.Span("Registros Detalhados", style={
+                        **title_style,
+                        "display": "inline-block",
+                        "marginBottom": "0",
+                        "marginRight": "15px"
                     }),
-                    html.P([
-                        "O ",
-                        html.Strong("Monitor Público"),
-                        " é um projeto ",
-                        html.Strong("open source"),
-                        " desenvolvido com o objetivo de promover a ",
-                        html.Strong("transparência"),
-                        " e o ",
-                        html.Strong("controle social"),
-                        " das despesas pagas pelo município de Queimados-RJ."
-                    ], style={
-                        "fontSize": "14px",
-                        "color": COLORS["text"],
-                        "lineHeight": "1.7",
-                        "marginBottom": "12px"
+                    html.Span("Dados não agregados • Visualize cada registro individualmente", style={
+                        "fontSize": "11px",
+                        "color": COLORS["text_light"],
+                        "fontStyle": "italic"
+                    })
+                ], style={"marginBottom": "15px"}),
+                # Página atual da tabela detalhada (paginacao.py)
+                dcc.Store(id="paginacao-detalhada", data=estado_inicial()),
+                html.Div(id="total-detalhada", style={"marginBottom": "10px"}),
+                html.Div(montar_tabela_detalhada(), style={"overflowX": "auto"}),
+                html.Div([
+                    html.Button("← Anterior", id="pagina-anterior", n_clicks=0, disabled=True, style=botao_style),
+                    html.Span(id="pagina-info", style={
+                        "color": COLORS["text_light"], "fontSize": "12px", "margin": "0 12px"
                     }),
-                    html.P(
-                        "Através da coleta e análise automatizada dos dados do Portal da Transparência, "
-                        "esta ferramenta permite que qualquer cidadão acompanhe os pagamentos efetuados "
-                        "pela prefeitura, identificando para onde os recursos públicos estão sendo direcionados.",
-                        style={
-                            "fontSize": "14px",
-                            "color": COLORS["text_light"],
-                            "lineHeight": "1.7",
-                            "marginBottom": "15px"
-                        }
-                    ),
+                    html.Button("Próxima →", id="pagina-proxima", n_clicks=0, disabled=True, style=botao_style),
+                ], style={"display": "flex", "alignItems": "center", "justifyContent": "flex-end", "marginTop": "10px"})
+            ], style={**card_style, "marginTop": "20px"}),
+
+            # ========== SOBRE O PROJETO ==========
+            html.Div([
+                html.Div([
                     html.Div([
-                        html.Span("Código Aberto", style={
-                            "backgroundColor": f"{COLORS['primary']}15",
-                            "padding": "6px 14px",
-                            "borderRadius": "20px",
-                            "fontSize": "12px",
-                            "marginRight": "8px",
-                            "color": COLORS["primary"],
-                            "fontWeight": "600",
-                            "border": f"1px solid {COLORS['primary']}30"
-                        }),
-                        html.Span("Dados Públicos", style={
-                            "backgroundColor": f"{COLORS['secondary']}15",
-                            "padding": "6px 14px",
-                            "borderRadius": "20px",
-                            "fontSize": "12px",
-                            "marginRight": "8px",
-                            "color": COLORS["secondary"],
-                            "fontWeight": "600",
-                            "border": f"1px solid {COLORS['secondary']}30"
+                        html.H3("Sobre o Projeto", style={
+                            "fontSize": "18px",
+                            "fontWeight": "700",
+                            "color": COLORS["text"],
+                            "marginBottom": "15px",
+                            "display": "flex",
+                            "alignItems": "center",
+                            "gap": "10px"
                         }),
-                        html.Span("Atualização Automática", style={
-                            "backgroundColor": f"{COLORS['accent']}15",
-                            "padding": "6px 14px",
-                            "borderRadius": "20px",
-                            "fontSize": "12px",
-                            "color": COLORS["accent"],
-                            "fontWeight": "600",
-                            "border": f"1px solid {COLORS['accent']}30"
+                        html.P([
+                            "O ",
+                            html.Strong("Monitor Público"),
+                            " é um projeto ",
+                            html.Strong("open source"),
+                            " desenvolvido com o objetivo de promover a ",
+                            html.Strong("transparência"),
+                            " e o ",
+                            html.Strong("controle social"),
+                            " das despesas pagas pelo município de Queimados-RJ."
+                        ], style={
+                            "fontSize": "14px",
+                            "color": COLORS["text"],
+                            "lineHeight": "1.7",
+                            "marginBottom": "12px"
                         }),
-                    ], style={"marginTop": "5px"}),
-                ], style={"flex": "1"}),
+                        html.P(
+                            "Através da coleta e análise automatizada dos dados do Portal da Transparência, "
+                            "esta ferramenta permite que qualquer cidadão acompanhe os pagamentos efetuados "
+                            "pela prefeitura, identificando para onde os recursos públicos estão sendo direcionados.",
+                            style={
+                                "fontSize": "14px",
+                                "color": COLORS["text_light"],
+                                "lineHeight": "1.7",
+                                "marginBottom": "15px"
+                            }
+                        ),
+                        html.Div([
+                            html.Span("Código Aberto", style={
+                                "backgroundColor": f"{COLORS['primary']}15",
+                                "padding": "6px 14px",
+                                "borderRadius": "20px",
+                                "fontSize": "12px",
+                                "marginRight": "8px",
+                                "color": COLORS["primary"],
+                                "fontWeight": "600",
+                                "border": f"1px solid {COLORS['primary']}30"
+                            }),
+                            html.Span("Dados Públicos", style={
+                                "backgroundColor": f"{COLORS['secondary']}15",
+                                "padding": "6px 14px",
+                                "borderRadius": "20px",
+                                "fontSize": "12px",
+                                "marginRight": "8px",
+                                "color": COLORS["secondary"],
+                                "fontWeight": "600",
+                                "border": f"1px solid {COLORS['secondary']}30"
+                            }),
+                            html.Span("Atualização Automática", style={
+                                "backgroundColor": f"{COLORS['accent']}15",
+                                "padding": "6px 14px",
+                                "borderRadius": "20px",
+                                "fontSize": "12px",
+                                "color": COLORS["accent"],
+                                "fontWeight": "600",
+                                "border": f"1px solid {COLORS['accent']}30"
+                            }),
+                        ], style={"marginTop": "5px"}),
+                    ], style={"flex": "1"}),
+                ], style={
+                    "display": "flex",
+                    "alignItems": "flex-start"
+                })
             ], style={
-                "display": "flex",
-                "alignItems": "flex-start"
-            })
-        ], style={
-            **card_style,
-            "marginTop": "20px",
-            "background": f"linear-gradient(135deg, {COLORS['card']} 0%, #f8faff 100%)",
-            "borderLeft": f"4px solid {COLORS['primary']}"
-        }),
+                **card_style,
+                "marginTop": "20px",
+                "background": f"linear-gradient(135deg, {COLORS['card']} 0%, #f8faff 100%)",
+                "borderLeft": f"4px solid {COLORS['primary']}"
+            }),
 
-        # ========== FOOTER ==========
-        html.Div([
+            # ========== FOOTER ==========
             html.Div([
-                html.P([
-                    "Elaborado por ",
-                    html.Strong("Christian Basilio", style={"color": COLORS["primary"]}),
-                ], style={
-                    "color": COLORS["text_light"],
-                    "fontSize": "13px",
-                    "margin": "0"
-                }),
-                html.P([
-                    "Monitor Público 2026 • Todos os dados são obtidos do Portal da Transparência de Queimados"
-                ], style={
-                    "color": COLORS["text_light"],
-                    "fontSize": "11px",
-                    "margin": "5px 0 0 0",
-                    "opacity": "0.8"
-                })
-            ], style={"textAlign": "center"})
+                html.Div([
+                    html.P([
+                        "Elaborado por ",
+                        html.Strong("Christian Basilio", style={"color": COLORS["primary"]}),
+                    ], style={
+                        "color": COLORS["text_light"],
+                        "fontSize": "13px",
+                        "margin": "0"
+                    }),
+                    html.P([
+                        "Monitor Público 2026 • Todos os dados são obtidos do Portal da Transparência de Queimados"
+                    ], style={
+                        "color": COLORS["text_light"],
+                        "fontSize": "11px",
+                        "margin": "5px 0 0 0",
+                        "opacity": "0.8"
+                    })
+                ], style={"textAlign": "center"})
+            ], style={
+                "marginTop": "30px",
+                "paddingTop": "20px",
+                "borderTop": f"1px solid {COLORS['border']}"
+            })
+
         ], style={
-            "marginTop": "30px",
-            "paddingTop": "20px",
-            "borderTop": f"1px solid {COLORS['border']}"
+            "padding": "20px 30px",
+            "backgroundColor": COLORS["bg"],
+            "minHeight": "calc(100vh - 80px)"
         })
 
     ], style={
-        "padding": "20px 30px",
+        "fontFamily": "'Inter', 'Segoe UI', sans-serif",
         "backgroundColor": COLORS["bg"],
-        "minHeight": "calc(100vh - 80px)"
+        "minHeight": "100vh"
     })
 
-], style={
-    "fontFamily": "'Inter', 'Segoe UI', sans-serif",
-    "backgroundColor": COLORS["bg"],
-    "minHeight": "100vh"
-})
+
+# Função: cada acesso monta o layout com o snapshot mais recente
+app.layout = serve_layout
 
 
 # ============================================
 # CALLBACKS
 # ============================================
 
+@app.callback(
+    Output("recarregar", "href"),
+    Input("aguardando-dados", "n_intervals")
+)
+def aguardar_dados(_):
+    """Na página de carregamento: recarrega assim que o primeiro snapshot fica pronto"""
+    if dados.snapshot.pronto:
+        return "/"
+    return dash.no_update
+
+
 @app.callback(
     [
         Output("kpi-total", "children"),
@@ -590,7 +688,6 @@ app.layout = html.Div([
         Output("grafico-funcao", "figure"),
         Output("grafico-modalidade", "figure"),
         Output("tabela-container", "children"),
-        Output("tabela-detalhada-container", "children"),
     ],
     [
         Input("filtro-ano", "value"),
@@ -601,16 +698,25 @@ app.layout = html.Div([
 )
 def update_dashboard(anos, secretarias, funcoes, fontes):
 
-    df_f = df.copy()
+    # Um único snapshot por chamada, mesmo que uma recarga termine no meio
+    snapshot = dados.snapshot
+    # A mesma seleção em outra ordem cai na mesma entrada; a versão invalida na recarga
+    chave = (snapshot.versao,) + normalizar(anos, secretarias, funcoes, fontes)
+    return cache.obter(chave, lambda: calcular_dashboard(snapshot, anos, secretarias, funcoes, fontes))
+
 
-    if anos:
-        df_f = df_f[df_f["ano_exercicio"].isin(anos)]
-    if secretarias:
-        df_f = df_f[df_f["secretaria_padronizada"].isin(secretarias)]
-    if funcoes:
-        df_f = df_f[df_f["funcao"].isin(funcoes)]
-    if fontes and "fonte" in df_f.columns:
-        df_f = df_f[df_f["fonte"].isin(fontes)]
+def calcular_dashboard(snapshot, anos, secretarias, funcoes, fontes):
+    """KPIs, gráficos e tabelas de uma seleção do header"""
+    rollups = snapshot.dados["rollups"]
+    indices = snapshot.dados["indices"]
+    selecao = {"ano": anos, "secretaria": secretarias, "funcao": funcoes, "fonte": fontes}
+
+    def filtrar(nome):
+        """Aplica os filtros do header a um rollup pela máscara do índice, sem copiar o rollup inteiro"""
+        mascara = indices[nome].mascara(selecao)
+        return rollups[nome] if mascara is None else rollups[nome][mascara]
+
+    df_f = filtrar("mensal")
 
     # ========== KPIs ==========
     total = df_f["total_despesa"].sum()
@@ -628,6 +734,8 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
     df_temp = df_f.groupby("ano_mes", as_index=False).agg({
         "total_despesa": "sum"
     }).sort_values("ano_mes")
+    # ano_mes é a chave AAAAMM; o rótulo só é montado para os pontos do gráfico
+    df_temp["ano_mes"] = df_temp["ano_mes"].map(rotulo_mes)
 
     fig_temporal = go.Figure()
     fig_temporal.add_trace(go.Scatter(
@@ -649,7 +757,8 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
     )
 
     # ========== Gráfico Tipo (Barras) ==========
-    df_tipo = df_f.groupby("tipo", as_index=False)["total_despesa"].sum()
+    df_tipo = filtrar("tipo").groupby("tipo", as_index=False, observed=True)["total_despesa"].sum()
+    df_tipo["tipo"] = df_tipo["tipo"].astype(object)
     df_tipo["tipo_label"] = df_tipo["tipo"].map({"J": "Pessoa Jurídica", "F": "Pessoa Física"}).fillna(df_tipo["tipo"])
     df_tipo = df_tipo.sort_values("total_despesa", ascending=True)
     df_tipo["valor_fmt"] = df_tipo["total_despesa"].apply(fmt_number)
@@ -670,7 +779,7 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
     )
 
     # ========== Gráfico Secretarias (TODAS com scroll) ==========
-    df_sec = df_f.groupby("secretaria_padronizada", as_index=False)["total_despesa"].sum()
+    df_sec = df_f.groupby("secretaria_padronizada", as_index=False, observed=True)["total_despesa"].sum()
     df_sec = df_sec.sort_values("total_despesa", ascending=True)
     df_sec["valor_fmt"] = df_sec["total_despesa"].apply(fmt_number)
     df_sec["label"] = df_sec["total_despesa"].apply(fmt_label)
@@ -696,8 +805,9 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
     )
 
     # ========== Gráfico Unidade Orçamentária (com scroll) ==========
-    if "unidade_orcamentaria" in df_f.columns:
-        df_unid = df_f.groupby("unidade_orcamentaria", as_index=False)["total_despesa"].sum()
+    df_unid = filtrar("unidade_orcamentaria")
+    if "unidade_orcamentaria" in df_unid.columns:
+        df_unid = df_unid.groupby("unidade_orcamentaria", as_index=False, observed=True)["total_despesa"].sum()
         df_unid = df_unid.sort_values("total_despesa", ascending=True)
         df_unid["valor_fmt"] = df_unid["total_despesa"].apply(fmt_number)
         df_unid["label"] = df_unid["total_despesa"].apply(fmt_label)
@@ -728,7 +838,7 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
         fig_unid.update_layout(height=300, paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
 
     # ========== Gráfico Função (Barras com scroll) ==========
-    df_func = df_f.groupby("funcao", as_index=False)["total_despesa"].sum()
+    df_func = df_f.groupby("funcao", as_index=False, observed=True)["total_despesa"].sum()
     df_func = df_func.sort_values("total_despesa", ascending=True)
     df_func["valor_fmt"] = df_func["total_despesa"].apply(fmt_number)
     df_func["label"] = df_func["total_despesa"].apply(fmt_label)
@@ -754,7 +864,7 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
     )
 
     # ========== Gráfico Modalidade (Barras com scroll) ==========
-    df_mod = df_f.groupby("modalidade_licitacao", as_index=False)["total_despesa"].sum()
+    df_mod = filtrar("modalidade_licitacao").groupby("modalidade_licitacao", as_index=False, observed=True)["total_despesa"].sum()
     df_mod = df_mod.sort_values("total_despesa", ascending=True)
     df_mod["valor_fmt"] = df_mod["total_despesa"].apply(fmt_number)
     df_mod["label"] = df_mod["total_despesa"].apply(fmt_label)
@@ -780,8 +890,8 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
     )
 
     # ========== Tabela Agregada ==========
-    df_tab = df_f.groupby(
-        ["secretaria_padronizada", "funcao", "subfuncao"], as_index=False
+    df_tab = filtrar("subfuncao").groupby(
+        ["secretaria_padronizada", "funcao", "subfuncao"], as_index=False, observed=True
     )["total_despesa"].sum()
     df_tab = df_tab.sort_values("total_despesa", ascending=False).head(15)
     df_tab = df_tab.rename(columns={"total_despesa": "despesas_pagas"})
@@ -820,36 +930,93 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
         sort_action="native"
     )
 
-    # ========== Tabela Detalhada (Registros Individuais) ==========
-    # Usa a tabela de registros detalhados (não agregados)
-    df_det = df_registros.copy()
-
-    # Aplica os mesmos filtros
-    if anos:
-        df_det = df_det[df_det["ano"].isin(anos)]
-    if secretarias:
-        df_det = df_det[df_det["secretaria"].isin(secretarias)]
-    if funcoes:
-        df_det = df_det[df_det["funcao"].isin(funcoes)]
-    if fontes and "fonte" in df_det.columns:
-        df_det = df_det[df_det["fonte"].isin(fontes)]
-
-    # Colunas para exibição (nomes originais do banco)
-    colunas_exibir = [
-        "data_despesa", "ano", "secretaria", "funcao", "subfuncao",
-        "programa", "elemento_despesa", "despesa_descricao",
-        "favorecido", "modalidade_licitacao", "fonte", "tipo", "valor_despesa"
+    return (
+        kpi_total, kpi_media, kpi_registros,
+        fig_temporal, fig_tipo, fig_sec, fig_unid, fig_func, fig_mod, tabela
+    )
+
+
+@app.callback(
+    [
+        Output("tabela-detalhada", "data"),
+        Output("paginacao-detalhada", "data"),
+        Output("pagina-anterior", "disabled"),
+        Output("pagina-proxima", "disabled"),
+        Output("pagina-info", "children"),
+        Output("total-detalhada", "children"),
+    ],
+    [
+        Input("filtro-ano", "value"),
+        Input("filtro-secretaria", "value"),
+        Input("filtro-funcao", "value"),
+        Input("filtro-fonte", "value"),
+        Input("tabela-detalhada", "sort_by"),
+        Input("tabela-detalhada", "filter_query"),
+        Input("pagina-anterior", "n_clicks"),
+        Input("pagina-proxima", "n_clicks"),
+    ],
+    State("paginacao-detalhada", "data"),
+)
+def update_tabela_detalhada(anos, secretarias, funcoes, fontes, ordem, filter_query, _anterior, _proxima, estado):
+    """Uma página da tabela detalhada, lida do snapshot; filtros e ordenação voltam para a primeira página"""
+    snapshot = dados.snapshot
+    acao = {"pagina-anterior": "anterior", "pagina-proxima": "proxima"}.get(dash.ctx.triggered_id)
+    chave_ordem = tuple((o["column_id"], o["direction"]) for o in ordem or [])
+    selecao = (snapshot.versao, chave_ordem, filter_query or "") + normalizar(anos, secretarias, funcoes, fontes)
+
+    def calcular(pagina):
+        tabela = snapshot.dados["registros"]
+        mascara = snapshot.dados["indices"]["registros"].mascara(
+            {"ano": anos, "secretaria": secretarias, "funcao": funcoes, "fonte": fontes}
+        )
+        selecionadas = posicoes(tabela, mascara, filtrar_tabela(tabela, filter_query), ordem=ordem)
+        return len(selecionadas), recortar(tabela, selecionadas, pagina)
+
+    # O total não depende da página: a primeira página da seleção já o tem
+    total, _ = cache_paginas.obter(selecao + (0,), lambda: calcular(0))
+    paginas = total_paginas(total)
+    estado = navegar(estado, acao, paginas)
+    _, pagina = cache_paginas.obter(selecao + (estado["pagina"],), lambda: calcular(estado["pagina"]))
+
+    info = f"Página {estado['pagina'] + 1} de {paginas}"
+    total_info = [
+        html.Span("Total: ", style={"color": COLORS["text_light"], "fontSize": "12px"}),
+        html.Span(f"{total:,}".replace(",", "."), style={
+            "color": COLORS["primary"],
+            "fontWeight": "700",
+            "fontSize": "14px"
+        }),
+        html.Span(" registros", style={"color": COLORS["text_light"], "fontSize": "12px"})
     ]
+    return (
+        formatar_registros(para_pandas(pagina)), estado,
+        estado["pagina"] == 0, estado["pagina"] + 1 >= paginas, info, total_info,
+    )
+
+
+# Colunas para exibição (nomes originais do banco) e nomes amigáveis
+COLUNAS_DETALHADA = {
+    "data_despesa": "Data",
+    "ano": "Ano",
+    "secretaria": "Secretaria",
+    "funcao": "Função",
+    "subfuncao": "Subfunção",
+    "programa": "Programa",
+    "elemento_despesa": "Elemento",
+    "despesa_descricao": "Descrição",
+    "favorecido": "Favorecido",
+    "modalidade_licitacao": "Modalidade",
+    "fonte": "Fonte",
+    "tipo": "Tipo",
+    "valor_despesa": "Valor Pago"
+}
 
-    # Filtra apenas colunas que existem
-    colunas_existentes = [c for c in colunas_exibir if c in df_det.columns]
 
-    # Prepara os dados
+def formatar_registros(df_det):
+    """Linhas de uma página no formato do DataTable"""
+    # Filtra apenas colunas que existem
+    colunas_existentes = [c for c in COLUNAS_DETALHADA if c in df_det.columns]
     df_detalhado = df_det[colunas_existentes].copy()
-    df_detalhado = df_detalhado.sort_values(
-        ["data_despesa", "valor_despesa"],
-        ascending=[False, False]
-    )
 
     # Formata a data para exibição
     if "data_despesa" in df_detalhado.columns:
@@ -857,100 +1024,74 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
 
     # Mapeia tipo para nome legível
     if "tipo" in df_detalhado.columns:
-        df_detalhado["tipo"] = df_detalhado["tipo"].map({"J": "PJ", "F": "PF"}).fillna(df_detalhado["tipo"])
+        tipo = df_detalhado["tipo"].astype(object)
+        df_detalhado["tipo"] = tipo.map({"J": "PJ", "F": "PF"}).fillna(tipo)
 
-    # Define as colunas da tabela com nomes amigáveis
-    colunas_tabela_detalhada = []
-    mapeamento_nomes = {
-        "data_despesa": "Data",
-        "ano": "Ano",
-        "secretaria": "Secretaria",
-        "funcao": "Função",
-        "subfuncao": "Subfunção",
-        "programa": "Programa",
-        "elemento_despesa": "Elemento",
-        "despesa_descricao": "Descrição",
-        "favorecido": "Favorecido",
-        "modalidade_licitacao": "Modalidade",
-        "fonte": "Fonte",
-        "tipo": "Tipo",
-        "valor_despesa": "Valor Pago"
-    }
+    return df_detalhado.to_dict("records")
 
-    for col in colunas_existentes:
-        col_config = {"name": mapeamento_nomes.get(col, col), "id": col}
+
+def montar_tabela_detalhada():
+    """
+    Tabela dos registros individuais; as linhas vêm do callback, uma página
+    por vez. Ordenação e filtro do cabeçalho valem para todos os registros
+    filtrados, não só para a página (paginacao.py).
+    """
+    colunas_tabela_detalhada = []
+    for col, nome in COLUNAS_DETALHADA.items():
+        col_config = {"name": nome, "id": col}
         if col == "valor_despesa":
             col_config["type"] = "numeric"
             col_config["format"] = {"specifier": ",.2f", "locale": {"symbol": ["R$ ", ""], "group": ".", "decimal": ","}}
         colunas_tabela_detalhada.append(col_config)
 
-    # Contador de registros
-    total_registros_tabela = len(df_detalhado)
-
-    tabela_detalhada = html.Div([
-        # Info do total de registros
-        html.Div([
-            html.Span(f"Total: ", style={"color": COLORS["text_light"], "fontSize": "12px"}),
-            html.Span(f"{total_registros_tabela:,}".replace(",", "."), style={
-                "color": COLORS["primary"],
-                "fontWeight": "700",
-                "fontSize": "14px"
-            }),
-            html.Span(" registros", style={"color": COLORS["text_light"], "fontSize": "12px"})
-        ], style={"marginBottom": "10px"}),
-
-        # Tabela
-        dash_table.DataTable(
-            data=df_detalhado.to_dict("records"),
-            columns=colunas_tabela_detalhada,
-            style_table={"overflowX": "auto", "minWidth": "100%"},
-            style_cell={
-                "textAlign": "left",
-                "padding": "8px 10px",
-                "fontSize": "10px",
-                "backgroundColor": "transparent",
-                "color": COLORS["text"],
-                "border": "none",
-                "borderBottom": f"1px solid {COLORS['border']}",
-                "whiteSpace": "normal",
-                "height": "auto",
-                "minWidth": "70px",
-                "maxWidth": "180px"
-            },
-            style_cell_conditional=[
-                {"if": {"column_id": "secretaria"}, "minWidth": "120px", "maxWidth": "200px"},
-                {"if": {"column_id": "despesa_descricao"}, "minWidth": "120px", "maxWidth": "250px"},
-                {"if": {"column_id": "favorecido"}, "minWidth": "120px", "maxWidth": "200px"},
-                {"if": {"column_id": "data_despesa"}, "minWidth": "80px", "maxWidth": "90px"},
-                {"if": {"column_id": "ano"}, "minWidth": "45px", "maxWidth": "55px"},
-                {"if": {"column_id": "tipo"}, "minWidth": "35px", "maxWidth": "45px"},
-                {"if": {"column_id": "valor_despesa"}, "minWidth": "90px", "maxWidth": "120px", "fontWeight": "600"},
-            ],
-            style_header={
-                "backgroundColor": COLORS["primary"],
-                "color": "white",
-                "fontWeight": "600",
-                "fontSize": "9px",
-                "textTransform": "uppercase",
-                "letterSpacing": "0.5px",
-                "padding": "10px 8px"
-            },
-            style_data_conditional=[
-                {"if": {"row_index": "odd"}, "backgroundColor": "#f8fafc"},
-                {"if": {"column_id": "valor_despesa"}, "color": COLORS["primary"]}
-            ],
-            page_size=5,
-            page_action="native",
-            sort_action="native",
-            sort_mode="multi",
-            filter_action="native",
-            filter_options={"placeholder_text": "Filtrar..."},
-        )
-    ])
-
-    return (
-        kpi_total, kpi_media, kpi_registros,
-        fig_temporal, fig_tipo, fig_sec, fig_unid, fig_func, fig_mod, tabela, tabela_detalhada
+    return dash_table.DataTable(
+        id="tabela-detalhada",
+        data=[],
+        columns=colunas_tabela_detalhada,
+        # Página inteira (TAMANHO_PAGINA linhas) com rolagem; a navegação é pelos botões
+        style_table={"overflowX": "auto", "overflowY": "auto", "maxHeight": "420px", "minWidth": "100%"},
+        style_cell={
+            "textAlign": "left",
+            "padding": "8px 10px",
+            "fontSize": "10px",
+            "backgroundColor": "transparent",
+            "color": COLORS["text"],
+            "border": "none",
+            "borderBottom": f"1px solid {COLORS['border']}",
+            "whiteSpace": "normal",
+            "height": "auto",
+            "minWidth": "70px",
+            "maxWidth": "180px"
+        },
+        style_cell_conditional=[
+            {"if": {"column_id": "secretaria"}, "minWidth": "120px", "maxWidth": "200px"},
+            {"if": {"column_id": "despesa_descricao"}, "minWidth": "120px", "maxWidth": "250px"},
+            {"if": {"column_id": "favorecido"}, "minWidth": "120px", "maxWidth": "200px"},
+            {"if": {"column_id": "data_despesa"}, "minWidth": "80px", "maxWidth": "90px"},
+            {"if": {"column_id": "ano"}, "minWidth": "45px", "maxWidth": "55px"},
+            {"if": {"column_id": "tipo"}, "minWidth": "35px", "maxWidth": "45px"},
+            {"if": {"column_id": "valor_despesa"}, "minWidth": "90px", "maxWidth": "120px", "fontWeight": "600"},
+        ],
+        style_header={
+            "backgroundColor": COLORS["primary"],
+            "color": "white",
+            "fontWeight": "600",
+            "fontSize": "9px",
+            "textTransform": "uppercase",
+            "letterSpacing": "0.5px",
+            "padding": "10px 8px"
+        },
+        style_data_conditional=[
+            {"if": {"row_index": "odd"}, "backgroundColor": "#f8fafc"},
+            {"if": {"column_id": "valor_despesa"}, "color": COLORS["primary"]}
+        ],
+        page_action="none",
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        filter_options={"placeholder_text": "Filtrar..."},
     )
 
 
@@ -960,6 +1101,29 @@ def update_dashboard(anos, secretarias, funcoes, fontes):
 
 server = app.server
 
+
+def aquecer_cache(snapshot):
+    """Após cada recarga: descarta os resultados da versão anterior e calcula a visão inicial"""
+    cache.limpar()
+    cache_paginas.limpar()
+    df = snapshot.dados["rollups"]["mensal"]
+    anos = anos_padrao(df) if not df.empty else []
+    chave = (snapshot.versao,) + normalizar(anos, [], [], [])
+    cache.guardar(chave, calcular_dashboard(snapshot, anos, [], [], []))
+
+
+dados.ao_atualizar = aquecer_cache
+dados.iniciar()
+
+
+@server.route("/pronto")
+def pronto():
+    """Prontidão: 200 com a idade do snapshot quando há dados, 503 antes da primeira carga"""
+    estado = dados.estado()
+    estado["cache"] = cache.estado()
+    return flask.jsonify(estado), 200 if estado["pronto"] else 503
+
+
 # ============================================
 # EXECUTAR
 # ============================================
@@ -0,0 +1,120 @@
+"""
+Snapshot dos dados do dashboard em disco, compartilhado entre workers.
+
+Cada versão é um diretório com um arquivo Arrow IPC por tabela, sem
+compressão, para ser aberto com memory map: todos os workers do gunicorn
+leem as mesmas páginas físicas (cache de páginas do SO) em vez de manter
+cada um a sua cópia. O manifesto aponta a versão atual e é trocado com
+os.replace, então um leitor sempre vê uma versão completa.
+
+Só um worker por vez consulta o BigQuery e grava (flock no arquivo de
+trava); os outros apenas abrem a versão nova. Um worker novo abre a última
+versão gravada sem consultar o BigQuery, e essa versão continua servindo
+se o warehouse estiver fora do ar.
+
+O manifesto guarda também o esquema (tabelas e colunas esperadas pelo
+código que gravou): uma versão gravada com outro esquema não é aberta, e
+sim recriada.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pyarrow as pa
+
+
+MANIFESTO = "manifesto.json"
+TRAVA = "atualizacao.lock"
+
+# Versões antigas mantidas além da atual (workers podem estar lendo a anterior)
+MANTER_ANTERIORES = 1
+
+
+class ArmazemSnapshot:
+    """Versões de snapshot em Arrow IPC, um diretório por versão"""
+
+    def __init__(self, diretorio: str, esquema: str = None):
+        self.diretorio = diretorio
+        # Identifica o formato das tabelas; muda quando o código muda as colunas
+        self.esquema = esquema
+        os.makedirs(diretorio, exist_ok=True)
+
+    def manifesto(self) -> dict:
+        """Versão atual ({versao, criado_em, esquema, tabelas, ...}) ou {} se ainda não há snapshot"""
+        caminho = os.path.join(self.diretorio, MANIFESTO)
+        if not os.path.exists(caminho):
+            return {}
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+
+    @contextmanager
+    def trava(self):
+        """True se este processo obteve a trava de atualização (não bloqueia)"""
+        with open(os.path.join(self.diretorio, TRAVA), "w") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def gravar(self, tabelas: dict, duracao_s: float = 0.0) -> dict:
+        """Grava uma versão nova e a publica no manifesto"""
+        versao = self.manifesto().get("versao", 0) + 1
+        criado_em = datetime.now(timezone.utc)
+        nome_versao = f"v{versao:06d}"
+        destino = os.path.join(self.diretorio, nome_versao)
+        tmp = f"{destino}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        for nome, tabela in tabelas.items():
+            with pa.OSFile(os.path.join(tmp, f"{nome}.arrow"), "wb") as f:
+                with pa.ipc.new_file(f, tabela.schema) as escritor:
+                    escritor.write_table(tabela)
+        os.replace(tmp, destino)
+
+        manifesto = {
+            "versao": versao,
+            "criado_em": criado_em.isoformat(),
+            "duracao_s": round(duracao_s, 2),
+            "diretorio": nome_versao,
+            "esquema": self.esquema,
+            "tabelas": sorted(tabelas),
+        }
+        caminho = os.path.join(self.diretorio, MANIFESTO)
+        with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        os.replace(f"{caminho}.tmp", caminho)
+
+        self._limpar()
+        return manifesto
+
+    def compativel(self, manifesto: dict) -> bool:
+        """A versão foi gravada com o esquema deste código"""
+        return manifesto.get("esquema") == self.esquema
+
+    def abrir(self, manifesto: dict) -> dict:
+        """Tabelas da versão, mapeadas em memória (somente leitura, sem cópia)"""
+        diretorio = os.path.join(self.diretorio, manifesto["diretorio"])
+        tabelas = {}
+        for nome in manifesto["tabelas"]:
+            arquivo = pa.memory_map(os.path.join(diretorio, f"{nome}.arrow"), "r")
+            tabelas[nome] = pa.ipc.open_file(arquivo).read_all()
+        return tabelas
+
+    def _limpar(self):
+        """Remove versões antigas; quem ainda as tem mapeadas continua lendo normalmente"""
+        versoes = sorted(
+            nome for nome in os.listdir(self.diretorio)
+            if nome.startswith("v") and not nome.endswith(".tmp")
+        )
+        for nome in versoes[:-(MANTER_ANTERIORES + 1)]:
+            shutil.rmtree(os.path.join(self.diretorio, nome), ignore_errors=True)
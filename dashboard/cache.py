@@ -0,0 +1,62 @@
+"""
+Cache LRU dos resultados do update_dashboard.
+
+A chave é a versão do snapshot mais a seleção do header normalizada
+(valores sem repetição e em ordem), então a mesma combinação de filtros
+escolhida em outra ordem reaproveita o resultado, e uma recarga dos dados
+invalida tudo sem precisar de expiração. Cada worker tem o seu cache.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def normalizar(*selecoes) -> tuple:
+    """Seleções dos dropdowns (listas ou None) -> tupla de tuplas ordenadas"""
+    return tuple(tuple(sorted(set(valores or []))) for valores in selecoes)
+
+
+class CacheResultados:
+    """LRU com limite de entradas e contagem de acertos/faltas"""
+
+    def __init__(self, maximo: int = 64):
+        self.maximo = maximo
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave, calcular):
+        """Resultado da chave; na falta, calcula (fora da trava) e guarda"""
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return self._entradas[chave]
+            self.faltas += 1
+
+        resultado = calcular()
+        self.guardar(chave, resultado)
+        return resultado
+
+    def guardar(self, chave, resultado):
+        """Guarda sem contar acerto/falta (aquecimento)"""
+        with self._lock:
+            self._entradas[chave] = resultado
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estado(self) -> dict:
+        consultas = self.acertos + self.faltas
+        return {
+            "entradas": len(self._entradas),
+            "maximo": self.maximo,
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "taxa_acerto": round(self.acertos / consultas, 3) if consultas else None,
+        }
@@ -0,0 +1,202 @@
+"""
+Dados do dashboard carregados em segundo plano.
+
+O GerenciadorDados roda os carregadores (consultas ao BigQuery) em paralelo
+numa thread própria, sem bloquear o boot do worker, e repete a carga a cada
+`intervalo_s`. Cada carga completa vira um Snapshot novo, trocado de uma
+vez só: um callback que já pegou o snapshot anterior continua usando-o até
+o fim. Se uma carga falhar, o último snapshot bom é mantido.
+
+Com um ArmazemSnapshot, a carga é compartilhada entre os workers: quem
+obtém a trava consulta o BigQuery e grava a versão em disco, e todos
+(inclusive ele) abrem essa versão com memory map. Os demais só verificam o
+manifesto a cada `verificacao_s`. Uma versão em disco de outro esquema,
+ou que falha ao abrir, conta como vencida e é recriada a partir do BigQuery.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Resultado de uma carga completa; não é alterado depois de publicado"""
+    dados: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    versao: int = 0
+    carregado_em: datetime = None
+    duracao_s: float = 0.0
+
+    @property
+    def pronto(self) -> bool:
+        return self.versao > 0
+
+    def idade_s(self) -> float:
+        if self.carregado_em is None:
+            return None
+        return (datetime.now(timezone.utc) - self.carregado_em).total_seconds()
+
+
+class GerenciadorDados:
+    """Carrega e recarrega periodicamente os dados, publicando snapshots imutáveis"""
+
+    def __init__(self, carregadores: dict, intervalo_s: float = 3600, retentativa_s: float = 30,
+                 armazem=None, montar=None, verificacao_s: float = 30, ao_atualizar=None):
+        # nome -> função sem argumentos que devolve o dado (com armazem, um pa.Table)
+        self.carregadores = dict(carregadores)
+        self.intervalo_s = intervalo_s
+        # Espera após uma falha (nunca maior que o intervalo normal)
+        self.retentativa_s = min(retentativa_s, intervalo_s)
+        # Snapshot em disco compartilhado entre processos (armazem.ArmazemSnapshot)
+        self.armazem = armazem
+        self.verificacao_s = min(verificacao_s, intervalo_s)
+        # Transforma as tabelas carregadas no que os callbacks usam (opcional)
+        self.montar = montar
+        # Chamado com cada snapshot novo, depois da troca (ex.: aquecer caches)
+        self.ao_atualizar = ao_atualizar
+        self._snapshot = Snapshot()
+        self._pronto = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self.ultimo_erro = None
+        self.ultima_tentativa = None
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """Snapshot atual; leia uma vez por callback e use só essa referência"""
+        return self._snapshot
+
+    def _consultar(self) -> dict:
+        with ThreadPoolExecutor(max_workers=len(self.carregadores)) as executor:
+            futuros = {nome: executor.submit(funcao) for nome, funcao in self.carregadores.items()}
+            return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+    def _publicar(self, tabelas: dict, versao: int, carregado_em: datetime, duracao_s: float) -> Snapshot:
+        dados = self.montar(tabelas) if self.montar else tabelas
+        snapshot = Snapshot(
+            dados=MappingProxyType(dados),
+            versao=versao,
+            carregado_em=carregado_em,
+            duracao_s=duracao_s,
+        )
+        # Troca atômica: uma única atribuição de referência
+        self._snapshot = snapshot
+        self._pronto.set()
+        if self.ao_atualizar:
+            # Uma falha aqui não invalida o snapshot já publicado
+            try:
+                self.ao_atualizar(snapshot)
+            except Exception as e:
+                print(f"⚠️ Erro após publicar a versão {snapshot.versao}: {e}")
+        return snapshot
+
+    def _vencido(self, manifesto: dict) -> bool:
+        if not manifesto or not self.armazem.compativel(manifesto):
+            return True
+        criado_em = datetime.fromisoformat(manifesto["criado_em"])
+        return (datetime.now(timezone.utc) - criado_em).total_seconds() >= self.intervalo_s
+
+    def carregar(self) -> Snapshot:
+        """Publica a versão mais recente, consultando o BigQuery se ela estiver vencida"""
+        self.ultima_tentativa = datetime.now(timezone.utc)
+
+        if self.armazem is None:
+            inicio = time.perf_counter()
+            tabelas = self._consultar()
+            snapshot = self._publicar(
+                tabelas, self._snapshot.versao + 1, datetime.now(timezone.utc), time.perf_counter() - inicio
+            )
+            self.ultimo_erro = None
+            return snapshot
+
+        # A versão em disco é publicada antes de qualquer consulta: um worker
+        # novo já sobe com ela e ela continua valendo se o BigQuery falhar
+        manifesto = self.armazem.manifesto()
+        aberto = self._abrir_existente(manifesto)
+        if not aberto or self._vencido(manifesto):
+            with self.armazem.trava() as obtida:
+                # Sem a trava, outro worker está consultando: a versão nova
+                # é aberta na próxima verificação
+                if obtida:
+                    # Outro worker pode ter gravado entre a leitura e a trava
+                    manifesto = self.armazem.manifesto()
+                    if not self._abrir_existente(manifesto) or self._vencido(manifesto):
+                        inicio = time.perf_counter()
+                        tabelas = self._consultar()
+                        manifesto = self.armazem.gravar(tabelas, time.perf_counter() - inicio)
+                    self._abrir(manifesto)
+        self.ultimo_erro = None
+        return self._snapshot
+
+    def _abrir_existente(self, manifesto: dict) -> bool:
+        """
+        Publica a versão em disco, se houver uma do mesmo esquema. False se
+        ela é de outro esquema ou falhou ao abrir (arquivo corrompido,
+        coluna ausente no montar): a versão é tratada como vencida
+        """
+        if not manifesto:
+            return True
+        if not self.armazem.compativel(manifesto):
+            print(f"⚠️ Snapshot versão {manifesto['versao']} gravado com outro esquema; será recriado")
+            return False
+        try:
+            self._abrir(manifesto)
+        except Exception as e:
+            print(f"⚠️ Snapshot versão {manifesto['versao']} não pôde ser aberto ({type(e).__name__}: {e}); será recriado")
+            return False
+        return True
+
+    def _abrir(self, manifesto: dict):
+        """Publica a versão do manifesto, se for diferente da atual"""
+        if manifesto and manifesto["versao"] != self._snapshot.versao:
+            self._publicar(
+                self.armazem.abrir(manifesto), manifesto["versao"],
+                datetime.fromisoformat(manifesto["criado_em"]), manifesto.get("duracao_s", 0.0)
+            )
+
+    def _loop(self):
+        while not self._parar.is_set():
+            espera = self.intervalo_s if self.armazem is None else self.verificacao_s
+            versao = self._snapshot.versao
+            try:
+                snapshot = self.carregar()
+                if snapshot.versao != versao:
+                    print(f"✅ Dados carregados (versão {snapshot.versao}, {snapshot.duracao_s:.1f}s)")
+            except Exception as e:
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+                espera = self.retentativa_s
+                print(f"❌ Erro ao carregar dados (mantendo versão {self._snapshot.versao}): {e}")
+            self._parar.wait(espera)
+
+    def iniciar(self):
+        """Inicia a thread de carga; retorna imediatamente"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="carga-dados", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    def aguardar(self, timeout: float = None) -> bool:
+        """Espera o primeiro snapshot (útil em scripts e benchmarks)"""
+        return self._pronto.wait(timeout)
+
+    def estado(self) -> dict:
+        """Resumo para o endpoint de prontidão"""
+        snapshot = self._snapshot
+        idade = snapshot.idade_s()
+        return {
+            "pronto": snapshot.pronto,
+            "versao": snapshot.versao,
+            "carregado_em": snapshot.carregado_em.isoformat() if snapshot.carregado_em else None,
+            "idade_s": round(idade, 1) if idade is not None else None,
+            "duracao_carga_s": round(snapshot.duracao_s, 2),
+            "intervalo_s": self.intervalo_s,
+            "armazem": self.armazem.diretorio if self.armazem else None,
+            "ultima_tentativa": self.ultima_tentativa.isoformat() if self.ultima_tentativa else None,
+            "ultimo_erro": self.ultimo_erro,
+        }
@@ -0,0 +1,63 @@
+"""
+Índice dos filtros do header (ano, secretaria, função e fonte).
+
+Montado uma vez por snapshot, a partir das tabelas Arrow: para cada
+dimensão, os códigos do dicionário de cada linha e, para cada valor, um
+bitmap empacotado (1 bit por linha) das linhas com esse valor. Uma seleção
+vira OR dos bitmaps dentro da dimensão e AND entre as dimensões, sem
+copiar nem percorrer as colunas de texto a cada interação; a máscara
+final seleciona as linhas do DataFrame ou da tabela Arrow.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class IndiceFiltros:
+    """Bitmaps por valor das dimensões de filtro de uma tabela"""
+
+    def __init__(self, tabela: pa.Table, dimensoes: dict):
+        # dimensoes: nome do filtro -> coluna da tabela (ausentes são ignoradas)
+        self.linhas = tabela.num_rows
+        self.bitmaps = {}
+        for filtro, coluna in dimensoes.items():
+            if coluna in tabela.column_names:
+                self.bitmaps[filtro] = self._bitmaps(tabela[coluna])
+
+    def _bitmaps(self, coluna: pa.ChunkedArray) -> dict:
+        """valor -> bitmap empacotado das linhas com esse valor"""
+        if not pa.types.is_dictionary(coluna.type):
+            coluna = pc.dictionary_encode(coluna)
+        coluna = coluna.combine_chunks() if coluna.num_chunks != 1 else coluna.chunk(0)
+        # Código -1 para nulls: não entram em nenhum bitmap
+        codigos = pc.fill_null(coluna.indices, -1).to_numpy()
+        return {
+            valor: np.packbits(codigos == codigo)
+            for codigo, valor in enumerate(coluna.dictionary.to_pylist())
+        }
+
+    def mascara(self, selecao: dict):
+        """
+        Máscara booleana das linhas que passam na seleção (filtro -> valores
+        escolhidos), ou None se nenhum filtro está ativo (todas as linhas)
+        """
+        resultado = None
+        for filtro, valores in selecao.items():
+            if not valores or filtro not in self.bitmaps:
+                continue
+            bitmaps = self.bitmaps[filtro]
+            dimensao = np.zeros((self.linhas + 7) // 8, dtype=np.uint8)
+            for valor in valores:
+                if valor in bitmaps:
+                    np.bitwise_or(dimensao, bitmaps[valor], out=dimensao)
+            if resultado is None:
+                resultado = dimensao
+            else:
+                np.bitwise_and(resultado, dimensao, out=resultado)
+        if resultado is None:
+            return None
+        return np.unpackbits(resultado, count=self.linhas).view(bool)
+
+    def nbytes(self) -> int:
+        return sum(b.nbytes for bitmaps in self.bitmaps.values() for b in bitmaps.values())
@@ -0,0 +1,138 @@
+"""
+Paginação da tabela detalhada sobre o snapshot em disco.
+
+Os registros são gravados no snapshot já na ordem padrão da tabela
+(data_despesa desc, valor_despesa desc, codigo_interno desc; sem data no
+fim), então uma página é um recorte das posições que passam nos filtros:
+a máscara do índice (indice.py) para os filtros do header e, se houver, o
+filtro e a ordenação do cabeçalho da tabela. Nenhuma página consulta o
+BigQuery, e o total de linhas sai das mesmas posições.
+
+No dashboard, o estado da navegação fica num dcc.Store ({"pagina": n}).
+Mudar os filtros ou a ordenação volta para a primeira página.
+"""
+
+import re
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+TAMANHO_PAGINA = 50
+
+# Ordem padrão, aplicada uma vez na carga (nulls no fim)
+ORDEM = [("data_despesa", "descending"), ("valor_despesa", "descending"), ("codigo_interno", "descending")]
+
+# Cláusulas do filter_query do DataTable: {coluna} operador valor, unidas por &&
+_CLAUSULA = re.compile(
+    r"^\{(?P<coluna>[^}]+)\}\s+(?P<operador>[si]?(?:contains|datestartswith|[<>!]?=|<|>|eq|ne|lt|le|gt|ge))"
+    r"\s+(?P<valor>.+)$"
+)
+_COMPARACOES = {
+    "=": pc.equal, "eq": pc.equal, "!=": pc.not_equal, "ne": pc.not_equal,
+    "<": pc.less, "lt": pc.less, "<=": pc.less_equal, "le": pc.less_equal,
+    ">": pc.greater, "gt": pc.greater, ">=": pc.greater_equal, "ge": pc.greater_equal,
+}
+
+
+def ordenar(tabela: pa.Table) -> pa.Table:
+    """Registros na ordem padrão da tabela"""
+    return tabela.sort_by(ORDEM)
+
+
+def _como_texto(coluna) -> pa.ChunkedArray:
+    if pa.types.is_dictionary(coluna.type):
+        coluna = coluna.cast(coluna.type.value_type)
+    return coluna if pa.types.is_string(coluna.type) else coluna.cast(pa.string())
+
+
+def filtrar_tabela(tabela: pa.Table, filter_query: str):
+    """
+    Máscara booleana do filtro digitado no cabeçalho do DataTable, ou None
+    sem filtro. "contains" não diferencia maiúsculas e datas são
+    comparadas como "AAAA-MM-DD"; colunas numéricas aceitam =, !=, <, <=,
+    > e >=. Cláusulas em colunas desconhecidas ou com valor inválido não
+    selecionam nenhuma linha.
+    """
+    if not filter_query:
+        return None
+    mascara = np.ones(tabela.num_rows, dtype=bool)
+    for clausula in filter_query.split(" && "):
+        partes = _CLAUSULA.match(clausula.strip())
+        if partes is None or partes["coluna"] not in tabela.column_names:
+            return np.zeros(tabela.num_rows, dtype=bool)
+        coluna = tabela[partes["coluna"]]
+        operador = partes["operador"].lstrip("si")
+        valor = partes["valor"].strip().strip("\"'`")
+
+        if operador in ("contains", "datestartswith") or not (
+            pa.types.is_integer(coluna.type) or pa.types.is_floating(coluna.type)
+        ):
+            texto = _como_texto(coluna)
+            if operador == "datestartswith":
+                resultado = pc.starts_with(texto, valor)
+            elif operador == "contains":
+                resultado = pc.match_substring(texto, valor, ignore_case=True)
+            else:
+                resultado = _COMPARACOES[operador](texto, valor)
+        else:
+            try:
+                numero = float(valor.replace(",", "."))
+            except ValueError:
+                return np.zeros(tabela.num_rows, dtype=bool)
+            resultado = _COMPARACOES[operador](coluna, pa.scalar(numero))
+        mascara &= pc.fill_null(resultado, False).to_numpy(zero_copy_only=False)
+    return mascara
+
+
+def posicoes(tabela: pa.Table, *mascaras, ordem=None) -> np.ndarray:
+    """
+    Posições das linhas que passam em todas as máscaras (None = todas), na
+    ordem da tabela ou na do sort_by do DataTable ([{column_id, direction}])
+    """
+    mascaras = [m for m in mascaras if m is not None]
+    if not mascaras:
+        selecionadas = np.arange(tabela.num_rows)
+    else:
+        selecionadas = np.flatnonzero(np.logical_and.reduce(mascaras))
+
+    chaves = [
+        (o["column_id"], "ascending" if o["direction"] == "asc" else "descending")
+        for o in (ordem or []) if o["column_id"] in tabela.column_names
+    ]
+    if chaves and len(selecionadas):
+        colunas = tabela.select([c for c, _ in chaves]).take(selecionadas)
+        # Dicionários não são ordenáveis direto; a ordenação é estável, então
+        # os empates mantêm a ordem padrão
+        colunas = pa.table({
+            nome: _como_texto(colunas[nome]) if pa.types.is_dictionary(colunas[nome].type) else colunas[nome]
+            for nome in colunas.column_names
+        })
+        selecionadas = selecionadas[pc.sort_indices(colunas, sort_keys=chaves).to_numpy()]
+    return selecionadas
+
+
+def total_paginas(total: int, tamanho: int = TAMANHO_PAGINA) -> int:
+    return max(1, -(-total // tamanho))
+
+
+def recortar(tabela: pa.Table, selecionadas: np.ndarray, pagina: int, tamanho: int = TAMANHO_PAGINA) -> pa.Table:
+    """Linhas da página (começando em 0) entre as posições selecionadas"""
+    return tabela.take(selecionadas[pagina * tamanho:(pagina + 1) * tamanho])
+
+
+def estado_inicial() -> dict:
+    return {"pagina": 0}
+
+
+def navegar(estado: dict, acao: str, paginas: int) -> dict:
+    """
+    Estado da página pedida. acao: "anterior" ou "proxima"; qualquer outra
+    (filtros ou ordenação alterados) volta para a primeira página. O
+    resultado fica sempre entre a primeira e a última das `paginas`.
+    """
+    if not estado or acao not in ("anterior", "proxima"):
+        return estado_inicial()
+    pagina = estado["pagina"] + (1 if acao == "proxima" else -1)
+    return {"pagina": min(max(pagina, 0), paginas - 1)}
@@ -0,0 +1,100 @@
+"""
+Modelo em memória do dashboard: só as colunas usadas, em tipos compactos.
+
+As consultas pedem colunas explícitas em vez de SELECT *, e a conversão
+acontece no Arrow antes do pandas:
+- textos (dimensões) viram dicionário Arrow -> pandas Categorical, com um
+  código inteiro por linha em vez de um objeto str;
+- valores monetários viram float64 (float32 perderia os centavos nos totais);
+- anos e contagens viram int32 e o mês vira a chave inteira AAAAMM; o
+  rótulo "AAAA-MM" só é gerado para as poucas linhas de um gráfico.
+
+As tabelas compactadas são o formato do snapshot em disco (armazem.py).
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Dimensões de filtro, presentes em todos os rollups
+DIMENSOES_FILTRO = ["secretaria_padronizada", "funcao", "fonte"]
+
+# Colunas de cada rollup além de ano_exercicio, ano_mes e das dimensões de filtro
+DIMENSOES_ROLLUP = {
+    "mensal": [],
+    "tipo": ["tipo"],
+    "unidade_orcamentaria": ["unidade_orcamentaria"],
+    "modalidade_licitacao": ["modalidade_licitacao"],
+    "subfuncao": ["subfuncao"],
+}
+
+# codigo_interno só desempata a ordem da tabela detalhada (paginacao.py)
+COLUNAS_REGISTROS = [
+    "codigo_interno", "data_despesa", "ano", "secretaria", "funcao", "subfuncao",
+    "programa", "elemento_despesa", "despesa_descricao",
+    "favorecido", "modalidade_licitacao", "fonte", "tipo", "valor_despesa",
+]
+
+# Filtros do header -> coluna em cada conjunto (índices de indice.py)
+FILTROS_ROLLUP = {
+    "ano": "ano_exercicio", "secretaria": "secretaria_padronizada", "funcao": "funcao", "fonte": "fonte",
+}
+FILTROS_REGISTROS = {
+    "ano": "ano", "secretaria": "secretaria", "funcao": "funcao", "fonte": "fonte",
+}
+
+VALORES = ["total_despesa", "valor_despesa"]
+INTEIROS = ["ano_exercicio", "ano", "total_registros"]
+
+
+def colunas_rollup(nome: str) -> list:
+    return ["ano_exercicio", "ano_mes"] + DIMENSOES_FILTRO + DIMENSOES_ROLLUP[nome] + [
+        "total_registros", "total_despesa",
+    ]
+
+
+def consulta(tabela: str, colunas: list) -> str:
+    return f"SELECT {', '.join(colunas)}\nFROM `{tabela}`"
+
+
+def para_float(coluna):
+    """NUMERIC (decimal) ou inteiro -> float64; os marts já vêm tipados"""
+    return coluna.cast(pa.float64(), safe=False)
+
+
+def chave_mes(ano_mes: pa.Array) -> pa.Array:
+    """'AAAA-MM' -> AAAAMM (int32)"""
+    return pc.replace_substring(ano_mes, "-", "").cast(pa.int32())
+
+
+def rotulo_mes(chave: int) -> str:
+    """AAAAMM -> 'AAAA-MM'"""
+    return f"{int(chave) // 100:04d}-{int(chave) % 100:02d}"
+
+
+def compactar(tabela: pa.Table) -> pa.Table:
+    """Tipos compactos por coluna, ainda no Arrow"""
+    for i, nome in enumerate(tabela.column_names):
+        coluna = tabela[nome]
+        if nome in VALORES:
+            coluna = pc.fill_null(para_float(coluna), 0.0)
+        elif nome in INTEIROS:
+            coluna = pc.fill_null(coluna, 0) if nome == "total_registros" else coluna
+            coluna = coluna.cast(pa.int32())
+        elif nome == "ano_mes" and pa.types.is_string(coluna.type):
+            coluna = chave_mes(coluna.combine_chunks())
+        elif pa.types.is_string(coluna.type) or pa.types.is_large_string(coluna.type):
+            coluna = pc.dictionary_encode(coluna.combine_chunks())
+        tabela = tabela.set_column(i, nome, coluna)
+    return tabela
+
+
+def para_pandas(tabela: pa.Table) -> pd.DataFrame:
+    """
+    DataFrame de uma tabela compactada: Categorical nas dimensões, datas como
+    datetime64 e inteiros como Int32 (anulável, sem virar float64 quando há nulls)
+    """
+    return tabela.to_pandas(
+        date_as_object=False, types_mapper={pa.int32(): pd.Int32Dtype()}.get
+    )
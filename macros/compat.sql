@@ -0,0 +1,81 @@
+{#
+  Construções que mudam entre o BigQuery (produção) e o DuckDB (execução
+  local com seeds, profiles/duckdb). Os modelos chamam estas macros em vez
+  da sintaxe de um adapter; o default segue o DuckDB.
+#}
+
+{% macro trunc_mes(coluna) %}
+    {{ return(adapter.dispatch('trunc_mes')(coluna)) }}
+{% endmacro %}
+
+{% macro bigquery__trunc_mes(coluna) -%}
+    date_trunc({{ coluna }}, month)
+{%- endmacro %}
+
+{% macro default__trunc_mes(coluna) -%}
+    cast(date_trunc('month', {{ coluna }}) as date)
+{%- endmacro %}
+
+
+{% macro somar_meses(coluna, meses) %}
+    {{ return(adapter.dispatch('somar_meses')(coluna, meses)) }}
+{% endmacro %}
+
+{% macro bigquery__somar_meses(coluna, meses) -%}
+    date_add({{ coluna }}, interval {{ meses }} month)
+{%- endmacro %}
+
+{% macro default__somar_meses(coluna, meses) -%}
+    cast({{ coluna }} + interval ({{ meses }}) month as date)
+{%- endmacro %}
+
+
+{% macro formatar_ano_mes(coluna) %}
+    {#- Data como texto 'YYYY-MM' -#}
+    {{ return(adapter.dispatch('formatar_ano_mes')(coluna)) }}
+{% endmacro %}
+
+{% macro bigquery__formatar_ano_mes(coluna) -%}
+    format_date('%Y-%m', {{ coluna }})
+{%- endmacro %}
+
+{% macro default__formatar_ano_mes(coluna) -%}
+    strftime({{ coluna }}, '%Y-%m')
+{%- endmacro %}
+
+
+{% macro literal_timestamp(valor) %}
+    {#- Instante (datetime do run_query) como literal SQL com fuso -#}
+    {{ return(adapter.dispatch('literal_timestamp')(valor)) }}
+{% endmacro %}
+
+{% macro bigquery__literal_timestamp(valor) -%}
+    timestamp '{{ valor }}'
+{%- endmacro %}
+
+{% macro default__literal_timestamp(valor) -%}
+    cast('{{ valor }}' as timestamptz)
+{%- endmacro %}
+
+
+{% macro subtrair_horas(expressao, horas) %}
+    {{ return(adapter.dispatch('subtrair_horas')(expressao, horas)) }}
+{% endmacro %}
+
+{% macro bigquery__subtrair_horas(expressao, horas) -%}
+    timestamp_sub({{ expressao }}, interval {{ horas }} hour)
+{%- endmacro %}
+
+{% macro default__subtrair_horas(expressao, horas) -%}
+    ({{ expressao }} - interval ({{ horas }}) hour)
+{%- endmacro %}
+
+
+{% macro origem_despesas_pagas() %}
+    {#- Bruto da ingestão no BigQuery; localmente, o seed de mesmo formato -#}
+    {%- if target.type == 'bigquery' -%}
+        {{ return(source('despesas_queimados', 'raw_despesas_pagas')) }}
+    {%- else -%}
+        {{ return(ref('raw_despesas_pagas')) }}
+    {%- endif -%}
+{% endmacro %}
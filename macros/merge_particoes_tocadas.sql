@@ -0,0 +1,116 @@
+{#
+  MERGE incremental que reescreve só as partições tocadas pelo delta.
+
+  incremental_predicates do dbt são texto fixo da config; o BigQuery só
+  poda partições do destino de um MERGE quando o filtro é constante. Aqui
+  as partições tocadas são consultadas em tempo de execução (a partir da
+  origem do MERGE, que já é só o delta) e entram como literais no ON.
+
+  Ativado por modelo com `podar_particoes_merge=true` (exige partition_by
+  e unique_key). Com `merge_coluna_alterado`, as partições antigas dos ids
+  corrigidos também entram, para a versão antiga não ficar órfã quando a
+  data muda.
+#}
+
+{% macro bigquery__get_merge_sql(target, source, unique_key, dest_columns, incremental_predicates=none) -%}
+    {%- set predicates = [] if incremental_predicates is none else [] + incremental_predicates -%}
+    {%- if config.get('podar_particoes_merge', false) -%}
+        {% do predicates.append(predicado_particoes_tocadas(target, source, unique_key)) %}
+    {%- endif -%}
+    {{ default__get_merge_sql(target, source, unique_key, dest_columns, predicates) }}
+{%- endmacro %}
+
+
+{% macro predicado_particoes_tocadas(target, source, unique_key, alias='DBT_INTERNAL_DEST') %}
+    {%- set partition_by = adapter.parse_partition_by(config.get('partition_by')) -%}
+    {%- if partition_by is none or not unique_key -%}
+        {% do exceptions.raise_compiler_error("podar_particoes_merge exige partition_by e unique_key") %}
+    {%- endif -%}
+    {%- if not execute -%}
+        {{ return('true') }}
+    {%- endif -%}
+
+    {%- set campo = partition_by.field -%}
+    {%- set coluna_alterado = config.get('merge_coluna_alterado') -%}
+
+    {%- set consulta -%}
+        select distinct {{ campo }} as particao from {{ source }} as s
+        {%- if coluna_alterado %}
+        union distinct
+        select distinct t.{{ campo }}
+        from {{ target }} as t
+        where t.{{ unique_key }} in (
+            select {{ unique_key }} from {{ source }} as s where s.{{ coluna_alterado }}
+        )
+        {%- endif %}
+    {%- endset -%}
+
+    {%- if coluna_alterado -%}
+        {#- Evita varrer o destino quando o delta não tem correções -#}
+        {%- set existe_alterado -%}
+            select count(*) from {{ source }} as s where s.{{ coluna_alterado }}
+        {%- endset -%}
+        {%- if run_query(existe_alterado).columns[0].values()[0] == 0 -%}
+            {%- set consulta -%}
+                select distinct {{ campo }} as particao from {{ source }} as s
+            {%- endset -%}
+        {%- endif -%}
+    {%- endif -%}
+
+    {%- set particoes = run_query(consulta).columns[0].values() -%}
+    {%- set literais = [] -%}
+    {%- set tem_nulo = [] -%}
+    {%- for particao in particoes -%}
+        {%- if particao is none -%}
+            {% do tem_nulo.append(true) %}
+        {%- else -%}
+            {% do literais.append(partition_by.data_type ~ " '" ~ particao ~ "'") %}
+        {%- endif -%}
+    {%- endfor -%}
+
+    {%- set condicoes = [] -%}
+    {%- if literais -%}
+        {% do condicoes.append(alias ~ "." ~ campo ~ " in (" ~ literais | join(", ") ~ ")") %}
+    {%- endif -%}
+    {%- if tem_nulo -%}
+        {% do condicoes.append(alias ~ "." ~ campo ~ " is null") %}
+    {%- endif -%}
+
+    {% do log("MERGE em " ~ target ~ ": " ~ particoes | length ~ " partições tocadas", info=true) %}
+    {{ return("(" ~ (condicoes | join(" or ") if condicoes else "false") ~ ")") }}
+{% endmacro %}
+
+
+{% macro ultima_ingestao(relacao, coluna='ingerido_em') %}
+    {#-
+      Maior instante de ingestão já incorporado, como literal (none só fora
+      da execução). Sem nenhum valor (tabela vazia, ou só registros
+      anteriores às colunas de controle, com `coluna` nula) vale o início da
+      execução do dbt: a janela continua limitando o delta, em vez de reler
+      e reanexar o bruto inteiro a cada execução.
+    -#}
+    {%- if not execute -%}
+        {{ return(none) }}
+    {%- endif -%}
+    {%- set valor = run_query("select max(" ~ coluna ~ ") from " ~ relacao).columns[0].values()[0] -%}
+    {%- if valor is none -%}
+        {% do log(relacao ~ ": sem " ~ coluna ~ ", janela contada a partir desta execução", info=true) %}
+        {{ return(literal_timestamp(run_started_at)) }}
+    {%- endif -%}
+    {{ return(literal_timestamp(valor)) }}
+{% endmacro %}
+
+
+{% macro janela_ingestao(ultima, coluna='ingerido_em') %}
+    {#-
+      Filtro do delta de um incremental pela marca d'água `ultima`.
+      ingerido_em não cresce a cada lote: todos os lotes de uma execução da
+      ingestão têm o mesmo valor, e um lote pode ser gravado depois que o
+      dbt já avançou a marca até ele (execução ainda em andamento, ou
+      execuções sobrepostas). Por isso a janela volta
+      `janela_ingestao_horas` antes da marca (com >=), e o modelo precisa
+      tolerar reler linhas: dedup por id ou anti-join por lote_id.
+    -#}
+    {{ coluna }} >= {{ subtrair_horas(ultima, var('janela_ingestao_horas', 24)) }}
+{%- endmacro %}
+
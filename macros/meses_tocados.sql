@@ -0,0 +1,72 @@
+{#
+  Meses de data_despesa que precisam ser recalculados num modelo agregado
+  por mês: os meses das linhas na janela de ingestão de `desde`
+  (janela_ingestao) e, para ids corrigidos, os meses das versões
+  anteriores (guardadas no staging), que perderam a linha quando a data
+  mudou. Devolve uma lista de literais
+  DATE do primeiro dia de cada mês, mais none quando o grupo sem data
+  também foi tocado (linha nova sem data, ou id que tinha ou passou a ter
+  data nula).
+
+  Os meses devolvidos precisam ser apagados do destino antes da inserção
+  (apagar_meses, no pre_hook): insert_overwrite e delete+insert só
+  substituem os meses presentes nas linhas recalculadas, e um mês que
+  ficou vazio por uma correção continuaria com os totais antigos.
+#}
+
+{% macro meses_tocados(origem, historico, desde, coluna='data_despesa') %}
+    {%- if not execute -%}
+        {{ return([]) }}
+    {%- endif -%}
+
+    {%- set delta -%}
+        select codigo_interno, {{ coluna }}, registro_alterado
+        from {{ origem }}
+        {%- if desde is not none %}
+        where {{ janela_ingestao(desde) }}
+        {%- endif %}
+    {%- endset -%}
+
+    {%- set consulta -%}
+        with delta as ({{ delta }})
+        select distinct {{ trunc_mes(coluna) }} as mes
+        from delta
+        union distinct
+        select distinct {{ trunc_mes('h.' ~ coluna) }}
+        from {{ historico }} as h
+        where h.codigo_interno in (select codigo_interno from delta where registro_alterado)
+        order by mes
+    {%- endset -%}
+
+    {%- set meses = [] -%}
+    {%- for mes in run_query(consulta).columns[0].values() -%}
+        {% do meses.append(none if mes is none else "date '" ~ mes ~ "'") %}
+    {%- endfor -%}
+    {% do log(this ~ ": " ~ meses | length ~ " meses a recalcular", info=true) %}
+    {{ return(meses) }}
+{% endmacro %}
+
+
+{% macro filtro_meses(meses, coluna='data_despesa') %}
+    {#- Intervalos fechados no campo de partição, para podar a origem; none é o grupo sem data -#}
+    {%- if not meses -%}
+        false
+    {%- else -%}
+        ({% for mes in meses -%}
+            {%- if mes is none -%}
+            {{ coluna }} is null
+            {%- else -%}
+            ({{ coluna }} >= {{ mes }} and {{ coluna }} < {{ somar_meses(mes, 1) }})
+            {%- endif -%}
+            {%- if not loop.last %} or {% endif %}
+        {%- endfor %})
+    {%- endif -%}
+{% endmacro %}
+
+
+{% macro apagar_meses(meses, coluna='data_despesa') %}
+    {#- pre_hook: apaga do destino os meses que o modelo vai recalcular -#}
+    {%- if meses -%}
+        delete from {{ this }} where {{ filtro_meses(meses, coluna) }}
+    {%- endif -%}
+{% endmacro %}
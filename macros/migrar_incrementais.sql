@@ -0,0 +1,75 @@
+{#
+  Migração dos modelos incrementais cujo formato mudou, para rodar antes
+  do `dbt run` (workflow dbt.yml):
+
+      dbt run-operation migrar_incrementais
+
+  Uma execução incremental parte da tabela existente: lê as colunas de
+  controle (ultima_ingestao, anti-join por lote_id) e grava com o
+  particionamento da config. Uma tabela criada por uma versão anterior do
+  modelo, sem essas colunas ou com outro particionamento (o BigQuery não
+  altera o particionamento de uma tabela existente), quebraria o primeiro
+  `dbt run`.
+
+  Os modelos que declaram `colunas_exigidas` na config têm a tabela
+  conferida; a que não tiver o formato é apagada, e o `dbt run` seguinte
+  a recria do zero, como um --full-refresh. Tabelas já no formato não são
+  tocadas, então a operação pode rodar em toda execução.
+#}
+
+{% macro migrar_incrementais(apagar=true) %}
+    {%- if not execute -%}
+        {{ return([]) }}
+    {%- endif -%}
+
+    {%- set migrados = [] -%}
+    {%- for no in graph.nodes.values() if no.resource_type == 'model' and no.config.get('colunas_exigidas') -%}
+        {%- set relacao = adapter.get_relation(database=no.database, schema=no.schema, identifier=no.alias) -%}
+        {%- if relacao is not none -%}
+            {%- set colunas = adapter.get_columns_in_relation(relacao) | map(attribute='name') | map('lower') | list -%}
+            {%- set faltando = [] -%}
+            {%- for coluna in no.config.colunas_exigidas if coluna | lower not in colunas -%}
+                {% do faltando.append(coluna) %}
+            {%- endfor -%}
+
+            {%- set motivos = [] -%}
+            {%- if faltando -%}
+                {% do motivos.append("sem " ~ faltando | join(", ")) %}
+            {%- endif -%}
+            {%- if not particionamento_compativel(relacao, no.config) -%}
+                {% do motivos.append("particionamento diferente da config") %}
+            {%- endif -%}
+
+            {%- if motivos -%}
+                {% do log(relacao ~ ": " ~ motivos | join("; ") ~ (" -> apagada, o dbt run recria" if apagar else ""), info=true) %}
+                {%- if apagar -%}
+                    {% do adapter.drop_relation(relacao) %}
+                    {#- run-operation não confirma a transação sozinho (DuckDB; no BigQuery é no-op) -#}
+                    {% do adapter.commit() %}
+                {%- endif -%}
+                {% do migrados.append(no.name) %}
+            {%- endif -%}
+        {%- endif -%}
+    {%- endfor -%}
+
+    {%- if not migrados -%}
+        {% do log("Modelos incrementais já no formato atual", info=true) %}
+    {%- endif -%}
+    {{ return(migrados) }}
+{% endmacro %}
+
+
+{% macro particionamento_compativel(relacao, config) %}
+    {{ return(adapter.dispatch('particionamento_compativel')(relacao, config)) }}
+{% endmacro %}
+
+{% macro bigquery__particionamento_compativel(relacao, config) %}
+    {#- Mesma verificação do --full-refresh do dbt-bigquery antes de recriar a tabela -#}
+    {%- set particao = adapter.parse_partition_by(config.get('partition_by')) -%}
+    {{ return(adapter.is_replaceable(relacao, particao, config.get('cluster_by'))) }}
+{% endmacro %}
+
+{% macro default__particionamento_compativel(relacao, config) %}
+    {#- O DuckDB (execução local) ignora partition_by e cluster_by -#}
+    {{ return(true) }}
+{% endmacro %}
@@ -0,0 +1,23 @@
+{#
+  Rollup mensal de gastos_por_secretaria para os gráficos do dashboard.
+
+  Cada rollup guarda uma linha por mês e combinação das dimensões de
+  filtro do dashboard (ano, secretaria, função e fonte), mais as
+  dimensões do próprio gráfico. O tamanho depende da cardinalidade dessas
+  dimensões, não do número de pagamentos.
+#}
+
+{% macro rollup_mensal(dimensoes=[]) %}
+{%- set chaves = ['secretaria_padronizada', 'funcao', 'fonte'] + dimensoes %}
+select
+    ano_exercicio,
+    {{ formatar_ano_mes('data_despesa') }} as ano_mes,
+    {%- for chave in chaves %}
+    {{ chave }},
+    {%- endfor %}
+    sum(total_registros) as total_registros,
+    sum(total_despesa) as total_despesa,
+    sum(valor_liquido) as valor_liquido
+from {{ ref('mart_queimados__gastos_por_secretaria') }}
+group by ano_exercicio, ano_mes{% for chave in chaves %}, {{ chave }}{% endfor %}
+{% endmacro %}
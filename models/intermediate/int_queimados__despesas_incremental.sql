@@ -1,24 +1,34 @@
-{{
-  config(
+{{ config(
     materialized='incremental',
+    incremental_strategy='merge' if target.type == 'bigquery' else 'delete+insert',
     unique_key='codigo_interno',
     schema='intermediate_queimados',
     alias='despesas_pagas_incremental',
     on_schema_change='sync_all_columns',
+    partition_by={"field": "data_despesa", "data_type": "date"},
+    cluster_by=["orgao", "exercicio"],
+    podar_particoes_merge=true,
+    merge_coluna_alterado='registro_alterado',
+    colunas_exigidas=['ingerido_em', 'registro_alterado', 'lote_id']
+) }}
 
-    partition_by={
-      "field": "data_despesa",
-      "data_type": "date"
-    },
+{#- Só o que foi ingerido na janela da última execução (ver
+    janela_ingestao); o MERGE reescreve apenas as partições de data_despesa
+    tocadas por esse delta. Reler um lote já incorporado não muda nada: a
+    versão mais recente de cada id está sempre dentro da janela.
+    A tabela anterior, sem as colunas de controle e sem partição por
+    data_despesa, é apagada antes do dbt run (macros/migrar_incrementais.sql)
+    e recriada do zero. -#}
+{%- set ultima = ultima_ingestao(this) if is_incremental() else none %}
 
-    cluster_by=["orgao", "exercicio"]
-  )
-}}
-
-select *
-from {{ ref('stg_queimados__despesas_pagas') }}
+select * from {{ ref('stg_queimados__despesas_pagas') }}
 where codigo_interno is not null
-
-{% if is_incremental() %}
-  and codigo_interno not in (select codigo_interno from {{ this }})
+{% if ultima is not none %}
+  and {{ janela_ingestao(ultima) }}
 {% endif %}
+-- Um id pode ter mais de uma versão no delta: fica a mais recente (lote_id
+-- desempata versões da mesma execução, para o resultado ser determinístico)
+qualify row_number() over (
+    partition by codigo_interno
+    order by ingerido_em desc, lote_id desc
+) = 1
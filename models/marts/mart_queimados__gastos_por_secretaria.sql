@@ -1,11 +1,39 @@
 {{
   config(
-    materialized = "table",
+    materialized = "incremental",
+    incremental_strategy = "insert_overwrite" if target.type == "bigquery" else "delete+insert",
+    unique_key = none if target.type == "bigquery" else "data_despesa",
     schema = "marts_queimados",
-    alias = "gastos_por_secretaria"
+    alias = "gastos_por_secretaria",
+    on_schema_change = "sync_all_columns",
+    partition_by = {"field": "data_despesa", "data_type": "date", "granularity": "month"},
+    cluster_by = ["secretaria_padronizada", "funcao", "fonte"],
+    colunas_exigidas = ["ultima_ingestao"],
+    pre_hook = "{% if is_incremental() %}{{ apagar_meses(meses_tocados(
+        ref('int_queimados__despesas_incremental'),
+        ref('stg_queimados__despesas_pagas'),
+        ultima_ingestao(this, 'ultima_ingestao')
+    )) }}{% endif %}"
   )
 }}
 
+-- depends_on: {{ ref('stg_queimados__despesas_pagas') }}
+
+-- Em execuções incrementais, só os meses tocados por linhas novas ou
+-- corrigidas (inclusive os meses antigos dos ids corrigidos e o grupo sem
+-- data_despesa) são recalculados. O pre_hook apaga esses meses antes: um
+-- mês que ficou vazio não aparece nas linhas recalculadas, e nem o
+-- insert_overwrite nem o delete+insert (DuckDB, local) o substituiriam.
+-- A tabela anterior, sem partição mensal e sem ultima_ingestao, é apagada
+-- antes do dbt run (macros/migrar_incrementais.sql) e recriada do zero.
+{%- if is_incremental() %}
+  {%- set meses = meses_tocados(
+        ref('int_queimados__despesas_incremental'),
+        ref('stg_queimados__despesas_pagas'),
+        ultima_ingestao(this, 'ultima_ingestao')
+  ) %}
+{%- endif %}
+
 with base as (
     select
         -- Dimensões para filtros no Looker
@@ -42,9 +70,14 @@ with base as (
         valor_despesa_total,
         valor_estornado,
         valor_retido,
-        estorno_do_pagamento
+        estorno_do_pagamento,
+
+        ingerido_em
 
     from {{ ref('int_queimados__despesas_incremental') }}
+    {% if is_incremental() %}
+    where {{ filtro_meses(meses) }}
+    {% endif %}
 )
 
 select
@@ -86,7 +119,10 @@ select
     sum(estorno_do_pagamento) as total_estorno_pagamento,
 
     -- Valor líquido (despesa - estornos)
-    sum(valor_despesa) - coalesce(sum(valor_estornado), 0) - coalesce(sum(estorno_do_pagamento), 0) as valor_liquido
+    sum(valor_despesa) - coalesce(sum(valor_estornado), 0) - coalesce(sum(estorno_do_pagamento), 0) as valor_liquido,
+
+    -- Marca d'água da próxima execução incremental
+    max(ingerido_em) as ultima_ingestao
 
 from base
 group by
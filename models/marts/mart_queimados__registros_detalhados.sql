@@ -2,12 +2,17 @@
   config(
     materialized = "table",
     schema = "marts_queimados",
-    alias = "registros_detalhados"
+    alias = "registros_detalhados",
+    partition_by = {"field": "data_despesa", "data_type": "date", "granularity": "month"},
+    cluster_by = ["secretaria", "funcao"]
   )
 }}
 
 -- Registros individuais de despesas pagas (não agregados)
 -- Para visualização granular no dashboard
+-- Sem order by: a ordem de leitura não é garantida. O dashboard ordena pela
+-- chave (data_despesa, valor_despesa, codigo_interno) ao gravar o snapshot,
+-- ver dashboard/paginacao.py
 
 select
     -- Identificador único
@@ -57,4 +62,3 @@ select
 
 from {{ ref('int_queimados__despesas_incremental') }}
 where valor_despesa is not null
-order by data_despesa desc, valor_despesa desc
@@ -0,0 +1,11 @@
+{{
+  config(
+    materialized = "table",
+    schema = "marts_queimados",
+    alias = "rollup_mensal",
+    cluster_by = ["secretaria_padronizada", "funcao", "fonte"]
+  )
+}}
+
+-- Base: KPIs, evolução mensal e gráficos por secretaria e função
+{{ rollup_mensal() }}
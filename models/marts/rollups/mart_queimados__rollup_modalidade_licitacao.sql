@@ -0,0 +1,11 @@
+{{
+  config(
+    materialized = "table",
+    schema = "marts_queimados",
+    alias = "rollup_modalidade_licitacao",
+    cluster_by = ["secretaria_padronizada", "funcao", "fonte"]
+  )
+}}
+
+-- Gráfico por modalidade de licitação
+{{ rollup_mensal(['modalidade_licitacao']) }}
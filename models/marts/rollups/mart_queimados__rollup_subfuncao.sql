@@ -0,0 +1,11 @@
+{{
+  config(
+    materialized = "table",
+    schema = "marts_queimados",
+    alias = "rollup_subfuncao",
+    cluster_by = ["secretaria_padronizada", "funcao", "fonte"]
+  )
+}}
+
+-- Tabela por secretaria, função e subfunção
+{{ rollup_mensal(['subfuncao']) }}
@@ -0,0 +1,11 @@
+{{
+  config(
+    materialized = "table",
+    schema = "marts_queimados",
+    alias = "rollup_tipo",
+    cluster_by = ["secretaria_padronizada", "funcao", "fonte"]
+  )
+}}
+
+-- Gráfico por tipo de credor
+{{ rollup_mensal(['tipo']) }}
@@ -0,0 +1,11 @@
+{{
+  config(
+    materialized = "table",
+    schema = "marts_queimados",
+    alias = "rollup_unidade_orcamentaria",
+    cluster_by = ["secretaria_padronizada", "funcao", "fonte"]
+  )
+}}
+
+-- Gráfico por unidade orçamentária
+{{ rollup_mensal(['unidade_orcamentaria']) }}
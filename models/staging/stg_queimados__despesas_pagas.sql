@@ -1,12 +1,27 @@
 {{ config(
     schema = "staging_queimados",
     alias  = "despesas_pagas",
-    materialized = "table"
+    materialized = "incremental",
+    incremental_strategy = "merge" if target.type == "bigquery" else "append",
+    on_schema_change = "sync_all_columns",
+    partition_by = {"field": "ingerido_em", "data_type": "timestamp", "granularity": "day"},
+    colunas_exigidas = ["ingerido_em", "lote_id"]
 ) }}
 
+-- Incremental só por inserção, sem unique_key: cada execução converte apenas
+-- os lotes do bruto que ainda não estão aqui, procurados numa janela antes
+-- da maior ingerido_em já tratada (ver janela_ingestao). O anti-join por
+-- lote_id impede que um lote relido na janela seja inserido de novo.
+-- Versões de um mesmo id (correções da API) ficam todas aqui, uma por lote;
+-- a mais recente é escolhida em int_queimados__despesas_incremental.
+-- Uma tabela anterior sem as colunas de controle ou com outro
+-- particionamento é apagada antes do dbt run (macros/migrar_incrementais.sql)
+-- e recriada do zero.
+{%- set ultima = ultima_ingestao(this) if is_incremental() else none %}
+
 select
     -- Identificadores
-    cast(codigo_interno as int64) as codigo_interno,
+    codigo_interno,
     EMP_PROCESSO_COMPLETO as emp_processo_completo,
     cast(empenho as string) as empenho,
     cast(OP as string) as op,
@@ -44,22 +59,37 @@ select
     cast(Tipo as string) as tipo,
     cast(descricao_despesa as string) as descricao_despesa,
 
-    -- Valores monetários (converte string para numeric, tratando vírgula como decimal)
-    safe_cast(replace(replace(valor_despesa, '.', ''), ',', '.') as numeric) as valor_despesa,
-    safe_cast(replace(replace(valor_despesa_total, '.', ''), ',', '.') as numeric) as valor_despesa_total,
-    safe_cast(replace(replace(Valor_Estornado, '.', ''), ',', '.') as numeric) as valor_estornado,
-    safe_cast(replace(replace(RETIDO, '.', ''), ',', '.') as numeric) as valor_retido,
-    safe_cast(replace(replace(Estorno_do_Pagamento, '.', ''), ',', '.') as numeric) as estorno_do_pagamento,
+    -- Valores monetários (já chegam como NUMERIC, convertidos na ingestão)
+    valor_despesa,
+    valor_despesa_total,
+    Valor_Estornado as valor_estornado,
+    RETIDO as valor_retido,
+    Estorno_do_Pagamento as estorno_do_pagamento,
 
-    -- Datas (converte string 'YYYY-MM-DD HH:MM:SS.S' para DATE)
-    safe.parse_date('%Y-%m-%d', substr(cast(data_despesa as string), 1, 10)) as data_despesa,
-    safe.parse_date('%Y-%m-%d', substr(cast(data_liquidacao as string), 1, 10)) as data_liquidacao,
+    -- Datas (já chegam como DATE, convertidas na ingestão)
+    data_despesa,
+    data_liquidacao,
 
     -- Exercício fiscal
-    cast(exercicio as int64) as exercicio,
-    cast(ano_api as int64) as ano_api,
+    exercicio,
+    ano_api,
 
     -- URL do documento
-    URL as url
+    URL as url,
+
+    -- Controle da ingestão
+    registro_alterado,
+    ingerido_em,
+    lote_id
 
-from {{ source('despesas_queimados', 'raw_despesas_pagas') }}
+from {{ origem_despesas_pagas() }}
+where true
+{% if ultima is not none %}
+  and {{ janela_ingestao(ultima) }}
+  and lote_id not in (
+      select distinct lote_id
+      from {{ this }}
+      where {{ janela_ingestao(ultima) }}
+        and lote_id is not null
+  )
+{% endif %}
@@ -0,0 +1,229 @@
+"""
+Perfil de custo/desempenho dos modelos dbt e trava de regressão.
+
+Lê target/run_results.json de um `dbt run`, extrai por modelo o tempo de
+execução e a resposta do adapter (bytes processados/cobrados, slot ms,
+linhas afetadas), acrescenta a execução ao histórico (JSONL, um registro
+por modelo por execução) e compara com a mediana das últimas execuções
+do mesmo modelo. Se bytes processados ou tempo passarem da tolerância, o
+script termina com erro para falhar o pipeline.
+
+Não acessa o BigQuery: funciona offline sobre qualquer run_results.json,
+por exemplo os de benchmarks/fixtures/dbt:
+
+    python scripts/dbt_perfil.py --run-results benchmarks/fixtures/dbt/run_results_base.json \\
+        --historico /tmp/historico.jsonl
+    python scripts/dbt_perfil.py --run-results benchmarks/fixtures/dbt/run_results_regressao.json \\
+        --historico /tmp/historico.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from dataclasses import asdict, dataclass
+
+
+RUN_RESULTS = "target/run_results.json"
+
+# Histórico preservado via cache no CI, como o estado da ingestão
+HISTORICO = os.getenv("DBT_PERFIL_HISTORICO", ".dbt_perfil/historico.jsonl")
+
+# Quantas execuções anteriores bem-sucedidas formam a referência (mediana)
+JANELA = int(os.getenv("DBT_PERFIL_JANELA", "7"))
+
+# Aumento relativo tolerado sobre a referência (0.5 = +50%)
+TOLERANCIA_BYTES = float(os.getenv("DBT_PERFIL_TOLERANCIA_BYTES", "0.5"))
+TOLERANCIA_TEMPO = float(os.getenv("DBT_PERFIL_TOLERANCIA_TEMPO", "1.0"))
+
+# Abaixo destes valores a variação é ruído e não conta como regressão
+MINIMO_BYTES = int(os.getenv("DBT_PERFIL_MINIMO_BYTES", str(100 * 1024**2)))
+MINIMO_SEGUNDOS = float(os.getenv("DBT_PERFIL_MINIMO_SEGUNDOS", "10"))
+
+
+@dataclass
+class PerfilModelo:
+    modelo: str
+    status: str
+    executado_em: str
+    invocacao: str
+    tempo_s: float
+    bytes_processados: int = None
+    bytes_cobrados: int = None
+    slot_ms: int = None
+    linhas: int = None
+
+
+@dataclass
+class Regressao:
+    modelo: str
+    metrica: str
+    atual: float
+    referencia: float
+
+    @property
+    def aumento(self) -> float:
+        return self.atual / self.referencia - 1 if self.referencia else float("inf")
+
+
+def _inteiro(valor):
+    return None if valor is None else int(valor)
+
+
+def ler_run_results(caminho: str) -> list:
+    """Um PerfilModelo por modelo executado (testes e seeds ficam de fora)"""
+    with open(caminho, encoding="utf-8") as f:
+        dados = json.load(f)
+
+    metadata = dados.get("metadata", {})
+    executado_em = metadata.get("generated_at")
+    invocacao = metadata.get("invocation_id")
+
+    perfis = []
+    for resultado in dados.get("results", []):
+        unique_id = resultado.get("unique_id", "")
+        if not unique_id.startswith("model."):
+            continue
+        resposta = resultado.get("adapter_response") or {}
+        perfis.append(PerfilModelo(
+            modelo=unique_id.split(".")[-1],
+            status=resultado.get("status"),
+            executado_em=executado_em,
+            invocacao=invocacao,
+            tempo_s=float(resultado.get("execution_time") or 0.0),
+            bytes_processados=_inteiro(resposta.get("bytes_processed")),
+            bytes_cobrados=_inteiro(resposta.get("bytes_billed")),
+            slot_ms=_inteiro(resposta.get("slot_ms")),
+            linhas=_inteiro(resposta.get("rows_affected")),
+        ))
+    return perfis
+
+
+def ler_historico(caminho: str) -> list:
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding="utf-8") as f:
+        return [PerfilModelo(**json.loads(linha)) for linha in f if linha.strip()]
+
+
+def gravar_historico(caminho: str, perfis: list):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "a", encoding="utf-8") as f:
+        for perfil in perfis:
+            f.write(json.dumps(asdict(perfil), ensure_ascii=False) + "\n")
+
+
+def referencia(historico: list, modelo: str, metrica: str, janela: int = JANELA):
+    """Mediana da métrica nas últimas `janela` execuções bem-sucedidas do modelo"""
+    valores = [
+        getattr(p, metrica) for p in historico
+        if p.modelo == modelo and p.status == "success" and getattr(p, metrica) is not None
+    ][-janela:]
+    return statistics.median(valores) if valores else None
+
+
+def verificar(perfis: list, historico: list, janela: int = JANELA,
+              tolerancia_bytes: float = TOLERANCIA_BYTES, tolerancia_tempo: float = TOLERANCIA_TEMPO,
+              minimo_bytes: int = MINIMO_BYTES, minimo_segundos: float = MINIMO_SEGUNDOS) -> list:
+    """Regressões da execução atual em relação ao histórico"""
+    limites = [
+        ("bytes_processados", tolerancia_bytes, minimo_bytes),
+        ("tempo_s", tolerancia_tempo, minimo_segundos),
+    ]
+    regressoes = []
+    for perfil in perfis:
+        if perfil.status != "success":
+            continue
+        for metrica, tolerancia, minimo in limites:
+            atual = getattr(perfil, metrica)
+            base = referencia(historico, perfil.modelo, metrica, janela)
+            if atual is None or base is None or atual < minimo:
+                continue
+            if atual > base * (1 + tolerancia):
+                regressoes.append(Regressao(perfil.modelo, metrica, atual, base))
+    return regressoes
+
+
+def _bytes(valor) -> str:
+    if valor is None:
+        return "-"
+    if valor < 1024:
+        return f"{valor} B"
+    for unidade in ("KB", "MB", "GB"):
+        valor /= 1024
+        if valor < 1024:
+            return f"{valor:.1f} {unidade}"
+    valor /= 1024
+    return f"{valor:.2f} TB"
+
+
+def imprimir_perfis(perfis: list, historico: list, janela: int = JANELA):
+    print(f"\n📊 Perfil dos modelos ({len(perfis)}):")
+    print(f"   {'modelo':<45} {'status':<8} {'tempo':>8} {'bytes':>10} {'ref. bytes':>10} {'slot ms':>10} {'linhas':>10}")
+    for p in sorted(perfis, key=lambda p: p.bytes_processados or 0, reverse=True):
+        base = referencia(historico, p.modelo, "bytes_processados", janela)
+        print(
+            f"   {p.modelo:<45} {p.status:<8} {p.tempo_s:>7.1f}s {_bytes(p.bytes_processados):>10} "
+            f"{_bytes(base):>10} {p.slot_ms if p.slot_ms is not None else '-':>10} "
+            f"{p.linhas if p.linhas is not None else '-':>10}"
+        )
+    total = sum(p.bytes_processados or 0 for p in perfis)
+    print(f"   Total processado: {_bytes(total)}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de custo dos modelos dbt e trava de regressão")
+    parser.add_argument("--run-results", default=RUN_RESULTS, help="run_results.json do dbt run")
+    parser.add_argument("--historico", default=HISTORICO, help="Histórico JSONL por modelo")
+    parser.add_argument("--janela", type=int, default=JANELA, help="Execuções anteriores na referência")
+    parser.add_argument("--tolerancia-bytes", type=float, default=TOLERANCIA_BYTES,
+                        help="Aumento relativo tolerado em bytes processados (0.5 = +50%%)")
+    parser.add_argument("--tolerancia-tempo", type=float, default=TOLERANCIA_TEMPO,
+                        help="Aumento relativo tolerado no tempo de execução")
+    parser.add_argument("--minimo-bytes", type=int, default=MINIMO_BYTES,
+                        help="Bytes abaixo dos quais não há regressão")
+    parser.add_argument("--minimo-segundos", type=float, default=MINIMO_SEGUNDOS,
+                        help="Tempo abaixo do qual não há regressão")
+    parser.add_argument("--sem-gravar", action="store_true", help="Só compara, sem gravar no histórico")
+    parser.add_argument("--apenas-registrar", action="store_true",
+                        help="Grava no histórico sem falhar em regressões")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    perfis = ler_run_results(args.run_results)
+    historico = ler_historico(args.historico)
+    imprimir_perfis(perfis, historico, args.janela)
+
+    regressoes = verificar(
+        perfis, historico, args.janela, args.tolerancia_bytes, args.tolerancia_tempo,
+        args.minimo_bytes, args.minimo_segundos
+    )
+
+    if not args.sem_gravar:
+        # A execução entra no histórico mesmo com regressão: se a mudança for
+        # intencional, a referência (mediana) se ajusta nas próximas execuções
+        gravar_historico(args.historico, perfis)
+        print(f"💾 Histórico atualizado: {args.historico}")
+
+    if not regressoes:
+        print("✅ Nenhuma regressão de custo ou tempo")
+        return
+
+    print(f"\n❌ {len(regressoes)} regressão(ões):")
+    for r in regressoes:
+        if r.metrica == "bytes_processados":
+            atual, base = _bytes(r.atual), _bytes(r.referencia)
+        else:
+            atual, base = f"{r.atual:.1f}s", f"{r.referencia:.1f}s"
+        print(f"   {r.modelo}: {r.metrica} {atual} vs referência {base} (+{r.aumento:.0%})")
+
+    if not args.apenas_registrar:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
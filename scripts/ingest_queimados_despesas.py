@@ -1,19 +1,54 @@
 import os
 import json
-import requests
-import pandas as pd
+import argparse
+from dataclasses import asdict
+from datetime import datetime, timezone
+
 from google.cloud import bigquery
 from google.oauth2 import service_account
 
+from ingestao.agendador import Limitador, executar_fontes
+from ingestao.cache_respostas import CacheRespostas
+from ingestao.calendario import planejar_anos
+from ingestao.checkpoint import Checkpoint
+from ingestao.fontes import FONTES, PROJECT_ID, selecionar
+from ingestao.indice_ids import IndiceIds
+from ingestao.metricas import Metricas, imprimir_resumo
+from ingestao.pipeline import download_years, process_years, sync_id_index
+from ingestao.sinks import BigQuerySink, ParquetLakeSink, upload_lake
+
+
+# Número de requisições simultâneas à API, somando todas as fontes
+MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "3"))
+
+# Requisições simultâneas e intervalo mínimo (s) entre requisições ao mesmo host
+MAX_POR_HOST = int(os.getenv("INGEST_MAX_POR_HOST", "3"))
+INTERVALO_HOST = float(os.getenv("INGEST_INTERVALO_HOST", "0"))
+
+# Registros por lote: cada lote é deduplicado e carregado antes do próximo ser lido
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50000"))
+
+# Estado local entre execuções (índice de ids etc.), preservado via cache no CI
+STATE_DIR = os.getenv("INGEST_STATE_DIR", ".ingest_state")
+
+# Destino dos lotes: BigQuery ou lake Parquet local (offline)
+SINKS = ("bigquery", "parquet")
+SINK = os.getenv("INGEST_SINK", "bigquery")
+LAKE_DIR = os.getenv("INGEST_LAKE_DIR", "lake")
 
-URL = "https://transparencia.queimados.rj.gov.br/sincronia/apidados.rule"
+# append: dedup local + WRITE_APPEND | merge: staging + MERGE no BigQuery
+LOAD_MODES = ("append", "merge")
+LOAD_MODE = os.getenv("INGEST_LOAD_MODE", "append")
 
-PROJECT_ID = "monitorpublico"
-DATASET = "despesas_queimados"
-TABLE = "raw_despesas_pagas"
+# Validade das tabelas de staging do modo merge, caso o delete não aconteça
+STAGING_TTL_HORAS = 6
 
-# Anos de 2024 em diante
-YEARS = [2024,2025, 2026]
+# Sobrescrevem, para todas as fontes, o ano inicial e a cadência dos anos frios
+ANO_INICIAL = os.getenv("INGEST_ANO_INICIAL")
+INTERVALO_FRIO_DIAS = os.getenv("INGEST_INTERVALO_FRIO_DIAS")
+
+# Relatório JSON da execução (tempos por fase, volume, RSS); vazio = não grava
+RELATORIO = os.getenv("INGEST_RELATORIO", "")
 
 
 def load_credentials():
@@ -41,121 +76,286 @@ def load_credentials():
     )
 
 
-def fetch_from_api(ano: int) -> pd.DataFrame:
-    """Busca dados da API usando GET com parâmetros"""
-    params = {
-        "sys": "LAI",
-        "api": "despesas_pagas",
-        "ano": ano
-    }
-
-    print(f"📡 Consultando API para ano {ano}...")
-
-    response = requests.get(URL, params=params)
-    response.raise_for_status()
-
-    raw = response.text
-    json_data = json.loads(raw)
-
-    # Extrai os dados do JSON
-    if isinstance(json_data, dict):
-        if "dados" in json_data:
-            dados = json_data["dados"]
-        else:
-            dados = json_data
-    else:
-        dados = json_data
-
-    if not dados:
-        print(f"⚠️ Nenhum dado retornado para {ano}")
-        return pd.DataFrame()
+def bigquery_client():
+    credentials = load_credentials()
 
-    df = pd.DataFrame(dados)
-    df["ano_api"] = ano
-    print(f"✓ {len(df)} registros encontrados para {ano}")
-    return df
+    return bigquery.Client(
+        credentials=credentials,
+        project=PROJECT_ID
+    )
 
 
-def get_existing_ids(client, id_column: str = "codigo_interno"):
-    """Busca IDs já existentes no BigQuery para evitar duplicatas"""
-    query = f"""
-        SELECT DISTINCT CAST({id_column} AS STRING) AS {id_column}
-        FROM `{PROJECT_ID}.{DATASET}.{TABLE}`
+def create_sink(fonte, args, client=None):
+    """
+    Monta o sink escolhido para a fonte e o índice de ids que o acompanha.
+    Retorna (sink, indice); indice é None quando o sink deduplica sozinho.
     """
+    if args.sink == "parquet":
+        # Offline: deduplica só contra o que já foi gravado no próprio lake
+        indice = IndiceIds(os.path.join(STATE_DIR, "indice_ids_lake", fonte.nome))
+        if args.rebuild_index:
+            indice.limpar()
+        sink = ParquetLakeSink(os.path.join(args.lake_dir, fonte.nome),
+                               coluna_data=fonte.coluna_data)
+        return sink, indice
+
+    sink = BigQuerySink(
+        client or bigquery_client(), fonte.tabela, fonte.schema_raw,
+        modo=args.load_mode, id_column=fonte.id_column,
+        staging_ttl_horas=STAGING_TTL_HORAS
+    )
 
-    try:
-        df = client.query(query).to_dataframe()
-        return set(df[id_column])
-    except Exception as e:
-        print(f"⚠️ Tabela não existe ou erro ao consultar: {e}")
-        return set()
+    # Índice local de ids para evitar duplicatas (sincronizado por watermark).
+    # No modo merge a deduplicação é feita pelo BigQuery.
+    if sink.deduplica:
+        return sink, None
+
+    indice = IndiceIds(os.path.join(STATE_DIR, "indice_ids", fonte.nome))
+    if args.rebuild_index:
+        indice.limpar()
+    return sink, indice
+
+
+def ingest_source(fonte, args, cache, limitador, client=None, ingerido_em=None,
+                  metricas=None, checkpoint=None):
+    """Ingestão completa de uma fonte; retorna os totais para o relatório"""
+    metricas = metricas or Metricas()
+    plano = planejar_anos(
+        args.ano_inicial or fonte.ano_inicial,
+        lambda ano: cache.verificado_em(fonte.nome, ano),
+        intervalo_frio_dias=args.intervalo_frio_dias or fonte.intervalo_frio_dias,
+        incluir_frios=args.incluir_frios,
+        anos=args.anos,
+    )
+    print(
+        f"📅 [{fonte.nome}] Anos quentes: {plano.quentes} | frios a verificar: {plano.frios} "
+        f"| frios adiados: {plano.adiados}"
+    )
 
+    downloads, inalterados = download_years(
+        fonte, plano.buscar, cache, max_workers=args.workers,
+        force=args.force, limitador=limitador, metricas=metricas,
+        checkpoint=checkpoint
+    )
 
-def load_to_bq(client, df):
-    """Carrega DataFrame no BigQuery"""
-    table_ref = f"{PROJECT_ID}.{DATASET}.{TABLE}"
+    detalhes = {
+        "anos_alterados": sorted(d.ano for d in downloads),
+        "anos_inalterados": sorted(inalterados),
+        "anos_adiados": plano.adiados,
+        "encontrados": 0,
+        "inseridos": 0,
+        "alterados": 0,
+        # Anos retomados de uma execução interrompida -> lotes que já estavam carregados
+        "retomados": {},
+    }
 
-    # Converte todas as colunas para string para evitar conflitos de tipo
-    df = df.astype(str)
+    # Só toca no destino (e no BigQuery) se algum ano mudou
+    if not downloads:
+        return detalhes
 
-    # Substitui 'nan' por None para campos vazios
-    df = df.replace('nan', None)
-    df = df.replace('None', None)
+    try:
+        sink, indice = create_sink(fonte, args, client)
+    except Exception:
+        for download in downloads:
+            download.arquivo.close()
+        raise
+
+    if indice is not None and isinstance(sink, BigQuerySink):
+        with metricas.fase("sync", fonte.nome):
+            sync_id_index(sink.client, fonte, indice, [d.ano for d in downloads])
+    if indice is not None:
+        existentes = sum(len(indice.ids(d.ano)) for d in downloads)
+        print(f"📊 [{fonte.nome}] {existentes} registros já existentes no destino")
 
-    job_config = bigquery.LoadJobConfig(
-        write_disposition="WRITE_APPEND",
-        autodetect=True
+    try:
+        for resultado in process_years(
+            fonte, sink, downloads, indice, cache,
+            max_workers=args.workers, batch_size=args.batch_size,
+            ingerido_em=ingerido_em, metricas=metricas, checkpoint=checkpoint
+        ):
+            if resultado.retomado:
+                detalhes["retomados"][resultado.ano] = resultado.lotes_pulados
+            detalhes["encontrados"] += resultado.encontrados
+            detalhes["inseridos"] += resultado.inseridos
+            detalhes["alterados"] += resultado.alterados
+    finally:
+        sink.fechar()
+        if indice is not None:
+            indice.salvar()
+        for download in downloads:
+            download.arquivo.close()
+
+    return detalhes
+
+
+def print_report(resultados):
+    print("\n📋 Resultado por fonte:")
+    for nome in sorted(resultados):
+        r = resultados[nome]
+        if not r.sucesso:
+            print(f"   ❌ {nome}: {r.erro} ({r.duracao_s:.1f}s)")
+            continue
+        d = r.detalhes
+        print(
+            f"   ✅ {nome}: {d['inseridos']} inseridos, {d['alterados']} alterados, "
+            f"anos sem alteração {d['anos_inalterados']} ({r.duracao_s:.1f}s)"
+        )
+        if d["anos_adiados"]:
+            print(f"      ❄️ anos frios não consultados nesta execução: {d['anos_adiados']}")
+        for ano, lotes in sorted(d["retomados"].items()):
+            print(f"      ♻️ {ano}: retomado sem novo download, {lotes} lotes já carregados pulados")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão de dados LAI (multi-fonte)")
+    parser.add_argument(
+        "--fontes", nargs="+", choices=sorted(FONTES), default=None,
+        help="Fontes a ingerir (padrão: todas)"
+    )
+    parser.add_argument(
+        "--anos", type=int, nargs="+", default=None,
+        help="Busca exatamente estes anos, quentes ou frios (padrão: política quente/frio)"
+    )
+    parser.add_argument(
+        "--incluir-frios", action="store_true",
+        help="Reconsulta agora todos os anos frios, sem esperar a cadência"
+    )
+    parser.add_argument(
+        "--ano-inicial", type=int, default=ANO_INICIAL,
+        help="Primeiro ano para todas as fontes (padrão: o da fonte, env INGEST_ANO_INICIAL)"
+    )
+    parser.add_argument(
+        "--intervalo-frio-dias", type=int, default=INTERVALO_FRIO_DIAS,
+        help=(
+            "Dias entre reconsultas dos anos frios "
+            "(padrão: o da fonte, env INGEST_INTERVALO_FRIO_DIAS)"
+        )
+    )
+    parser.add_argument(
+        "--workers", type=int, default=MAX_WORKERS,
+        help=(
+            "Requisições simultâneas à API, somando todas as fontes "
+            f"(padrão: {MAX_WORKERS}, env INGEST_MAX_WORKERS)"
+        )
+    )
+    parser.add_argument(
+        "--por-host", type=int, default=MAX_POR_HOST,
+        help=f"Requisições simultâneas ao mesmo host (padrão: {MAX_POR_HOST}, env INGEST_MAX_POR_HOST)"
+    )
+    parser.add_argument(
+        "--intervalo-host", type=float, default=INTERVALO_HOST,
+        help=(
+            "Intervalo mínimo em segundos entre requisições ao mesmo host "
+            f"(padrão: {INTERVALO_HOST}, env INGEST_INTERVALO_HOST)"
+        )
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE,
+        help=f"Registros por lote lido/carregado (padrão: {BATCH_SIZE}, env INGEST_BATCH_SIZE)"
+    )
+    parser.add_argument(
+        "--rebuild-index", action="store_true",
+        help="Descarta o índice local de ids e reconstrói a partir do BigQuery"
+    )
+    parser.add_argument(
+        "--load-mode", choices=LOAD_MODES, default=LOAD_MODE,
+        help=(
+            "append: deduplica localmente pelo índice de ids e faz WRITE_APPEND; "
+            "merge: staging + MERGE no BigQuery, sem baixar ids "
+            f"(padrão: {LOAD_MODE}, env INGEST_LOAD_MODE)"
+        )
+    )
+    parser.add_argument(
+        "--sink", choices=SINKS, default=SINK,
+        help=f"Destino dos lotes (padrão: {SINK}, env INGEST_SINK)"
+    )
+    parser.add_argument(
+        "--lake-dir", default=LAKE_DIR,
+        help=f"Diretório do lake Parquet local, uma subpasta por fonte (padrão: {LAKE_DIR}, env INGEST_LAKE_DIR)"
+    )
+    parser.add_argument(
+        "--upload-lake", action="store_true",
+        help="Envia ao BigQuery as partições pendentes do lake (um job por partição) e sai"
     )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Ignora o cache de respostas e os checkpoints e reprocessa todos os anos"
+    )
+    parser.add_argument(
+        "--relatorio", default=RELATORIO,
+        help="Grava o relatório JSON da execução neste caminho (env INGEST_RELATORIO)"
+    )
+    return parser.parse_args(argv)
 
-    job = client.load_table_from_dataframe(df, table_ref, job_config=job_config)
-    job.result()
-    print(f"✅ Dados carregados na tabela {table_ref}")
 
+def main(argv=None):
+    args = parse_args(argv)
+    fontes = selecionar(args.fontes)
 
-def main():
-    print("🚀 Iniciando ingestão de despesas pagas...")
-    print(f"📅 Anos: {YEARS}")
+    if args.upload_lake:
+        client = bigquery_client()
+        total = 0
+        for fonte in fontes:
+            raiz = os.path.join(args.lake_dir, fonte.nome)
+            print(f"☁️ Enviando lake {raiz} para {fonte.tabela}...")
+            total += upload_lake(client, raiz, fonte.tabela, fonte.schema_raw)
+        print(f"\n✅ Upload concluído! {total} registros enviados.")
+        return
 
-    credentials = load_credentials()
+    print("🚀 Iniciando ingestão...")
+    print(
+        f"🗂️ Fontes: {[f.nome for f in fontes]} ({args.workers} requisições em paralelo, "
+        f"{args.por_host} por host, destino: {args.sink}/{args.load_mode})"
+    )
 
-    client = bigquery.Client(
-        credentials=credentials,
-        project=PROJECT_ID
+    cache = CacheRespostas(os.path.join(STATE_DIR, "cache_respostas.json"))
+    limitador = Limitador(
+        max_global=args.workers, max_por_host=args.por_host,
+        intervalo_por_host=args.intervalo_host
+    )
+    ingerido_em = datetime.now(timezone.utc)
+    metricas = Metricas()
+    checkpoint = Checkpoint(os.path.join(STATE_DIR, "checkpoints"))
+
+    # Um único cliente do BigQuery compartilhado entre as fontes
+    client = bigquery_client() if args.sink == "bigquery" else None
+
+    resultados = executar_fontes(
+        fontes,
+        lambda fonte: ingest_source(
+            fonte, args, cache, limitador, client, ingerido_em, metricas, checkpoint
+        ),
+        max_fontes=args.workers,
     )
 
-    # Busca IDs existentes para evitar duplicatas
-    existing_ids = get_existing_ids(client)
-    print(f"📊 {len(existing_ids)} registros já existentes no BigQuery")
+    print(f"\n💾 Cache de respostas: {cache.hits} hits, {cache.misses} misses")
+    print_report(resultados)
 
-    dfs = []
+    extras = {
+        "sink": args.sink,
+        "modo_carga": args.load_mode,
+        "cache": {"hits": cache.hits, "misses": cache.misses},
+        "resultados": {nome: asdict(r) for nome, r in resultados.items()},
+    }
+    if args.relatorio:
+        relatorio = metricas.salvar(args.relatorio, **extras)
+        print(f"📝 Relatório gravado em {args.relatorio}")
+    else:
+        relatorio = metricas.relatorio(**extras)
+    imprimir_resumo(relatorio)
 
-    for year in YEARS:
-        df = fetch_from_api(year)
+    total_inseridos = sum(r.detalhes.get("inseridos", 0) for r in resultados.values())
+    total_alterados = sum(r.detalhes.get("alterados", 0) for r in resultados.values())
+    falhas = sorted(nome for nome, r in resultados.items() if not r.sucesso)
 
-        if df.empty:
-            continue
+    if falhas:
+        raise SystemExit(f"\n❌ {len(falhas)} fonte(s) falharam: {falhas}")
 
-        # Verifica se tem coluna de ID para deduplicação
-        if "codigo_interno" in df.columns:
-            df["codigo_interno"] = df["codigo_interno"].astype(str)
-            df_new = df[~df["codigo_interno"].isin(existing_ids)]
-            print(f"  → {len(df_new)} novos registros para {year}")
-            if not df_new.empty:
-                dfs.append(df_new)
-        else:
-            # Se não tem ID, adiciona todos
-            dfs.append(df)
-
-    if not dfs:
-        print("✔ Nenhum novo registro encontrado")
+    if total_inseridos == 0 and total_alterados == 0:
+        print("✔ Nenhum registro novo ou alterado encontrado")
         return
 
-    final_df = pd.concat(dfs, ignore_index=True)
-    print(f"\n📦 Total de novos registros: {len(final_df)}")
-
-    load_to_bq(client, final_df)
-
-    print(f"\n✅ Ingestão concluída! {len(final_df)} registros inseridos.")
+    print(f"\n✅ Ingestão concluída! {total_inseridos} registros inseridos, {total_alterados} alterados.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,3 @@
+"""
+Módulos de apoio à ingestão de dados do Monitor Público.
+"""
@@ -0,0 +1,94 @@
+"""
+Agendador da ingestão multi-fonte.
+
+Executa as fontes em paralelo com um limite global de requisições
+simultâneas e, por host, um limite de conexões e um intervalo mínimo
+entre requisições. A falha de uma fonte é registrada no resultado dela e
+não interrompe as demais.
+"""
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+class Limitador:
+    """Limite global de concorrência + limite e ritmo por host"""
+
+    def __init__(self, max_global: int = 4, max_por_host: int = 2,
+                 intervalo_por_host: float = 0.0):
+        self._global = threading.BoundedSemaphore(max_global)
+        self.max_por_host = max_por_host
+        self.intervalo_por_host = intervalo_por_host
+        self._hosts = {}
+        self._ultimo_inicio = {}
+        self._lock = threading.Lock()
+
+    def _semaforo(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.max_por_host)
+            return self._hosts[host]
+
+    def _aguardar_vez(self, host: str):
+        """Espaça o início das requisições ao mesmo host"""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                proximo = self._ultimo_inicio.get(host, 0.0) + self.intervalo_por_host
+                if agora >= proximo:
+                    self._ultimo_inicio[host] = agora
+                    return
+                espera = proximo - agora
+            time.sleep(espera)
+
+    @contextmanager
+    def requisicao(self, host: str):
+        """Reserva uma vaga global e uma do host durante a requisição"""
+        semaforo_host = self._semaforo(host)
+        with self._global, semaforo_host:
+            self._aguardar_vez(host)
+            yield
+
+
+@dataclass
+class ResultadoFonte:
+    fonte: str
+    sucesso: bool = True
+    erro: str = None
+    duracao_s: float = 0.0
+    detalhes: dict = field(default_factory=dict)
+
+
+def executar_fontes(fontes, executar, max_fontes: int = 4):
+    """
+    Roda `executar(fonte)` para cada fonte em paralelo (até max_fontes ao
+    mesmo tempo). O retorno de `executar` (dict) vira ResultadoFonte.detalhes.
+    Exceções são capturadas por fonte. Retorna {nome: ResultadoFonte}.
+    """
+    resultados = {}
+    if not fontes:
+        return resultados
+
+    def _rodar(fonte):
+        inicio = time.monotonic()
+        try:
+            detalhes = executar(fonte) or {}
+            return ResultadoFonte(fonte.nome, detalhes=detalhes,
+                                  duracao_s=time.monotonic() - inicio)
+        except Exception as e:
+            print(f"❌ Fonte {fonte.nome} falhou: {e}")
+            traceback.print_exc()
+            return ResultadoFonte(fonte.nome, sucesso=False, erro=f"{type(e).__name__}: {e}",
+                                  duracao_s=time.monotonic() - inicio)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_fontes, len(fontes)))) as executor:
+        futures = [executor.submit(_rodar, fonte) for fonte in fontes]
+        for future in as_completed(futures):
+            resultado = future.result()
+            resultados[resultado.fonte] = resultado
+
+    return resultados
@@ -0,0 +1,89 @@
+"""
+Cache de respostas da API por (api, ano).
+
+Guarda ETag / Last-Modified quando o servidor envia e, sempre, o hash
+SHA-256 do conteúdo. Anos sem alteração são descartados antes do parse e
+de qualquer trabalho no BigQuery.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+
+class CacheRespostas:
+    """Metadados da última resposta processada com sucesso para cada (api, ano)"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._entradas = {}
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                self._entradas = json.load(f)
+
+    @staticmethod
+    def _chave(api: str, ano: int) -> str:
+        return f"{api}:{ano}"
+
+    def obter(self, api: str, ano: int) -> dict:
+        with self._lock:
+            return dict(self._entradas.get(self._chave(api, ano), {}))
+
+    def cabecalhos_condicionais(self, api: str, ano: int) -> dict:
+        """If-None-Match / If-Modified-Since a partir da última resposta"""
+        entrada = self.obter(api, ano)
+        cabecalhos = {}
+        if entrada.get("etag"):
+            cabecalhos["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            cabecalhos["If-Modified-Since"] = entrada["last_modified"]
+        return cabecalhos
+
+    def conteudo_igual(self, api: str, ano: int, sha256: str) -> bool:
+        return self.obter(api, ano).get("sha256") == sha256
+
+    def registrar_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def registrar_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def atualizar(self, api: str, ano: int, sha256: str, etag: str = None,
+                  last_modified: str = None):
+        """Registra a resposta processada e grava o cache de forma atômica"""
+        agora = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._entradas[self._chave(api, ano)] = {
+                "sha256": sha256,
+                "etag": etag,
+                "last_modified": last_modified,
+                "atualizado_em": agora,
+                "verificado_em": agora,
+            }
+            self._gravar()
+
+    def marcar_verificado(self, api: str, ano: int):
+        """Registra que o ano foi consultado (mesmo sem alteração)"""
+        with self._lock:
+            entrada = self._entradas.setdefault(self._chave(api, ano), {})
+            entrada["verificado_em"] = datetime.now(timezone.utc).isoformat()
+            self._gravar()
+
+    def verificado_em(self, api: str, ano: int):
+        """Última consulta ao ano (datetime UTC) ou None se nunca consultado"""
+        valor = self.obter(api, ano).get("verificado_em")
+        return datetime.fromisoformat(valor) if valor else None
+
+    def _gravar(self):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        tmp = f"{self.caminho}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entradas, f, indent=2)
+        os.replace(tmp, self.caminho)
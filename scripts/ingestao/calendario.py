@@ -0,0 +1,67 @@
+"""
+Política de anos a buscar em cada execução.
+
+O conjunto de anos vem da data atual e do ano inicial da fonte, não de
+uma lista fixa. O exercício corrente e o anterior (que ainda recebe
+pagamentos de restos a pagar) são "quentes" e buscados todo dia. Os
+exercícios encerrados são "frios": só são reconsultados quando a última
+verificação passou de `intervalo_frio_dias`, ou sob demanda. Assim o job
+diário cresce com a janela ativa, não com o histórico inteiro.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+
+# Quantos exercícios, contando o corrente, são sempre buscados
+ANOS_QUENTES = 2
+
+
+@dataclass
+class PlanoAnos:
+    quentes: list = field(default_factory=list)
+    # Frios com verificação vencida (ou pedidos sob demanda)
+    frios: list = field(default_factory=list)
+    # Frios verificados há pouco tempo: ficam para outra execução
+    adiados: list = field(default_factory=list)
+
+    @property
+    def buscar(self) -> list:
+        return sorted(self.quentes + self.frios)
+
+
+def anos_ativos(ano_inicial: int, hoje=None) -> list:
+    """Todos os exercícios de ano_inicial até o corrente"""
+    hoje = hoje or datetime.now(timezone.utc)
+    return list(range(ano_inicial, hoje.year + 1))
+
+
+def planejar_anos(ano_inicial: int, verificado_em, hoje=None,
+                  intervalo_frio_dias: int = 30, incluir_frios: bool = False,
+                  anos=None) -> PlanoAnos:
+    """
+    Separa os anos em quentes, frios a verificar e frios adiados.
+
+    verificado_em(ano) devolve o datetime UTC da última consulta do ano (ou
+    None). `anos` força uma lista explícita (tudo é buscado); incluir_frios
+    busca todos os frios independentemente da última verificação.
+    """
+    hoje = hoje or datetime.now(timezone.utc)
+    plano = PlanoAnos()
+
+    candidatos = sorted(set(anos)) if anos else anos_ativos(ano_inicial, hoje)
+    primeiro_quente = hoje.year - ANOS_QUENTES + 1
+
+    for ano in candidatos:
+        if ano >= primeiro_quente:
+            plano.quentes.append(ano)
+            continue
+
+        ultima = verificado_em(ano)
+        vencido = ultima is None or hoje - ultima >= timedelta(days=intervalo_frio_dias)
+        if anos or incluir_frios or vencido:
+            plano.frios.append(ano)
+        else:
+            plano.adiados.append(ano)
+
+    return plano
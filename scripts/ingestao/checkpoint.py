@@ -0,0 +1,101 @@
+"""
+Checkpoints da ingestão por (fonte, ano).
+
+Cada ano em andamento tem um JSON com o estado (baixado, carregando,
+lido) e quantos lotes já foram carregados, ao lado do payload bruto
+baixado. Se a execução falhar, a próxima reaproveita o payload sem
+repetir o download e retoma a partir do primeiro lote não carregado.
+Quando o ano termina, o checkpoint e o payload são removidos.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+
+class Checkpoint:
+    """Estado de execução de cada (fonte, ano), um arquivo JSON por ano"""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, fonte: str, ano: int) -> str:
+        return os.path.join(self.diretorio, fonte, f"{ano}.json")
+
+    def caminho_payload(self, fonte: str, ano: int) -> str:
+        """Onde o payload bruto do ano fica guardado até o ano terminar"""
+        return os.path.join(self.diretorio, fonte, f"{ano}.payload")
+
+    def obter(self, fonte: str, ano: int) -> dict:
+        caminho = self._caminho(fonte, ano)
+        with self._lock:
+            if not os.path.exists(caminho):
+                return {}
+            with open(caminho, encoding="utf-8") as f:
+                return json.load(f)
+
+    def pendente(self, fonte: str, ano: int) -> dict:
+        """Estado de um ano interrompido cujo payload ainda está em disco"""
+        estado = self.obter(fonte, ano)
+        if estado and os.path.exists(self.caminho_payload(fonte, ano)):
+            return estado
+        return {}
+
+    def _gravar(self, fonte: str, ano: int, **campos) -> dict:
+        caminho = self._caminho(fonte, ano)
+        with self._lock:
+            estado = {}
+            if os.path.exists(caminho):
+                with open(caminho, encoding="utf-8") as f:
+                    estado = json.load(f)
+            estado.update(campos)
+            estado["atualizado_em"] = datetime.now(timezone.utc).isoformat()
+
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            tmp = f"{caminho}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(estado, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, caminho)
+        return estado
+
+    def registrar_download(self, fonte: str, ano: int, sha256: str, etag: str = None,
+                           last_modified: str = None):
+        """Payload completo em disco: nenhum lote carregado ainda"""
+        self.descartar(fonte, ano, manter_payload=True)
+        self._gravar(
+            fonte, ano, estado="baixado", sha256=sha256, etag=etag,
+            last_modified=last_modified, lotes_carregados=0
+        )
+
+    def iniciar_carga(self, fonte: str, ano: int, ingerido_em: str, batch_size: int):
+        """
+        Fixa os parâmetros que precisam se repetir numa retomada (o
+        ingerido_em da execução original compõe o lote_id)
+        """
+        self._gravar(fonte, ano, estado="carregando", ingerido_em=ingerido_em,
+                     batch_size=batch_size)
+
+    def registrar_lote(self, fonte: str, ano: int, numero: int):
+        """Lote `numero` (base 0) gravado no destino"""
+        self._gravar(fonte, ano, lotes_carregados=numero + 1)
+
+    def registrar_leitura(self, fonte: str, ano: int, total_lotes: int):
+        """Payload lido até o fim: todos os lotes já passaram pelo parse"""
+        self._gravar(fonte, ano, estado="lido", total_lotes=total_lotes)
+
+    def descartar(self, fonte: str, ano: int, manter_payload: bool = False):
+        """Remove o checkpoint (e o payload) do ano"""
+        caminhos = [self._caminho(fonte, ano)]
+        if not manter_payload:
+            caminhos.append(self.caminho_payload(fonte, ano))
+        with self._lock:
+            for caminho in caminhos:
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+    def concluir(self, fonte: str, ano: int):
+        """Ano carregado por completo: checkpoint e payload não são mais necessários"""
+        self.descartar(fonte, ano)
@@ -0,0 +1,85 @@
+"""
+Cliente HTTP compartilhado da ingestão.
+
+Uma única Session com pool de conexões (keep-alive), timeout em toda
+requisição e retentativas com backoff exponencial + jitter para erros 5xx
+e quedas de conexão.
+"""
+
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# (conexão, leitura) em segundos
+TIMEOUT = (10, 300)
+
+MAX_TENTATIVAS = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# Erros de rede que valem nova tentativa (reset, timeout, corpo truncado,
+# gzip cortado no meio)
+ERROS_TRANSITORIOS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+)
+
+
+def criar_sessao(pool_size: int = 4) -> requests.Session:
+    """Cria uma Session com pool dimensionado para o número de workers"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def calcular_espera(tentativa: int, base: float = BACKOFF_BASE, maximo: float = BACKOFF_MAX) -> float:
+    """Backoff exponencial com "full jitter": uniforme em [0, base * 2^tentativa]"""
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+
+def get_com_retentativa(
+    session: requests.Session,
+    url: str,
+    params: dict = None,
+    timeout=TIMEOUT,
+    tentativas: int = MAX_TENTATIVAS,
+    ler=None,
+    **kwargs,
+):
+    """
+    GET com timeout e retentativa em 5xx / falhas de conexão.
+
+    Com `ler`, devolve ler(response) e o corpo é consumido dentro da mesma
+    tentativa: com stream=True, uma queda no meio do corpo repete a
+    requisição inteira (ler precisa recomeçar do zero a cada chamada).
+    Sem `ler`, devolve a Response.
+    """
+    for tentativa in range(tentativas):
+        ultima = tentativa == tentativas - 1
+        try:
+            response = session.get(url, params=params, timeout=timeout, **kwargs)
+            if response.status_code >= 500 and not ultima:
+                response.close()
+                espera = calcular_espera(tentativa)
+                print(f"  ↻ HTTP {response.status_code}, nova tentativa em {espera:.1f}s")
+                time.sleep(espera)
+                continue
+
+            response.raise_for_status()
+            if ler is None:
+                return response
+            with response:
+                return ler(response)
+        except ERROS_TRANSITORIOS as e:
+            if ultima:
+                raise
+            espera = calcular_espera(tentativa)
+            print(f"  ↻ Falha de conexão ({type(e).__name__}), nova tentativa em {espera:.1f}s")
+            time.sleep(espera)
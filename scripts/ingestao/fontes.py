@@ -0,0 +1,89 @@
+"""
+Registro declarativo das fontes de dados da ingestão.
+
+Cada Fonte descreve um endpoint por ano (URL + parâmetros), a coluna de
+id usada na deduplicação, a tabela de destino, o schema do payload e o
+primeiro ano publicado.
+Novos datasets LAI ou novos municípios entram aqui, sem mexer no
+pipeline.
+"""
+
+import os
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from ingestao.schemas import COLUNAS_CONTROLE, DESPESAS_PAGAS
+
+
+PROJECT_ID = "monitorpublico"
+
+
+@dataclass(frozen=True)
+class Fonte:
+    # Identificador único (chave de cache, índice de ids, relatório)
+    nome: str
+    url: str
+    # Parâmetros fixos da requisição; o ano vai em `param_ano`
+    params: dict
+    id_column: str
+    # Tabela de destino no BigQuery (projeto.dataset.tabela)
+    tabela: str
+    # Schema do payload (ver ingestao/schemas.py)
+    schema: list
+    # Primeiro exercício publicado; os demais vêm da data atual (ingestao/calendario.py)
+    ano_inicial: int
+    param_ano: str = "ano"
+    # Chave do array de registros no JSON de resposta
+    chave_dados: str = "dados"
+    # Coluna de data usada para particionar o lake por mês
+    coluna_data: str = None
+    # Dias entre reconsultas dos exercícios encerrados ("frios")
+    intervalo_frio_dias: int = 30
+    descricao: str = field(default="", compare=False)
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).netloc
+
+    @property
+    def schema_raw(self) -> list:
+        """Schema gravado no destino: payload + colunas de controle"""
+        return self.schema + COLUNAS_CONTROLE
+
+    def params_ano(self, ano: int) -> dict:
+        return {**self.params, self.param_ano: ano}
+
+
+FONTES = {
+    fonte.nome: fonte
+    for fonte in [
+        Fonte(
+            nome="queimados_despesas_pagas",
+            descricao="Despesas pagas - Prefeitura de Queimados/RJ",
+            url=os.getenv(
+                "QUEIMADOS_API_URL",
+                "https://transparencia.queimados.rj.gov.br/sincronia/apidados.rule"
+            ),
+            params={"sys": "LAI", "api": "despesas_pagas"},
+            id_column="codigo_interno",
+            tabela=f"{PROJECT_ID}.despesas_queimados.raw_despesas_pagas",
+            schema=DESPESAS_PAGAS,
+            # Anos de 2024 em diante
+            ano_inicial=2024,
+            coluna_data="data_despesa",
+        ),
+    ]
+}
+
+
+def selecionar(nomes=None):
+    """Fontes pelo nome (todas se `nomes` vazio); erro para nome desconhecido"""
+    if not nomes:
+        return list(FONTES.values())
+
+    desconhecidas = [nome for nome in nomes if nome not in FONTES]
+    if desconhecidas:
+        raise ValueError(
+            f"Fontes desconhecidas: {desconhecidas}. Disponíveis: {sorted(FONTES)}"
+        )
+    return [FONTES[nome] for nome in nomes]
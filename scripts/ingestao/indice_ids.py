@@ -0,0 +1,185 @@
+"""
+Índice local de deduplicação por ano_api.
+
+Para cada ano guarda um array int64 ordenado com os codigo_interno já
+carregados e, em paralelo, o hash de conteúdo da última versão de cada um
+(arquivos .npy). O maior id é usado como watermark: a sincronização com o
+BigQuery traz apenas os ids acima do watermark de cada ano, em vez de um
+SELECT DISTINCT sobre a tabela inteira a cada execução.
+
+Hash 0 significa "desconhecido" (registros carregados antes do hash de
+conteúdo existir): o primeiro hash visto é adotado sem marcar alteração.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+
+HASH_DESCONHECIDO = 0
+
+
+class IndiceIds:
+    """Mapa ordenado id -> hash de conteúdo por ano, persistido em disco"""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._ids = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, prefixo: str, ano: int) -> str:
+        return os.path.join(self.diretorio, f"{prefixo}_{ano}.npy")
+
+    def _carregar(self, ano: int):
+        if ano in self._ids:
+            return
+        caminho_ids = self._caminho("ids", ano)
+        caminho_hashes = self._caminho("hashes", ano)
+        if os.path.exists(caminho_ids):
+            ids = np.load(caminho_ids)
+            if os.path.exists(caminho_hashes):
+                hashes = np.load(caminho_hashes)
+            else:
+                hashes = np.full(len(ids), HASH_DESCONHECIDO, dtype=np.int64)
+        else:
+            ids = np.empty(0, dtype=np.int64)
+            hashes = np.empty(0, dtype=np.int64)
+        self._ids[ano] = ids
+        self._hashes[ano] = hashes
+
+    def ids(self, ano: int) -> np.ndarray:
+        """Array ordenado de ids do ano (carregado do disco na primeira vez)"""
+        with self._lock:
+            self._carregar(ano)
+            return self._ids[ano]
+
+    def watermark(self, ano: int) -> int:
+        """Maior id conhecido do ano (-1 se o índice está vazio)"""
+        ids = self.ids(ano)
+        return int(ids[-1]) if len(ids) else -1
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(ids) for ids in self._ids.values())
+
+    def _posicoes(self, ano: int, ids: np.ndarray):
+        """Posição de cada id no índice e máscara de quais existem"""
+        with self._lock:
+            self._carregar(ano)
+            conhecidos = self._ids[ano]
+            hashes = self._hashes[ano]
+        if len(conhecidos) == 0:
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool), hashes
+        pos = np.searchsorted(conhecidos, ids)
+        pos[pos == len(conhecidos)] = 0
+        return pos, conhecidos[pos] == ids, hashes
+
+    def contem(self, ano: int, ids: np.ndarray) -> np.ndarray:
+        """Máscara booleana vetorizada: quais ids já estão no índice do ano"""
+        return self._posicoes(ano, ids)[1]
+
+    def classificar(self, ano: int, ids: np.ndarray, hashes: np.ndarray):
+        """
+        Compara o lote com o índice. Retorna máscaras (novos, alterados,
+        sem_hash): ids inéditos, ids conhecidos cujo conteúdo mudou e ids
+        conhecidos ainda sem hash registrado.
+        """
+        pos, existe, conhecidos = self._posicoes(ano, ids)
+        novos = ~existe
+        if len(conhecidos) == 0:
+            vazio = np.zeros(len(ids), dtype=bool)
+            return novos, vazio, vazio
+
+        hash_atual = conhecidos[pos]
+        sem_hash = existe & (hash_atual == HASH_DESCONHECIDO)
+        alterados = existe & ~sem_hash & (hash_atual != hashes)
+        return novos, alterados, sem_hash
+
+    def adicionar(self, ano: int, ids: np.ndarray, hashes: np.ndarray = None):
+        """
+        Inclui ids no índice do ano mantendo a ordenação. Para ids já
+        existentes o hash informado substitui o anterior.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if hashes is None:
+            hashes = np.full(len(ids), HASH_DESCONHECIDO, dtype=np.int64)
+        hashes = np.asarray(hashes, dtype=np.int64)
+
+        validos = ids >= 0
+        ids, hashes = ids[validos], hashes[validos]
+        if len(ids) == 0:
+            return
+
+        with self._lock:
+            self._carregar(ano)
+            todos_ids = np.concatenate([self._ids[ano], ids])
+            todos_hashes = np.concatenate([self._hashes[ano], hashes])
+
+            # Ordenação estável: para ids repetidos, a última ocorrência (a
+            # mais nova) fica por último e é a que sobrevive
+            ordem = np.argsort(todos_ids, kind="stable")
+            todos_ids = todos_ids[ordem]
+            todos_hashes = todos_hashes[ordem]
+            ultimo = np.append(todos_ids[1:] != todos_ids[:-1], True)
+
+            self._ids[ano] = todos_ids[ultimo]
+            self._hashes[ano] = todos_hashes[ultimo]
+
+    def _gravar(self, caminho: str, array: np.ndarray):
+        tmp = f"{caminho}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, caminho)
+
+    def salvar(self, anos=None):
+        """Grava os arrays (todos ou só de `anos`) de forma atômica (arquivo temporário + rename)"""
+        with self._lock:
+            for ano in self._ids if anos is None else [a for a in anos if a in self._ids]:
+                self._gravar(self._caminho("hashes", ano), self._hashes[ano])
+                self._gravar(self._caminho("ids", ano), self._ids[ano])
+
+    def limpar(self):
+        """Descarta o índice local para reconstruí-lo a partir do BigQuery"""
+        with self._lock:
+            for nome in os.listdir(self.diretorio):
+                if nome.startswith(("ids_", "hashes_")) and nome.endswith(".npy"):
+                    os.remove(os.path.join(self.diretorio, nome))
+            self._ids = {}
+            self._hashes = {}
+
+    def sincronizar(self, client, tabela: str, anos, id_column: str = "codigo_interno"):
+        """
+        Traz do BigQuery apenas os ids acima do watermark de cada ano (com o
+        hash da versão mais recente), numa única consulta para todos os anos.
+        Retorna o número de ids novos incorporados.
+        """
+        condicoes = " OR ".join(
+            f"(SAFE_CAST(ano_api AS INT64) = {int(ano)} "
+            f"AND SAFE_CAST({id_column} AS INT64) > {self.watermark(ano)})"
+            for ano in anos
+        )
+        query = f"""
+            SELECT
+                SAFE_CAST(ano_api AS INT64) AS ano_api,
+                SAFE_CAST({id_column} AS INT64) AS id,
+                ARRAY_AGG(hash_conteudo IGNORE NULLS ORDER BY ingerido_em DESC LIMIT 1)[SAFE_OFFSET(0)] AS hash
+            FROM `{tabela}`
+            WHERE {condicoes}
+            GROUP BY 1, 2
+        """
+
+        df = client.query(query).to_dataframe()
+        df = df.dropna(subset=["ano_api", "id"])
+        df["hash"] = df["hash"].fillna(HASH_DESCONHECIDO)
+
+        for ano, grupo in df.groupby("ano_api"):
+            self.adicionar(
+                int(ano),
+                grupo["id"].to_numpy(dtype=np.int64),
+                grupo["hash"].to_numpy(dtype=np.int64),
+            )
+
+        return len(df)
@@ -0,0 +1,73 @@
+"""
+Geração do MERGE usado no modo de carga "merge".
+
+Cada lote vai para uma tabela de staging e um único MERGE insere em
+raw_despesas_pagas apenas os codigo_interno que ainda não existem (e
+atualiza os que tiveram o conteúdo alterado). A
+deduplicação acontece no servidor e é idempotente: rodar o mesmo lote duas
+vezes (ou duas execuções sobrepostas) não duplica registros.
+
+O SQL é ANSI o bastante para rodar também em DuckDB, útil para testar
+localmente sem BigQuery.
+"""
+
+
+def _q(identificador: str) -> str:
+    return f"`{identificador}`"
+
+
+def montar_merge(destino: str, origem: str, colunas, chave: str = "codigo_interno",
+                 coluna_hash: str = None, coluna_alterado: str = None, citar=_q) -> str:
+    """
+    MERGE de `origem` em `destino` pela `chave`, inserindo só o que não existe.
+    Duplicatas da chave dentro do próprio lote são reduzidas a uma linha e
+    registros sem chave são descartados (não haveria como deduplicá-los).
+
+    Com `coluna_hash`, ids já existentes cujo hash de conteúdo mudou são
+    atualizados (e marcados em `coluna_alterado`); registros antigos sem
+    hash só recebem o hash, sem contar como alteração.
+    """
+    lista = ", ".join(colunas)
+    valores = ", ".join(f"S.{c}" for c in colunas)
+
+    atualizacoes = ""
+    if coluna_hash:
+        sets = [f"{c} = S.{c}" for c in colunas if c not in (chave, coluna_alterado)]
+        if coluna_alterado:
+            sets.append(f"{coluna_alterado} = TRUE")
+        atualizacoes = f"""
+WHEN MATCHED AND T.{coluna_hash} IS NULL THEN
+    UPDATE SET {coluna_hash} = S.{coluna_hash}
+WHEN MATCHED AND T.{coluna_hash} <> S.{coluna_hash} THEN
+    UPDATE SET {", ".join(sets)}"""
+
+    return f"""
+MERGE INTO {citar(destino)} T
+USING (
+    SELECT {lista}
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY {chave}) AS _rn
+        FROM {citar(origem)}
+    )
+    WHERE _rn = 1 AND {chave} IS NOT NULL
+) S
+ON T.{chave} = S.{chave}{atualizacoes}
+WHEN NOT MATCHED THEN
+    INSERT ({lista}) VALUES ({valores})
+""".strip()
+
+
+def montar_contagem_alterados(destino: str, origem: str, chave: str = "codigo_interno",
+                              coluna_alterado: str = "registro_alterado", coluna_lote: str = "lote_id",
+                              citar=_q) -> str:
+    """
+    Depois do MERGE: quantos ids de `origem` foram regravados com conteúdo
+    novo. Os atualizados pelo MERGE que só receberam o hash mantêm o lote
+    anterior e ficam de fora.
+    """
+    return f"""
+SELECT COUNTIF(T.{coluna_alterado} AND T.{coluna_lote} = S.{coluna_lote}) AS alterados
+FROM {citar(destino)} T
+JOIN (SELECT DISTINCT {chave}, {coluna_lote} FROM {citar(origem)}) S
+ON T.{chave} = S.{chave}
+""".strip()
@@ -0,0 +1,128 @@
+"""
+Métricas da execução da ingestão.
+
+Cada fase (http, sync, parse, dedup, carga) acumula tempo de parede por fonte;
+contadores guardam bytes baixados e registros lidos/gravados. O relatório
+final é um dict serializável em JSON, com registros/s e pico de RSS.
+
+Com fases rodando em threads paralelas, o tempo de uma fase é a soma das
+threads (tempo de trabalho), não o tempo de relógio da execução.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+FASES = ("http", "sync", "parse", "dedup", "carga")
+
+
+def pico_rss_mb() -> float:
+    """Pico de memória residente do processo em MB (0 se indisponível)"""
+    if resource is None:
+        return 0.0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    if sys.platform == "darwin":
+        return pico / (1024 * 1024)
+    return pico / 1024
+
+
+class Metricas:
+    """Acumulador thread-safe de tempos por fase e contadores por fonte"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inicio = time.monotonic()
+        self.iniciado_em = datetime.now(timezone.utc)
+        self._tempos = defaultdict(float)
+        self._chamadas = defaultdict(int)
+        self._contadores = defaultdict(int)
+
+    @contextmanager
+    def fase(self, nome: str, fonte: str = ""):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            decorrido = time.perf_counter() - inicio
+            with self._lock:
+                self._tempos[fonte, nome] += decorrido
+                self._chamadas[fonte, nome] += 1
+
+    def contar(self, nome: str, valor: int = 1, fonte: str = ""):
+        with self._lock:
+            self._contadores[fonte, nome] += valor
+
+    def _resumo(self, fonte=None) -> dict:
+        """Fases e contadores de uma fonte (ou somados de todas, se None)"""
+        fases = defaultdict(lambda: {"segundos": 0.0, "chamadas": 0})
+        contadores = defaultdict(int)
+
+        for (nome_fonte, fase), segundos in self._tempos.items():
+            if fonte is None or nome_fonte == fonte:
+                fases[fase]["segundos"] += segundos
+                fases[fase]["chamadas"] += self._chamadas[nome_fonte, fase]
+        for (nome_fonte, nome), valor in self._contadores.items():
+            if fonte is None or nome_fonte == fonte:
+                contadores[nome] += valor
+
+        for dados in fases.values():
+            dados["segundos"] = round(dados["segundos"], 4)
+
+        return {"fases": dict(fases), "contadores": dict(contadores)}
+
+    def relatorio(self, **extras) -> dict:
+        duracao = time.monotonic() - self._inicio
+
+        with self._lock:
+            total = self._resumo()
+            fontes = sorted({fonte for fonte, _ in self._tempos} | {fonte for fonte, _ in self._contadores})
+            por_fonte = {fonte: self._resumo(fonte) for fonte in fontes if fonte}
+
+        lidos = total["contadores"].get("registros_lidos", 0)
+        return {
+            "iniciado_em": self.iniciado_em.isoformat(),
+            "duracao_s": round(duracao, 4),
+            "registros_por_s": round(lidos / duracao, 1) if duracao > 0 else 0.0,
+            "pico_rss_mb": round(pico_rss_mb(), 1),
+            **total,
+            "fontes": por_fonte,
+            **extras,
+        }
+
+    def salvar(self, caminho: str, **extras) -> dict:
+        """Grava o relatório em JSON (escrita atômica) e o devolve"""
+        relatorio = self.relatorio(**extras)
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        tmp = f"{caminho}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, caminho)
+        return relatorio
+
+
+def imprimir_resumo(relatorio: dict):
+    print(
+        f"\n⏱️ {relatorio['duracao_s']:.1f}s, {relatorio['registros_por_s']:.0f} registros/s, "
+        f"pico de RSS {relatorio['pico_rss_mb']:.0f} MB"
+    )
+    for fase in FASES:
+        dados = relatorio["fases"].get(fase)
+        if dados:
+            print(f"   {fase:<6} {dados['segundos']:>9.2f}s ({dados['chamadas']} chamadas)")
+    mb = relatorio["contadores"].get("bytes_baixados", 0) / (1024 * 1024)
+    print(f"   {mb:.1f} MB baixados")
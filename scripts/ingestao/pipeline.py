@@ -0,0 +1,426 @@
+"""
+Pipeline genérico de ingestão de uma Fonte: download por ano (com cache
+condicional), leitura em lotes tipados, deduplicação/detecção de
+alterações pelo índice de ids e gravação no sink.
+
+Com um Checkpoint, o payload de cada ano fica em disco até o ano terminar
+e cada lote carregado é registrado: uma nova execução retoma do primeiro
+lote pendente, com o mesmo lote_id, sem repetir o download. O ingerido_em
+dos lotes retomados é o da nova execução: o dbt pode já ter avançado a
+marca d'água até o instante da execução original.
+"""
+
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ingestao.agendador import Limitador
+from ingestao.cache_respostas import CacheRespostas
+from ingestao.checkpoint import Checkpoint
+from ingestao.cliente_http import criar_sessao, get_com_retentativa
+from ingestao.fontes import Fonte
+from ingestao.indice_ids import IndiceIds
+from ingestao.metricas import Metricas
+from ingestao.schemas import colunas_desconhecidas, com_controle, construir_tabela, hash_conteudo
+from ingestao.sinks import Gravacao, Sink
+from ingestao.streaming import iter_lotes, iter_registros
+
+
+# Registros por lote: cada lote é deduplicado e carregado antes do próximo ser lido
+BATCH_SIZE = 50000
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class Download:
+    """Resposta de um ano baixada para arquivo, ainda não processada"""
+    ano: int
+    arquivo: object
+    sha256: str
+    etag: str = None
+    last_modified: str = None
+    # True quando o payload veio do checkpoint de uma execução interrompida
+    retomado: bool = False
+
+
+@dataclass
+class ResultadoAno:
+    ano: int
+    encontrados: int = 0
+    inseridos: int = 0
+    alterados: int = 0
+    retomado: bool = False
+    # Lotes já carregados por uma execução anterior (não regravados)
+    lotes_pulados: int = 0
+
+
+def gerar_lote_id(fonte: Fonte, download: Download, ingerido_em: datetime, numero: int) -> str:
+    """Id determinístico do lote: o mesmo numa retomada da mesma execução"""
+    return (
+        f"{fonte.nome}-{download.ano}-{download.sha256[:12]}-"
+        f"{ingerido_em:%Y%m%dT%H%M%S}-{numero:05d}"
+    )
+
+
+def retomar_download(fonte: Fonte, ano: int, checkpoint: Checkpoint):
+    """Download de um ano interrompido, a partir do payload guardado"""
+    estado = checkpoint.pendente(fonte.nome, ano)
+    if not estado:
+        return None
+
+    print(
+        f"♻️ [{fonte.nome}] {ano}: retomando execução anterior "
+        f"({estado.get('lotes_carregados', 0)} lotes já carregados)"
+    )
+    return Download(
+        ano=ano,
+        arquivo=open(checkpoint.caminho_payload(fonte.nome, ano), "rb"),
+        sha256=estado["sha256"],
+        etag=estado.get("etag"),
+        last_modified=estado.get("last_modified"),
+        retomado=True,
+    )
+
+
+def salvar_resposta(fonte: Fonte, ano: int, response, metricas: Metricas,
+                    checkpoint: Checkpoint = None):
+    """
+    Copia o corpo da resposta para um arquivo (temporário, ou o `.part` do
+    payload do checkpoint) calculando o SHA-256; None para 304. Se a leitura
+    falhar no meio, o arquivo parcial é fechado e removido antes do erro
+    subir para a retentativa.
+    """
+    if response.status_code == 304:
+        return None
+
+    parcial = None
+    if checkpoint is None:
+        arquivo = tempfile.TemporaryFile()
+    else:
+        payload = checkpoint.caminho_payload(fonte.nome, ano)
+        os.makedirs(os.path.dirname(payload), exist_ok=True)
+        parcial = f"{payload}.part"
+        arquivo = open(parcial, "w+b")
+
+    hasher = hashlib.sha256()
+    tamanho = 0
+    completo = False
+    try:
+        # iter_content já descompacta gzip conforme Content-Encoding
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            hasher.update(chunk)
+            arquivo.write(chunk)
+            tamanho += len(chunk)
+        completo = True
+    finally:
+        if not completo:
+            arquivo.close()
+            if parcial is not None and os.path.exists(parcial):
+                os.remove(parcial)
+
+    metricas.contar("bytes_baixados", tamanho, fonte.nome)
+    return Download(
+        ano=ano,
+        arquivo=arquivo,
+        sha256=hasher.hexdigest(),
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+
+
+def fetch_from_api(fonte: Fonte, ano: int, session=None, cache: CacheRespostas = None,
+                   force: bool = False, limitador: Limitador = None,
+                   metricas: Metricas = None, checkpoint: Checkpoint = None):
+    """
+    Busca os dados de um ano da fonte usando GET com parâmetros.
+
+    A resposta é lida em streaming para um arquivo (temporário, ou o
+    payload do checkpoint) enquanto o SHA-256 é calculado. Retorna None se
+    o ano não mudou desde a última execução (304 ou mesmo hash), sem fazer
+    o parse. Um ano interrompido com checkpoint é retomado sem requisição.
+    """
+    if metricas is None:
+        metricas = Metricas()
+
+    if checkpoint is not None:
+        if force:
+            checkpoint.descartar(fonte.nome, ano)
+        else:
+            download = retomar_download(fonte, ano, checkpoint)
+            if download is not None:
+                metricas.contar("downloads_retomados", 1, fonte.nome)
+                return download
+
+    print(f"📡 [{fonte.nome}] Consultando API para ano {ano}...")
+
+    if session is None:
+        session = criar_sessao(pool_size=1)
+    if limitador is None:
+        limitador = Limitador()
+
+    headers = {"Accept-Encoding": "gzip"}
+    if cache is not None and not force:
+        headers.update(cache.cabecalhos_condicionais(fonte.nome, ano))
+
+    with limitador.requisicao(fonte.host), metricas.fase("http", fonte.nome):
+        download = get_com_retentativa(
+            session, fonte.url, params=fonte.params_ano(ano), stream=True, headers=headers,
+            ler=lambda response: salvar_resposta(fonte, ano, response, metricas, checkpoint),
+        )
+
+    if download is None:
+        print(f"💾 [{fonte.nome}] {ano} sem alterações (HTTP 304)")
+        return None
+
+    payload = None if checkpoint is None else checkpoint.caminho_payload(fonte.nome, ano)
+    if cache is not None and not force and cache.conteudo_igual(fonte.nome, ano, download.sha256):
+        print(f"💾 [{fonte.nome}] {ano} sem alterações (mesmo conteúdo)")
+        download.arquivo.close()
+        if checkpoint is not None:
+            os.remove(f"{payload}.part")
+        return None
+
+    if checkpoint is not None:
+        # Payload só vale como checkpoint depois de completo
+        download.arquivo.close()
+        os.replace(f"{payload}.part", payload)
+        checkpoint.registrar_download(fonte.nome, ano, download.sha256,
+                                      download.etag, download.last_modified)
+        download.arquivo = open(payload, "rb")
+
+    download.arquivo.seek(0)
+    return download
+
+
+def read_batches(fonte: Fonte, download: Download, batch_size: int = BATCH_SIZE,
+                 ingerido_em=None, metricas: Metricas = None, pular: int = 0, lote_em=None):
+    """
+    Lê o arquivo baixado e gera (número do lote, pyarrow.Table tipada no
+    fonte.schema_raw, com hash de conteúdo e lote_id) de até batch_size
+    registros. Os `pular` primeiros lotes são lidos sem serem tipados.
+    `lote_em` (padrão: ingerido_em) é o instante que compõe o lote_id.
+    """
+    ingerido_em = ingerido_em or datetime.now(timezone.utc)
+    lote_em = lote_em or ingerido_em
+    metricas = metricas or Metricas()
+    chunks = iter(lambda: download.arquivo.read(CHUNK_SIZE), b"")
+    lotes = iter_lotes(iter_registros(chunks, fonte.chave_dados), batch_size)
+
+    total = 0
+    numero = -1
+    falhas = {}
+    while True:
+        # A fase parse cobre leitura do arquivo, JSON, tipagem e hash
+        with metricas.fase("parse", fonte.nome):
+            lote = next(lotes, None)
+            if lote is None:
+                break
+            numero += 1
+
+            if numero < pular:
+                total += len(lote)
+                metricas.contar("lotes_pulados", 1, fonte.nome)
+                continue
+
+            if total == 0:
+                extras = colunas_desconhecidas(lote[0], fonte.schema)
+                if extras:
+                    print(f"⚠️ [{fonte.nome}] Campos fora do schema serão ignorados ({download.ano}): {sorted(extras)}")
+
+            tabela = construir_tabela(lote, fonte.schema, falhas, ano_api=download.ano)
+            hashes = hash_conteudo(tabela)
+            tabela = com_controle(
+                tabela, hashes, np.zeros(len(hashes), dtype=bool), ingerido_em,
+                gerar_lote_id(fonte, download, lote_em, numero)
+            )
+
+        total += tabela.num_rows
+        metricas.contar("registros_lidos", tabela.num_rows, fonte.nome)
+        yield numero, tabela
+
+    if falhas:
+        print(f"⚠️ [{fonte.nome}] Valores inválidos gravados como null ({download.ano}): {falhas}")
+        for coluna, quantidade in falhas.items():
+            metricas.contar(f"falhas_conversao.{coluna}", quantidade, fonte.nome)
+
+    if total == 0:
+        print(f"⚠️ [{fonte.nome}] Nenhum dado retornado para {download.ano}")
+    else:
+        print(f"✓ [{fonte.nome}] {total} registros encontrados para {download.ano}")
+
+
+def sync_id_index(client, fonte: Fonte, indice: IndiceIds, years):
+    """Atualiza o índice local com os ids carregados desde o último watermark"""
+    try:
+        novos = indice.sincronizar(client, fonte.tabela, years, fonte.id_column)
+        print(f"🔄 [{fonte.nome}] Índice sincronizado: {novos} ids novos vindos do BigQuery")
+    except Exception as e:
+        print(f"⚠️ [{fonte.nome}] Tabela não existe ou erro ao consultar: {e}")
+
+
+def process_year(fonte: Fonte, sink: Sink, download: Download, indice: IndiceIds = None,
+                 batch_size: int = BATCH_SIZE, ingerido_em=None,
+                 metricas: Metricas = None, checkpoint: Checkpoint = None) -> ResultadoAno:
+    """
+    Grava cada lote no sink assim que é lido, antes de ler o próximo.
+
+    Com índice: compara id e hash de conteúdo com o índice do ano e grava
+    só os registros novos ou alterados (esses com registro_alterado=True).
+    Sem índice (sink que deduplica, ex.: MERGE): envia o lote inteiro.
+
+    Com checkpoint: cada lote concluído é registrado (e o índice do ano
+    salvo junto); numa retomada, batch_size e o instante da execução
+    original são reaproveitados (mesmos lotes e lote_id, então regravar um
+    lote é idempotente) e os lotes já carregados são pulados. O ingerido_em
+    gravado é sempre o desta execução.
+    """
+    year = download.ano
+    resultado = ResultadoAno(ano=year, retomado=download.retomado)
+    metricas = metricas or Metricas()
+    ingerido_em = ingerido_em or datetime.now(timezone.utc)
+    lote_em = ingerido_em
+
+    if checkpoint is not None:
+        estado = checkpoint.obter(fonte.nome, year)
+        if estado.get("ingerido_em"):
+            lote_em = datetime.fromisoformat(estado["ingerido_em"])
+        batch_size = estado.get("batch_size") or batch_size
+        resultado.lotes_pulados = estado.get("lotes_carregados", 0)
+        checkpoint.iniciar_carga(fonte.nome, year, lote_em.isoformat(), batch_size)
+
+    total_lotes = 0
+    with download.arquivo:
+        for numero, tabela in read_batches(fonte, download, batch_size, ingerido_em,
+                                           metricas, pular=resultado.lotes_pulados, lote_em=lote_em):
+            total_lotes = numero + 1
+            resultado.encontrados += tabela.num_rows
+            lote_id = tabela["lote_id"][0].as_py()
+
+            if indice is None:
+                with metricas.fase("carga", fonte.nome):
+                    gravacao = sink.escrever(tabela, lote_id)
+                # Sinks que deduplicam separam novos de alterados; os demais só contam
+                inseridos, alterados = gravacao if isinstance(gravacao, Gravacao) else (gravacao, 0)
+                resultado.inseridos += inseridos
+                resultado.alterados += alterados
+                metricas.contar("registros_gravados", inseridos + alterados, fonte.nome)
+            else:
+                with metricas.fase("dedup", fonte.nome):
+                    # Classificação vetorizada pelo id (int64; null vira -1)
+                    ids = pc.fill_null(tabela[fonte.id_column], -1).to_numpy()
+                    hashes = tabela["hash_conteudo"].to_numpy()
+                    novos, alterados, sem_hash = indice.classificar(year, ids, hashes)
+
+                    # Registros antigos sem hash: só adota o hash atual no índice
+                    if sem_hash.any():
+                        indice.adicionar(year, ids[sem_hash], hashes[sem_hash])
+
+                    enviar = novos | alterados
+                    if enviar.any():
+                        tabela = tabela.filter(enviar)
+                        tabela = tabela.set_column(
+                            tabela.schema.get_field_index("registro_alterado"),
+                            "registro_alterado",
+                            pa.array(alterados[enviar]),
+                        )
+
+                if enviar.any():
+                    with metricas.fase("carga", fonte.nome):
+                        gravados = sink.escrever(tabela, lote_id)
+                    metricas.contar("registros_gravados", gravados, fonte.nome)
+                    # 0: o lote já tinha sido carregado (job repetido); os
+                    # registros estão no destino, mas não contam como desta execução
+                    if gravados:
+                        resultado.inseridos += int(novos.sum())
+                        resultado.alterados += int(alterados.sum())
+
+                    indice.adicionar(year, ids[enviar], hashes[enviar])
+
+            if checkpoint is not None:
+                # Índice antes do checkpoint: se o processo cair entre os dois,
+                # o lote é relido e a deduplicação descarta o que já foi gravado
+                if indice is not None:
+                    indice.salvar(anos=[year])
+                checkpoint.registrar_lote(fonte.nome, year, numero)
+
+    if checkpoint is not None:
+        checkpoint.registrar_leitura(fonte.nome, year, max(total_lotes, resultado.lotes_pulados))
+
+    pulados = f", {resultado.lotes_pulados} lotes já carregados antes" if resultado.lotes_pulados else ""
+    print(f"  → [{fonte.nome}] {resultado.inseridos} novos e {resultado.alterados} alterados para {year}{pulados}")
+    return resultado
+
+
+def download_years(fonte: Fonte, years, cache: CacheRespostas, max_workers: int = 3,
+                   force: bool = False, limitador: Limitador = None,
+                   metricas: Metricas = None, checkpoint: Checkpoint = None):
+    """
+    Baixa vários anos em paralelo com uma única Session compartilhada.
+    Retorna (downloads dos anos alterados, anos sem alteração).
+    """
+    max_workers = max(1, min(max_workers, len(years)))
+    session = criar_sessao(pool_size=max_workers)
+
+    downloads = []
+    inalterados = []
+
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                fetch_from_api, fonte, year, session, cache, force, limitador, metricas, checkpoint
+            ): year
+            for year in years
+        }
+        try:
+            for future in as_completed(futures):
+                download = future.result()
+                if download is None:
+                    cache.registrar_hit()
+                    cache.marcar_verificado(fonte.nome, futures[future])
+                    inalterados.append(futures[future])
+                else:
+                    cache.registrar_miss()
+                    downloads.append(download)
+        except Exception:
+            for download in downloads:
+                download.arquivo.close()
+            raise
+
+    return downloads, inalterados
+
+
+def process_years(fonte: Fonte, sink: Sink, downloads, indice: IndiceIds,
+                  cache: CacheRespostas, max_workers: int = 3,
+                  batch_size: int = BATCH_SIZE, ingerido_em=None,
+                  metricas: Metricas = None, checkpoint: Checkpoint = None):
+    """
+    Processa os anos baixados em paralelo. O cache de cada ano só é
+    atualizado (e o checkpoint removido) depois que todos os seus lotes
+    foram carregados.
+    Gera um ResultadoAno conforme cada ano termina.
+    """
+    max_workers = max(1, min(max_workers, len(downloads)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                process_year, fonte, sink, download, indice, batch_size, ingerido_em,
+                metricas, checkpoint
+            ): download
+            for download in downloads
+        }
+        for future in as_completed(futures):
+            resultado = future.result()
+            download = futures[future]
+            cache.atualizar(fonte.nome, download.ano, download.sha256,
+                            download.etag, download.last_modified)
+            if checkpoint is not None:
+                checkpoint.concluir(fonte.nome, download.ano)
+            yield resultado
@@ -0,0 +1,94 @@
+"""
+Conversão vetorizada dos formatos pt-BR da API.
+
+Valores monetários chegam como "1.234,56" e datas como
+"YYYY-MM-DD HH:MM:SS.S". Tudo é feito com pyarrow.compute sobre os
+buffers Arrow, sem laço Python por valor (exceto para montar o array a
+partir de uma lista com tipos misturados). Cada conversão devolve também
+quantos valores não vazios falharam, para o relatório por coluna.
+"""
+
+from typing import NamedTuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# NUMERIC do BigQuery: precisão 38, escala 9
+DECIMAL = pa.decimal128(38, 9)
+
+_NUMERO = r"^-?\d+(\.\d{1,9})?$"
+_INTEIRO = r"^-?\d+$"
+
+
+class Conversao(NamedTuple):
+    valores: pa.Array
+    # Valores não vazios na entrada que viraram null na saída
+    falhas: int
+
+
+def _como_array(valores) -> pa.Array:
+    if isinstance(valores, pa.ChunkedArray):
+        return valores.combine_chunks()
+    if isinstance(valores, pa.Array):
+        return valores
+    try:
+        return pa.array(valores, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Tipos misturados (ex.: JSON number no meio de strings)
+        return pa.array([None if v is None else str(v) for v in valores], type=pa.string())
+
+
+def texto(valores, aparar: bool = False) -> pa.Array:
+    """Coluna como string Arrow; vazios viram null"""
+    arr = _como_array(valores)
+    if not pa.types.is_string(arr.type):
+        arr = arr.cast(pa.string())
+    if aparar:
+        arr = pc.utf8_trim_whitespace(arr)
+    return pc.if_else(pc.equal(arr, ""), pa.scalar(None, pa.string()), arr)
+
+
+def _somente_validos(arr: pa.Array, padrao: str) -> pa.Array:
+    """Anula valores fora do padrão (equivalente ao safe_cast do BigQuery)"""
+    validos = pc.match_substring_regex(arr, padrao)
+    return pc.if_else(validos, arr, pa.scalar(None, pa.string()))
+
+
+def inteiro(valores) -> Conversao:
+    arr = texto(valores, aparar=True)
+    convertido = _somente_validos(arr, _INTEIRO).cast(pa.int64())
+    return Conversao(convertido, convertido.null_count - arr.null_count)
+
+
+def numerico(valores, tipo: pa.DataType = DECIMAL) -> Conversao:
+    """Converte "1.234,56" para decimal: remove milhar e troca vírgula por ponto"""
+    if not isinstance(valores, (pa.Array, pa.ChunkedArray)):
+        # Números que já chegam como JSON number são levados ao formato pt-BR
+        if any(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores):
+            valores = [
+                str(v).replace(".", ",") if isinstance(v, (int, float)) else v
+                for v in valores
+            ]
+    arr = texto(valores, aparar=True)
+    normalizado = pc.replace_substring(pc.replace_substring(arr, ".", ""), ",", ".")
+    convertido = _somente_validos(normalizado, _NUMERO).cast(tipo)
+    return Conversao(convertido, convertido.null_count - arr.null_count)
+
+
+def data(valores) -> Conversao:
+    """
+    Converte "YYYY-MM-DD HH:MM:SS.S" para DATE usando os 10 primeiros
+    caracteres. Datas inexistentes ("2024-02-30") viram null e contam como
+    falha, em vez de rolar para o mês seguinte.
+    """
+    arr = texto(valores, aparar=True)
+    dia = pc.utf8_slice_codeunits(arr, 0, 10)
+    instante = pc.strptime(dia, format="%Y-%m-%d", unit="s", error_is_null=True)
+    # O strptime normaliza dia fora do mês (30/02 vira 01/03): só vale se o
+    # dia do mês convertido for o do texto
+    dd = pc.utf8_slice_codeunits(dia, 8, 10)
+    dia_do_mes = pc.if_else(pc.utf8_is_digit(dd), dd, pa.scalar(None, pa.string())).cast(pa.int64())
+    valido = pc.equal(pc.day(instante), dia_do_mes)
+    convertido = pc.if_else(valido, instante, pa.scalar(None, instante.type)).cast(pa.date32())
+    return Conversao(convertido, convertido.null_count - arr.null_count)
@@ -0,0 +1,197 @@
+"""
+Schemas explícitos dos payloads da API.
+
+Cada schema é uma lista (coluna, tipo) com os nomes exatamente como vêm da
+API. A partir dela são gerados o pyarrow.Schema usado para montar os lotes
+e o schema fixo do job de carga no BigQuery (sem autodetect).
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ingestao import ptbr
+
+
+STRING = "STRING"
+INT64 = "INT64"
+NUMERIC = "NUMERIC"
+DATE = "DATE"
+BOOL = "BOOLEAN"
+TIMESTAMP = "TIMESTAMP"
+
+TIPOS_ARROW = {
+    STRING: pa.string(),
+    INT64: pa.int64(),
+    NUMERIC: ptbr.DECIMAL,
+    DATE: pa.date32(),
+    BOOL: pa.bool_(),
+    TIMESTAMP: pa.timestamp("us", tz="UTC"),
+}
+
+DESPESAS_PAGAS = [
+    # Identificadores
+    ("codigo_interno", INT64),
+    ("EMP_PROCESSO_COMPLETO", STRING),
+    ("empenho", STRING),
+    ("OP", STRING),
+    ("NR_OP", STRING),
+    ("Codigo_Liquidacao", STRING),
+    ("Despesa", STRING),
+
+    # Dados do favorecido
+    ("CPF_CNPJ_FORMATADA", STRING),
+    ("descricao_favorecido", STRING),
+
+    # Classificação orçamentária
+    ("dotacao", STRING),
+    ("unidade_orcamentaria", STRING),
+    ("natureza_despeza", STRING),
+    ("fonte", STRING),
+    ("funcao", STRING),
+    ("subfuncao", STRING),
+    ("orgao", STRING),
+    ("secretaria", STRING),
+    ("acao", STRING),
+    ("programa", STRING),
+    ("catagoria_economica", STRING),
+    ("catagoria_descricao", STRING),
+    ("grupo_despesa", STRING),
+    ("grupo_descricao", STRING),
+    ("elemento_despesa", STRING),
+    ("desspesas_descricao", STRING),
+
+    # Licitação
+    ("modalidade_licitacao", STRING),
+    ("numero_licitacao", STRING),
+
+    # Tipo e descrição
+    ("Tipo", STRING),
+    ("descricao_despesa", STRING),
+
+    # Valores monetários (pt-BR: "1.234,56")
+    ("valor_despesa", NUMERIC),
+    ("valor_despesa_total", NUMERIC),
+    ("Valor_Estornado", NUMERIC),
+    ("RETIDO", NUMERIC),
+    ("Estorno_do_Pagamento", NUMERIC),
+
+    # Datas ("YYYY-MM-DD HH:MM:SS.S")
+    ("data_despesa", DATE),
+    ("data_liquidacao", DATE),
+
+    # Exercício fiscal
+    ("exercicio", INT64),
+    ("ano_api", INT64),
+
+    # URL do documento
+    ("URL", STRING),
+]
+
+
+# Colunas de controle acrescentadas pela ingestão (não vêm da API)
+COLUNAS_CONTROLE = [
+    # Hash do conteúdo do registro, para detectar correções publicadas sob o mesmo id
+    ("hash_conteudo", INT64),
+    # True quando o registro é uma nova versão de um id já carregado
+    ("registro_alterado", BOOL),
+    ("ingerido_em", TIMESTAMP),
+    # Lote determinístico (fonte, ano, conteúdo, execução, número): regravar o
+    # mesmo lote numa retomada não duplica registros
+    ("lote_id", STRING),
+]
+
+DESPESAS_PAGAS_RAW = DESPESAS_PAGAS + COLUNAS_CONTROLE
+
+# Colunas que não entram no hash de conteúdo
+_FORA_DO_HASH = {"ano_api"} | {nome for nome, _ in COLUNAS_CONTROLE}
+
+# Montagem da linha do hash: null distinto de "" e chave fixa do siphash
+_HASH_NULO = "\x00"
+_HASH_SEPARADOR = "\x1f"
+_HASH_CHAVE = "0123456789123456"
+
+
+def arrow_schema(schema) -> pa.Schema:
+    return pa.schema([(nome, TIPOS_ARROW[tipo]) for nome, tipo in schema])
+
+
+def bigquery_schema(schema):
+    """Lista de SchemaField para o LoadJobConfig"""
+    from google.cloud import bigquery
+
+    return [bigquery.SchemaField(nome, tipo, mode="NULLABLE") for nome, tipo in schema]
+
+
+def _texto(valores) -> ptbr.Conversao:
+    return ptbr.Conversao(ptbr.texto(valores), 0)
+
+
+_CONVERSORES = {
+    STRING: _texto,
+    INT64: ptbr.inteiro,
+    NUMERIC: ptbr.numerico,
+    DATE: ptbr.data,
+}
+
+
+def construir_tabela(registros, schema, falhas: dict = None, **constantes) -> pa.Table:
+    """
+    Monta um pyarrow.Table tipado direto da lista de registros (dicts),
+    coluna a coluna, sem passar por DataFrame. Colunas ausentes viram null;
+    `constantes` preenche colunas com um valor fixo (ex.: ano_api=2024).
+    Se `falhas` for um dict, acumula nele os valores inválidos por coluna.
+    """
+    colunas = []
+    for nome, tipo in schema:
+        if nome in constantes:
+            valores = [constantes[nome]] * len(registros)
+        else:
+            valores = [r.get(nome) for r in registros]
+        conversao = _CONVERSORES[tipo](valores)
+        colunas.append(conversao.valores)
+        if falhas is not None and conversao.falhas:
+            falhas[nome] = falhas.get(nome, 0) + conversao.falhas
+
+    return pa.Table.from_arrays(colunas, schema=arrow_schema(schema))
+
+
+def colunas_desconhecidas(registro: dict, schema) -> set:
+    """Campos do payload que não estão no schema (serão descartados)"""
+    return set(registro) - {nome for nome, _ in schema}
+
+
+def hash_conteudo(tabela: pa.Table) -> np.ndarray:
+    """
+    Hash de 64 bits por registro sobre as colunas de conteúdo, calculado de
+    forma vetorizada para o lote inteiro. Devolvido como int64 (mesmos bits
+    do uint64) para caber em INT64 no BigQuery.
+
+    Cada valor vira texto pelo cast do Arrow (null vira um marcador), e o
+    registro é uma linha com os valores separados: o hash depende só do
+    registro, não dos tipos que o pandas inferiria para o lote (ex.: int64
+    com um null em qualquer linha virando float64).
+    """
+    colunas = [nome for nome in tabela.column_names if nome not in _FORA_DO_HASH]
+    textos = [
+        pc.fill_null(tabela.column(nome).cast(pa.string()), _HASH_NULO)
+        for nome in colunas
+    ]
+    linhas = pc.binary_join_element_wise(*textos, _HASH_SEPARADOR)
+    hashes = pd.util.hash_array(
+        linhas.to_numpy(zero_copy_only=False), hash_key=_HASH_CHAVE, categorize=False
+    )
+    return hashes.view(np.int64)
+
+
+def com_controle(tabela: pa.Table, hashes: np.ndarray, alterados: np.ndarray,
+                 ingerido_em, lote_id: str = None) -> pa.Table:
+    """Acrescenta as COLUNAS_CONTROLE ao lote"""
+    n = tabela.num_rows
+    tabela = tabela.append_column("hash_conteudo", pa.array(hashes, type=pa.int64()))
+    tabela = tabela.append_column("registro_alterado", pa.array(alterados, type=pa.bool_()))
+    tabela = tabela.append_column(
+        "ingerido_em", pa.array([ingerido_em] * n, type=TIPOS_ARROW[TIMESTAMP])
+    )
+    return tabela.append_column("lote_id", pa.array([lote_id] * n, type=pa.string()))
@@ -0,0 +1,276 @@
+"""
+Destinos (sinks) dos lotes da ingestão.
+
+Todo sink recebe pyarrow.Tables tipadas via escrever() e devolve quantos
+registros foram efetivamente gravados; os que deduplicam no destino
+devolvem Gravacao, com novos e alterados separados. Com lote_id, regravar
+o mesmo lote (retomada após falha) não duplica registros no destino:
+
+- BigQuerySink: WRITE_APPEND direto ou staging + MERGE na tabela raw
+- ParquetLakeSink: dataset Parquet local particionado por ano_api/mês,
+  para rodar e medir a ingestão offline. upload_lake() envia o lake ao
+  BigQuery com um job de carga por partição, de job id fixo pelos arquivos.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from ingestao.merge import montar_contagem_alterados, montar_merge
+from ingestao.schemas import bigquery_schema
+
+
+class Gravacao(NamedTuple):
+    """Resultado de um sink que deduplica: ids novos e ids com conteúdo alterado"""
+    inseridos: int
+    alterados: int = 0
+
+
+class Sink:
+    """Interface comum dos destinos"""
+
+    # True quando o próprio destino descarta ids já existentes (MERGE),
+    # dispensando o índice local de ids
+    deduplica = False
+
+    def escrever(self, tabela: pa.Table, lote_id: str = None) -> int:
+        """Registros gravados (Gravacao quando deduplica = True)"""
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+
+def job_id_do_lote(lote_id: str) -> str:
+    """Job id do BigQuery (letras, números, _ e -) derivado do lote"""
+    return "ingestao_" + re.sub(r"[^A-Za-z0-9_-]", "_", lote_id)
+
+
+def job_id_da_particao(table_ref: str, particao: str, arquivos: list) -> str:
+    """
+    Job id do BigQuery de uma carga do lake: a partição mais um hash da
+    tabela e dos arquivos enviados. O mesmo conjunto de arquivos gera
+    sempre o mesmo id
+    """
+    conteudo = json.dumps([table_ref, particao, sorted(arquivos)])
+    resumo = hashlib.sha256(conteudo.encode()).hexdigest()[:16]
+    return "lake_" + re.sub(r"[^A-Za-z0-9_-]", "_", particao) + "_" + resumo
+
+
+def load_parquet_to_bq(client, tabela: pa.Table, table_ref: str, schema,
+                       write_disposition: str = "WRITE_APPEND", job_id: str = None):
+    """Carrega uma tabela Arrow tipada no BigQuery com schema fixo"""
+    from google.cloud import bigquery
+
+    # Parquet preserva os tipos (int64, NUMERIC, DATE) e os nulls
+    buffer = io.BytesIO()
+    pq.write_table(tabela, buffer, compression="snappy")
+    buffer.seek(0)
+
+    job_config = bigquery.LoadJobConfig(
+        write_disposition=write_disposition,
+        source_format=bigquery.SourceFormat.PARQUET,
+        schema=bigquery_schema(schema)
+    )
+
+    job = client.load_table_from_file(buffer, table_ref, job_config=job_config, job_id=job_id)
+    job.result()
+    return job
+
+
+def append_idempotente(client, tabela: pa.Table, table_ref: str, schema, job_id: str) -> bool:
+    """
+    Append com job id fixo: o BigQuery recusa (409) um segundo job com o
+    mesmo id. Retorna False se a carga já tinha sido feita com sucesso.
+    """
+    from google.api_core.exceptions import Conflict
+
+    try:
+        load_parquet_to_bq(client, tabela, table_ref, schema, job_id=job_id)
+        return True
+    except Conflict:
+        anterior = client.get_job(job_id)
+        if anterior.state == "DONE" and anterior.error_result is None:
+            return False
+
+    # Job anterior falhou (ou não terminou): nada foi gravado, tenta de novo
+    load_parquet_to_bq(client, tabela, table_ref, schema, job_id=f"{job_id}_{uuid.uuid4().hex[:8]}")
+    return True
+
+
+class BigQuerySink(Sink):
+    """
+    modo="append": WRITE_APPEND do lote (deduplicado antes pelo índice local)
+    modo="merge": lote numa tabela de staging + MERGE pelo id
+    """
+
+    def __init__(self, client, table_ref: str, schema, modo: str = "append",
+                 id_column: str = "codigo_interno", staging_ttl_horas: int = 6):
+        self.client = client
+        self.table_ref = table_ref
+        self.schema = schema
+        self.modo = modo
+        self.id_column = id_column
+        self.staging_ttl_horas = staging_ttl_horas
+        self.deduplica = modo == "merge"
+
+    def escrever(self, tabela: pa.Table, lote_id: str = None) -> int:
+        # MERGE já é idempotente: regravar o lote não duplica
+        if self.modo == "merge":
+            return self._merge(tabela)
+
+        if lote_id is None:
+            load_parquet_to_bq(self.client, tabela, self.table_ref, self.schema)
+        elif not self._append_idempotente(tabela, job_id_do_lote(lote_id)):
+            print(f"↩️ Lote {lote_id} já carregado em {self.table_ref}, ignorado")
+            return 0
+
+        print(f"✅ Dados carregados na tabela {self.table_ref}")
+        return tabela.num_rows
+
+    def _append_idempotente(self, tabela: pa.Table, job_id: str) -> bool:
+        return append_idempotente(self.client, tabela, self.table_ref, self.schema, job_id)
+
+    def _merge(self, tabela: pa.Table) -> Gravacao:
+        staging_ref = f"{self.table_ref}__staging_{uuid.uuid4().hex[:12]}"
+
+        try:
+            load_parquet_to_bq(self.client, tabela, staging_ref, self.schema,
+                               write_disposition="WRITE_TRUNCATE")
+
+            # Garante a limpeza mesmo se o processo morrer antes do delete
+            staging = self.client.get_table(staging_ref)
+            staging.expires = datetime.now(timezone.utc) + timedelta(hours=self.staging_ttl_horas)
+            self.client.update_table(staging, ["expires"])
+
+            colunas = [nome for nome, _ in self.schema]
+            com_hash = "hash_conteudo" in colunas
+            job = self.client.query(montar_merge(
+                self.table_ref, staging_ref, colunas, self.id_column,
+                coluna_hash="hash_conteudo" if com_hash else None,
+                coluna_alterado="registro_alterado" if com_hash else None,
+            ))
+            job.result()
+
+            # num_dml_affected_rows somaria os registros antigos que só
+            # receberam o hash: inseridos e atualizados vêm separados, e só
+            # os atualizados com o lote desta carga contam como alterados
+            estatisticas = job.dml_stats
+            inseridos = estatisticas.inserted_row_count if estatisticas else (job.num_dml_affected_rows or 0)
+            alterados = 0
+            if com_hash and estatisticas and estatisticas.updated_row_count:
+                contagem = self.client.query(montar_contagem_alterados(self.table_ref, staging_ref, self.id_column))
+                alterados = next(iter(contagem.result()))[0] or 0
+        finally:
+            self.client.delete_table(staging_ref, not_found_ok=True)
+
+        print(f"🔀 MERGE em {self.table_ref}: {inseridos} inseridos e {alterados} alterados de {tabela.num_rows}")
+        return Gravacao(inseridos, alterados)
+
+
+class ParquetLakeSink(Sink):
+    """
+    Dataset Parquet local no layout hive: <raiz>/ano=AAAA/mes=MM/part-*.parquet
+
+    Cada arquivo é escrito com nome temporário e renomeado ao final
+    (os.replace), então leitores nunca veem um arquivo pela metade.
+    Registros sem data ficam em mes=00.
+    """
+
+    def __init__(self, raiz: str, coluna_ano: str = "ano_api",
+                 coluna_data: str = "data_despesa", compressao: str = "zstd"):
+        self.raiz = raiz
+        self.coluna_ano = coluna_ano
+        self.coluna_data = coluna_data
+        self.compressao = compressao
+        os.makedirs(raiz, exist_ok=True)
+
+    def _diretorio(self, ano: int, mes: int) -> str:
+        return os.path.join(self.raiz, f"ano={ano}", f"mes={mes:02d}")
+
+    def escrever(self, tabela: pa.Table, lote_id: str = None) -> int:
+        anos = pc.fill_null(tabela[self.coluna_ano], 0).to_numpy()
+        meses = pc.fill_null(pc.month(tabela[self.coluna_data]), 0).to_numpy()
+        chaves = anos * 100 + meses
+
+        for chave in sorted(set(chaves.tolist())):
+            parte = tabela.filter(pa.array(chaves == chave))
+            diretorio = self._diretorio(chave // 100, chave % 100)
+            os.makedirs(diretorio, exist_ok=True)
+
+            # Nome fixo por lote: regravar o lote substitui o mesmo arquivo
+            caminho = os.path.join(diretorio, f"part-{lote_id or uuid.uuid4().hex}.parquet")
+            tmp = os.path.join(diretorio, f".{os.path.basename(caminho)}.tmp")
+            pq.write_table(parte, tmp, compression=self.compressao)
+            os.replace(tmp, caminho)
+
+        print(f"✅ {tabela.num_rows} registros gravados no lake {self.raiz}")
+        return tabela.num_rows
+
+
+# Arquivo, dentro de cada partição, com os part-*.parquet já enviados
+_ENVIADOS = "_enviados.json"
+
+
+def particoes_lake(raiz: str):
+    """Diretórios de partição (ano/mês) existentes no lake"""
+    for ano in sorted(os.listdir(raiz)) if os.path.isdir(raiz) else []:
+        dir_ano = os.path.join(raiz, ano)
+        if not os.path.isdir(dir_ano):
+            continue
+        for mes in sorted(os.listdir(dir_ano)):
+            dir_mes = os.path.join(dir_ano, mes)
+            if os.path.isdir(dir_mes):
+                yield dir_mes
+
+
+def upload_lake(client, raiz: str, table_ref: str, schema) -> int:
+    """
+    Envia ao BigQuery os arquivos ainda não enviados do lake, com um único
+    job de carga por partição. Retorna o total de registros enviados.
+
+    O job id vem da partição e dos arquivos pendentes: se o processo morrer
+    entre a carga e a gravação de _enviados.json, a repetição recebe 409 do
+    BigQuery e a partição conta como já enviada, sem duplicar registros.
+    """
+    total = 0
+    for particao in particoes_lake(raiz):
+        controle = os.path.join(particao, _ENVIADOS)
+        enviados = set()
+        if os.path.exists(controle):
+            with open(controle, encoding="utf-8") as f:
+                enviados = set(json.load(f))
+
+        pendentes = sorted(
+            nome for nome in os.listdir(particao)
+            if nome.startswith("part-") and nome.endswith(".parquet") and nome not in enviados
+        )
+        if not pendentes:
+            continue
+
+        tabela = pa.concat_tables(
+            pq.read_table(os.path.join(particao, nome)) for nome in pendentes
+        )
+        relativo = os.path.relpath(particao, raiz)
+        job_id = job_id_da_particao(table_ref, relativo, pendentes)
+        if append_idempotente(client, tabela, table_ref, schema, job_id):
+            total += tabela.num_rows
+            print(f"☁️ {relativo}: {tabela.num_rows} registros enviados")
+        else:
+            print(f"↩️ {relativo}: {len(pendentes)} arquivos já enviados (job {job_id}), ignorados")
+
+        tmp = f"{controle}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(sorted(enviados | set(pendentes)), f)
+        os.replace(tmp, controle)
+
+    return total
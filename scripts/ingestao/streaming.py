@@ -0,0 +1,142 @@
+"""
+Leitura incremental do JSON da API.
+
+Em vez de carregar response.text inteiro e chamar json.loads, os registros
+do array "dados" são decodificados um a um à medida que os chunks chegam,
+e agrupados em lotes de tamanho fixo. A memória fica limitada ao lote
+corrente, independente do tamanho do ano.
+"""
+
+import codecs
+import json
+
+
+_decoder = json.JSONDecoder()
+_ESPACOS = " \t\r\n"
+
+# Caracteres que indicam que um número foi cortado no limite do chunk
+_CONTINUA_NUMERO = "0123456789+-.eE"
+
+
+class _Buffer:
+    """Buffer de texto alimentado por um iterável de chunks de bytes"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.texto = ""
+        self.pos = 0
+        self.fim = False
+
+    def carregar(self) -> bool:
+        """Lê mais um chunk. Retorna False se o stream acabou"""
+        if self.fim:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                # Descarta o que já foi consumido: só o registro parcial é copiado
+                self.texto = self.texto[self.pos:] + self._utf8.decode(chunk)
+                self.pos = 0
+                return True
+        self.texto += self._utf8.decode(b"", final=True)
+        self.fim = True
+        return False
+
+    def proximo_char(self) -> str:
+        """Pula espaços e retorna o próximo caractere sem consumi-lo ('' no fim)"""
+        while True:
+            while self.pos < len(self.texto) and self.texto[self.pos] in _ESPACOS:
+                self.pos += 1
+            if self.pos < len(self.texto):
+                return self.texto[self.pos]
+            if not self.carregar():
+                return ""
+
+    def esperar(self, char: str):
+        if self.proximo_char() != char:
+            raise ValueError(f"JSON inválido: esperado '{char}' na posição {self.pos}")
+        self.pos += 1
+
+    def decodificar(self):
+        """Decodifica o próximo valor JSON completo, lendo mais chunks se preciso"""
+        self.proximo_char()
+        while True:
+            try:
+                valor, fim = _decoder.raw_decode(self.texto, self.pos)
+            except json.JSONDecodeError:
+                if not self.carregar():
+                    raise
+                continue
+            # Um número pode ter sido cortado no limite do chunk: só aceita o
+            # valor quando o próximo caractere relevante já está no buffer
+            seguinte = fim
+            while seguinte < len(self.texto) and self.texto[seguinte] in _ESPACOS:
+                seguinte += 1
+            incompleto = seguinte == len(self.texto) or self.texto[seguinte] in _CONTINUA_NUMERO
+            if incompleto and not self.fim and self.carregar():
+                continue
+            self.pos = fim
+            return valor
+
+
+def _iter_array(buf: _Buffer):
+    buf.esperar("[")
+    if buf.proximo_char() == "]":
+        buf.pos += 1
+        return
+    while True:
+        yield buf.decodificar()
+        char = buf.proximo_char()
+        buf.pos += 1
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"JSON inválido: esperado ',' ou ']' na posição {buf.pos - 1}")
+
+
+def iter_registros(chunks, chave: str = "dados"):
+    """
+    Gera os registros de um JSON no formato {"dados": [...]} ou [...],
+    consumindo os chunks de bytes sob demanda (ex.: response.iter_content).
+    """
+    buf = _Buffer(chunks)
+    char = buf.proximo_char()
+
+    if char == "[":
+        yield from _iter_array(buf)
+        return
+
+    if char != "{":
+        if char:
+            raise ValueError(f"JSON inválido: início inesperado '{char}'")
+        return
+
+    # Percorre as chaves do objeto até achar o array de interesse
+    buf.esperar("{")
+    if buf.proximo_char() == "}":
+        return
+    while True:
+        nome = buf.decodificar()
+        buf.esperar(":")
+        if nome == chave and buf.proximo_char() == "[":
+            yield from _iter_array(buf)
+            return
+        buf.decodificar()
+        char = buf.proximo_char()
+        buf.pos += 1
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError(f"JSON inválido: esperado ',' ou '}}' na posição {buf.pos - 1}")
+
+
+def iter_lotes(registros, tamanho: int):
+    """Agrupa um iterável de registros em listas de até `tamanho` itens"""
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
@@ -0,0 +1,49 @@
+-- Migração única: raw_despesas_pagas passa de "tudo STRING" (carga antiga com
+-- astype(str) + autodetect) para o schema tipado da ingestão
+-- (scripts/ingestao/schemas.py::DESPESAS_PAGAS).
+--
+-- Executar uma vez no BigQuery antes da primeira ingestão com schema fixo:
+--   bq query --use_legacy_sql=false < scripts/migracoes/001_raw_despesas_pagas_tipada.sql
+
+create or replace table `monitorpublico.despesas_queimados.raw_despesas_pagas` as
+select
+    safe_cast(codigo_interno as int64) as codigo_interno,
+    cast(EMP_PROCESSO_COMPLETO as string) as EMP_PROCESSO_COMPLETO,
+    cast(empenho as string) as empenho,
+    cast(OP as string) as OP,
+    cast(NR_OP as string) as NR_OP,
+    cast(Codigo_Liquidacao as string) as Codigo_Liquidacao,
+    cast(Despesa as string) as Despesa,
+    cast(CPF_CNPJ_FORMATADA as string) as CPF_CNPJ_FORMATADA,
+    cast(descricao_favorecido as string) as descricao_favorecido,
+    cast(dotacao as string) as dotacao,
+    cast(unidade_orcamentaria as string) as unidade_orcamentaria,
+    cast(natureza_despeza as string) as natureza_despeza,
+    cast(fonte as string) as fonte,
+    cast(funcao as string) as funcao,
+    cast(subfuncao as string) as subfuncao,
+    cast(orgao as string) as orgao,
+    cast(secretaria as string) as secretaria,
+    cast(acao as string) as acao,
+    cast(programa as string) as programa,
+    cast(catagoria_economica as string) as catagoria_economica,
+    cast(catagoria_descricao as string) as catagoria_descricao,
+    cast(grupo_despesa as string) as grupo_despesa,
+    cast(grupo_descricao as string) as grupo_descricao,
+    cast(elemento_despesa as string) as elemento_despesa,
+    cast(desspesas_descricao as string) as desspesas_descricao,
+    cast(modalidade_licitacao as string) as modalidade_licitacao,
+    cast(numero_licitacao as string) as numero_licitacao,
+    cast(Tipo as string) as Tipo,
+    cast(descricao_despesa as string) as descricao_despesa,
+    safe_cast(replace(replace(valor_despesa, '.', ''), ',', '.') as numeric) as valor_despesa,
+    safe_cast(replace(replace(valor_despesa_total, '.', ''), ',', '.') as numeric) as valor_despesa_total,
+    safe_cast(replace(replace(Valor_Estornado, '.', ''), ',', '.') as numeric) as Valor_Estornado,
+    safe_cast(replace(replace(RETIDO, '.', ''), ',', '.') as numeric) as RETIDO,
+    safe_cast(replace(replace(Estorno_do_Pagamento, '.', ''), ',', '.') as numeric) as Estorno_do_Pagamento,
+    safe.parse_date('%Y-%m-%d', substr(data_despesa, 1, 10)) as data_despesa,
+    safe.parse_date('%Y-%m-%d', substr(data_liquidacao, 1, 10)) as data_liquidacao,
+    safe_cast(exercicio as int64) as exercicio,
+    safe_cast(ano_api as int64) as ano_api,
+    cast(URL as string) as URL
+from `monitorpublico.despesas_queimados.raw_despesas_pagas`;
@@ -0,0 +1,13 @@
+-- Colunas de controle da ingestão (scripts/ingestao/schemas.py::COLUNAS_CONTROLE):
+-- hash de conteúdo para detectar correções publicadas sob o mesmo
+-- codigo_interno, flag de registro alterado e instante da ingestão.
+--
+-- Registros antigos ficam com hash_conteudo NULL: a ingestão adota o
+-- primeiro hash que vir para eles sem tratá-los como alterados.
+--
+--   bq query --use_legacy_sql=false < scripts/migracoes/002_raw_despesas_pagas_colunas_controle.sql
+
+alter table `monitorpublico.despesas_queimados.raw_despesas_pagas`
+    add column if not exists hash_conteudo int64,
+    add column if not exists registro_alterado bool,
+    add column if not exists ingerido_em timestamp;
@@ -0,0 +1,11 @@
+-- Id determinístico do lote de ingestão (scripts/ingestao/schemas.py::COLUNAS_CONTROLE):
+-- fonte, ano, hash do payload, execução e número do lote. Permite retomar
+-- uma execução interrompida sem duplicar lotes e identificar o que cada
+-- execução gravou.
+--
+-- Registros anteriores ficam com lote_id NULL.
+--
+--   bq query --use_legacy_sql=false < scripts/migracoes/003_raw_despesas_pagas_lote_id.sql
+
+alter table `monitorpublico.despesas_queimados.raw_despesas_pagas`
+    add column if not exists lote_id string;
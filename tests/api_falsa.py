@@ -0,0 +1,105 @@
+"""
+Servidor HTTP local que imita a API apidados.rule, para os testes.
+
+A API pagina por exercício: cada ano é uma requisição, respondida em
+chunks (Transfer-Encoding: chunked) e com gzip, como a de produção, com
+ETag por ano e 304 para If-None-Match igual. Falhas (5xx, conexão
+derrubada, corte no meio do corpo) são configuradas por ano.
+"""
+
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+
+def registros(ano: int, quantidade: int) -> list:
+    return [
+        {
+            "codigo_interno": ano * 1000 + i,
+            "secretaria": "SECRETARIA MUNICIPAL DE SAÚDE",
+            "valor_despesa": f"1.{i:03d},5{i % 10}",
+            "data_despesa": f"{ano}-03-{i % 28 + 1:02d} 00:00:00.0",
+        }
+        for i in range(quantidade)
+    ]
+
+
+class ApiFalsa(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Configurados pela fixture: ano -> registros, e falhas a simular por ano
+    dados = {}
+    falhas = {}
+    requisicoes = []
+    tamanho_chunk = 7
+    # False: servidor sem ETag, que ignora requisições condicionais
+    etag = True
+    # Anos respondidos com 304
+    nao_modificados = []
+    # Segundos que cada resposta demora e pico de requisições simultâneas
+    atraso = 0.0
+    ativas = 0
+    pico = 0
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        with ApiFalsa._lock:
+            ApiFalsa.ativas += 1
+            ApiFalsa.pico = max(ApiFalsa.pico, ApiFalsa.ativas)
+        try:
+            # Event.wait e não time.sleep, que a fixture desliga
+            threading.Event().wait(ApiFalsa.atraso)
+            self._responder()
+        finally:
+            with ApiFalsa._lock:
+                ApiFalsa.ativas -= 1
+
+    def _responder(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        ano = int(params["ano"])
+        ApiFalsa.requisicoes.append((ano, self.client_address[1], params))
+
+        falhas = ApiFalsa.falhas.get(ano, [])
+        falha = falhas.pop(0) if falhas else None
+        if falha == "reset":
+            # Fecha a conexão sem resposta
+            self.close_connection = True
+            return
+        if falha not in (None, "corte"):
+            corpo = b"erro"
+            self.send_response(falha)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+            return
+
+        etag = f'"{ano}"'
+        if ApiFalsa.etag and self.headers.get("If-None-Match") == etag:
+            ApiFalsa.nao_modificados.append(ano)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        corpo = gzip.compress(json.dumps({"dados": ApiFalsa.dados[ano]}, ensure_ascii=False).encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Transfer-Encoding", "chunked")
+        if ApiFalsa.etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        # "corte": a conexão cai no meio do corpo, depois de metade dos chunks
+        fim = len(corpo) // 2 if falha == "corte" else len(corpo)
+        for inicio in range(0, fim, ApiFalsa.tamanho_chunk):
+            parte = corpo[inicio:inicio + ApiFalsa.tamanho_chunk]
+            self.wfile.write(f"{len(parte):x}\r\n".encode() + parte + b"\r\n")
+        if falha == "corte":
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
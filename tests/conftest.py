@@ -0,0 +1,29 @@
+"""Fixtures compartilhadas entre os testes"""
+
+import threading
+from dataclasses import replace
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from api_falsa import ApiFalsa, registros
+from ingestao import cliente_http
+from ingestao.fontes import FONTES
+
+
+@pytest.fixture
+def api(monkeypatch):
+    ApiFalsa.dados = {2024: registros(2024, 23), 2025: registros(2025, 11), 2026: []}
+    ApiFalsa.falhas = {}
+    ApiFalsa.etag = True
+    ApiFalsa.nao_modificados = []
+    ApiFalsa.requisicoes = []
+    ApiFalsa.atraso, ApiFalsa.ativas, ApiFalsa.pico = 0.0, 0, 0
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ApiFalsa)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    # Retentativas sem espera
+    monkeypatch.setattr(cliente_http.time, "sleep", lambda s: None)
+    yield replace(FONTES["queimados_despesas_pagas"], url=f"http://127.0.0.1:{servidor.server_port}/apidados.rule")
+    servidor.shutdown()
+    servidor.server_close()
@@ -0,0 +1,100 @@
+"""Limites do agendador (ingestao/agendador.py): concorrência global, por host e ritmo"""
+
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from api_falsa import ApiFalsa
+from ingestao.agendador import Limitador, executar_fontes
+from ingestao.cache_respostas import CacheRespostas
+from ingestao.pipeline import download_years
+
+
+def simultaneas(limitador, hosts, duracao=0.05):
+    """Uma thread por requisição; devolve o pico total e o pico por host"""
+    ativas, pico, pico_host = Counter(), [0], Counter()
+    lock = threading.Lock()
+
+    def requisitar(host):
+        with limitador.requisicao(host):
+            with lock:
+                ativas[host] += 1
+                pico[0] = max(pico[0], sum(ativas.values()))
+                pico_host[host] = max(pico_host[host], ativas[host])
+            time.sleep(duracao)
+            with lock:
+                ativas[host] -= 1
+
+    threads = [threading.Thread(target=requisitar, args=(host,)) for host in hosts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return pico[0], dict(pico_host)
+
+
+def test_limite_global_vale_entre_hosts():
+    limitador = Limitador(max_global=2, max_por_host=5)
+    pico, _ = simultaneas(limitador, [f"host{i}" for i in range(6)])
+    assert pico == 2
+
+
+def test_limite_por_host_nao_trava_outros_hosts():
+    limitador = Limitador(max_global=10, max_por_host=2)
+    pico, pico_host = simultaneas(limitador, ["a"] * 5 + ["b"] * 5)
+    assert pico_host == {"a": 2, "b": 2}
+    assert pico == 4
+
+
+def test_intervalo_minimo_entre_inicios_no_mesmo_host():
+    limitador = Limitador(max_global=4, max_por_host=4, intervalo_por_host=0.05)
+    inicios = {"a": [], "b": []}
+
+    def requisitar(host):
+        with limitador.requisicao(host):
+            inicios[host].append(time.monotonic())
+
+    comeco = time.monotonic()
+    threads = [threading.Thread(target=requisitar, args=(host,)) for host in ["a"] * 4 + ["b"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    a = sorted(inicios["a"])
+    # Pequena folga para a resolução do relógio
+    assert all(depois - antes >= 0.049 for antes, depois in zip(a, a[1:]))
+    # O ritmo é por host: "b" não espera a fila de "a"
+    assert inicios["b"][0] - comeco < 0.05
+
+
+def test_download_respeita_o_limite_por_host(api, tmp_path):
+    ApiFalsa.atraso = 0.05
+    cache = CacheRespostas(str(tmp_path / "cache.json"))
+    downloads, _ = download_years(api, [2024, 2025, 2026], cache, max_workers=3,
+                                  limitador=Limitador(max_global=3, max_por_host=1))
+    for download in downloads:
+        download.arquivo.close()
+    assert ApiFalsa.pico == 1
+
+    # Sem o limite por host, os três anos vão juntos
+    ApiFalsa.pico = 0
+    downloads, _ = download_years(api, [2024, 2025, 2026], cache, max_workers=3, force=True,
+                                  limitador=Limitador(max_global=3, max_por_host=3))
+    for download in downloads:
+        download.arquivo.close()
+    assert ApiFalsa.pico == 3
+
+
+def test_falha_de_uma_fonte_nao_interrompe_as_demais():
+    def executar(fonte):
+        if fonte.nome == "ruim":
+            raise ValueError("API fora do ar")
+        return {"inseridos": 1}
+
+    fontes = [SimpleNamespace(nome=nome) for nome in ("a", "ruim", "b")]
+    resultados = executar_fontes(fontes, executar, max_fontes=2)
+    assert sorted(nome for nome, r in resultados.items() if r.sucesso) == ["a", "b"]
+    assert resultados["ruim"].erro == "ValueError: API fora do ar"
+    assert resultados["a"].detalhes == {"inseridos": 1}
@@ -0,0 +1,98 @@
+"""Busca na API contra um servidor HTTP local (api_falsa.py, fixture api)"""
+
+import json
+import os
+
+import pytest
+import requests
+
+from api_falsa import ApiFalsa, registros
+from ingestao import cliente_http
+from ingestao.cache_respostas import CacheRespostas
+from ingestao.checkpoint import Checkpoint
+from ingestao.pipeline import download_years, fetch_from_api, read_batches
+from ingestao.streaming import iter_registros
+
+
+def test_iter_registros_com_chunks_de_um_byte():
+    dados = registros(2024, 5) + [{"descricao": "Ação \"educação\" \\ 1,5e3", "valor": -12.5e-1}]
+    texto = json.dumps({"total": 6, "dados": dados, "fim": True}, ensure_ascii=False).encode()
+    chunks = (texto[i:i + 1] for i in range(len(texto)))
+    assert list(iter_registros(chunks)) == dados
+
+
+def test_busca_todos_os_anos_em_lotes(api, tmp_path):
+    cache = CacheRespostas(str(tmp_path / "cache.json"))
+    downloads, inalterados = download_years(api, [2024, 2025, 2026], cache, max_workers=2)
+    assert inalterados == []
+    assert sorted(d.ano for d in downloads) == [2024, 2025, 2026]
+
+    for download in downloads:
+        lotes = list(read_batches(api, download, batch_size=5))
+        esperados = ApiFalsa.dados[download.ano]
+        assert [n for n, _ in lotes] == list(range(-(-len(esperados) // 5)))
+        ids = [i for _, tabela in lotes for i in tabela["codigo_interno"].to_pylist()]
+        assert ids == [r["codigo_interno"] for r in esperados]
+        assert all(t["ano_api"].to_pylist() == [download.ano] * t.num_rows for _, t in lotes)
+        assert len({t["lote_id"][0].as_py() for _, t in lotes}) == len(lotes)
+        assert download.etag == f'"{download.ano}"'
+        download.arquivo.close()
+
+    assert sorted(int(p["ano"]) for _, _, p in ApiFalsa.requisicoes) == [2024, 2025, 2026]
+    assert all(p["api"] == "despesas_pagas" for _, _, p in ApiFalsa.requisicoes)
+    # Session compartilhada: no máximo uma conexão por worker
+    assert len({porta for _, porta, _ in ApiFalsa.requisicoes}) <= 2
+
+
+def test_retentativa_em_5xx_e_conexao_perdida(api):
+    ApiFalsa.falhas = {2024: [503, "reset", 502]}
+    download = fetch_from_api(api, 2024)
+    lotes = list(read_batches(api, download, batch_size=100))
+    download.arquivo.close()
+
+    assert [ano for ano, _, _ in ApiFalsa.requisicoes] == [2024] * 4
+    assert lotes[0][1].num_rows == 23
+
+
+def test_desiste_depois_das_tentativas(api):
+    ApiFalsa.falhas = {2024: [503] * cliente_http.MAX_TENTATIVAS}
+    with pytest.raises(requests.HTTPError):
+        fetch_from_api(api, 2024)
+    assert len(ApiFalsa.requisicoes) == cliente_http.MAX_TENTATIVAS
+
+
+def test_erro_4xx_nao_e_repetido(api):
+    ApiFalsa.falhas = {2024: [404]}
+    with pytest.raises(requests.HTTPError):
+        fetch_from_api(api, 2024)
+    assert len(ApiFalsa.requisicoes) == 1
+
+
+def test_conexao_cortada_no_meio_do_corpo_repete_o_download(api):
+    ApiFalsa.falhas = {2024: ["corte", "corte"]}
+    download = fetch_from_api(api, 2024)
+    lotes = list(read_batches(api, download, batch_size=100))
+    download.arquivo.close()
+
+    assert len(ApiFalsa.requisicoes) == 3
+    assert lotes[0][1]["codigo_interno"].to_pylist() == [r["codigo_interno"] for r in ApiFalsa.dados[2024]]
+
+
+def test_corte_no_meio_do_corpo_nao_deixa_payload_parcial(api, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path))
+    payload = checkpoint.caminho_payload(api.nome, 2024)
+
+    ApiFalsa.falhas = {2024: ["corte"] * cliente_http.MAX_TENTATIVAS}
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        fetch_from_api(api, 2024, checkpoint=checkpoint)
+    assert len(ApiFalsa.requisicoes) == cliente_http.MAX_TENTATIVAS
+    assert not os.path.exists(f"{payload}.part")
+    assert not checkpoint.pendente(api.nome, 2024)
+
+    # Corte e depois sucesso: o payload do checkpoint é só o da resposta completa
+    ApiFalsa.falhas = {2024: ["corte"]}
+    download = fetch_from_api(api, 2024, checkpoint=checkpoint)
+    download.arquivo.close()
+    assert not os.path.exists(f"{payload}.part")
+    with open(payload, "rb") as f:
+        assert json.load(f) == {"dados": ApiFalsa.dados[2024]}
@@ -0,0 +1,82 @@
+"""Cache LRU dos resultados do update_dashboard (dashboard/cache.py)"""
+
+import threading
+
+from cache import CacheResultados, normalizar
+
+
+def test_selecao_em_outra_ordem_tem_a_mesma_chave():
+    assert normalizar([2025, 2024, 2025], None, ["SAUDE"]) == normalizar([2024, 2025], [], ["SAUDE"])
+    assert normalizar(None, []) == ((), ())
+    # A posição do dropdown faz parte da chave
+    assert normalizar(["X"], []) != normalizar([], ["X"])
+
+
+def test_despeja_o_menos_usado():
+    cache = CacheResultados(maximo=3)
+    calculos = []
+
+    def obter(chave):
+        return cache.obter(chave, lambda: calculos.append(chave) or f"resultado {chave}")
+
+    for chave in "abc":
+        obter(chave)
+    # "a" usado de novo: o menos recente passa a ser "b"
+    assert obter("a") == "resultado a"
+    obter("d")
+    assert cache.estado()["entradas"] == 3
+
+    calculos.clear()
+    for chave in "acd":
+        obter(chave)
+    assert calculos == []
+    obter("b")
+    assert calculos == ["b"]
+    # "b" voltou e despejou o menos recente, "a"
+    obter("a")
+    assert calculos == ["b", "a"]
+
+
+def test_conta_acertos_e_faltas():
+    cache = CacheResultados(maximo=2)
+    assert cache.estado()["taxa_acerto"] is None
+    cache.obter("a", lambda: 1)
+    cache.obter("a", lambda: 2)
+    cache.obter("b", lambda: 3)
+    cache.obter("a", lambda: 4)
+    assert cache.estado() == {"entradas": 2, "maximo": 2, "acertos": 2, "faltas": 2, "taxa_acerto": 0.5}
+
+    # Aquecimento não conta, mas entra na ordem de uso
+    cache.guardar("c", 5)
+    assert (cache.acertos, cache.faltas) == (2, 2)
+    assert cache.obter("c", lambda: 6) == 5
+    assert cache.obter("b", lambda: 7) == 7
+
+    cache.limpar()
+    assert cache.estado()["entradas"] == 0
+    assert cache.obter("a", lambda: 8) == 8
+
+
+def test_nova_versao_do_snapshot_nao_reaproveita_resultado():
+    cache = CacheResultados()
+    selecao = normalizar([2025], ["SAUDE"], [], [])
+    assert cache.obter((1,) + selecao, lambda: "v1") == "v1"
+    assert cache.obter((2,) + selecao, lambda: "v2") == "v2"
+    assert cache.obter((1,) + selecao, lambda: "outro") == "v1"
+
+
+def test_limite_vale_com_varias_threads():
+    cache = CacheResultados(maximo=8)
+
+    def consultar(inicio):
+        for i in range(200):
+            chave = (inicio + i) % 20
+            assert cache.obter(chave, lambda: chave * 10) == chave * 10
+
+    threads = [threading.Thread(target=consultar, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.estado()["entradas"] == 8
+    assert cache.acertos + cache.faltas == 1200
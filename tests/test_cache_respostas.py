@@ -0,0 +1,77 @@
+"""Cache de respostas por (api, ano) contra a API local (ingestao/cache_respostas.py)"""
+
+from datetime import datetime, timezone
+
+from api_falsa import ApiFalsa, registros
+from ingestao.cache_respostas import CacheRespostas
+from ingestao.indice_ids import IndiceIds
+from ingestao.pipeline import download_years, process_years
+from ingestao.sinks import Sink
+
+INGERIDO_EM = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+
+
+class SinkMemoria(Sink):
+    def __init__(self):
+        self.gravados = 0
+
+    def escrever(self, tabela, lote_id=None):
+        self.gravados += tabela.num_rows
+        return tabela.num_rows
+
+
+def executar(api, caminho, indice, anos=(2024, 2025), force=False):
+    """Uma execução do job: baixa, carrega e atualiza o cache (relido do disco)"""
+    cache = CacheRespostas(str(caminho))
+    downloads, inalterados = download_years(api, list(anos), cache, force=force)
+    sink = SinkMemoria()
+    list(process_years(api, sink, downloads, indice, cache, ingerido_em=INGERIDO_EM))
+    return sorted(d.ano for d in downloads), sorted(inalterados), cache, sink
+
+
+def test_304_pula_o_ano_sem_parse(api, tmp_path):
+    indice = IndiceIds(str(tmp_path / "indice"))
+    baixados, _, cache, sink = executar(api, tmp_path / "cache.json", indice)
+    assert baixados == [2024, 2025] and sink.gravados == 34
+    assert cache.obter(api.nome, 2024)["etag"] == '"2024"'
+
+    ApiFalsa.requisicoes = []
+    baixados, inalterados, cache, sink = executar(api, tmp_path / "cache.json", indice)
+    assert (baixados, inalterados) == ([], [2024, 2025])
+    assert (cache.hits, cache.misses) == (2, 0)
+    assert sink.gravados == 0
+    # Requisições condicionais respondidas com 304; o ano fica marcado como verificado
+    assert len(ApiFalsa.requisicoes) == 2
+    assert sorted(ApiFalsa.nao_modificados) == [2024, 2025]
+    assert cache.verificado_em(api.nome, 2024) >= datetime.fromisoformat(cache.obter(api.nome, 2024)["atualizado_em"])
+
+
+def test_mesmo_sha256_pula_o_ano_sem_etag(api, tmp_path):
+    ApiFalsa.etag = False
+    indice = IndiceIds(str(tmp_path / "indice"))
+    executar(api, tmp_path / "cache.json", indice)
+
+    baixados, inalterados, cache, _ = executar(api, tmp_path / "cache.json", indice)
+    assert (baixados, inalterados) == ([], [2024, 2025])
+    assert cache.obter(api.nome, 2024)["etag"] is None
+    assert ApiFalsa.nao_modificados == []
+
+    # Conteúdo publicado de novo: só o ano alterado é baixado e carregado
+    ApiFalsa.dados[2025] = registros(2025, 12)
+    baixados, inalterados, cache, sink = executar(api, tmp_path / "cache.json", indice)
+    assert (baixados, inalterados) == ([2025], [2024])
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert sink.gravados == 1
+
+
+def test_force_ignora_o_cache(api, tmp_path):
+    indice = IndiceIds(str(tmp_path / "indice"))
+    executar(api, tmp_path / "cache.json", indice)
+    sha256 = CacheRespostas(str(tmp_path / "cache.json")).obter(api.nome, 2024)["sha256"]
+
+    # Sem cabeçalhos condicionais nem comparação do hash: tudo é baixado de novo
+    baixados, inalterados, cache, _ = executar(api, tmp_path / "cache.json", indice, force=True)
+    assert (baixados, inalterados) == ([2024, 2025], [])
+    assert cache.misses == 2
+    assert ApiFalsa.nao_modificados == []
+    assert cache.obter(api.nome, 2024)["sha256"] == sha256
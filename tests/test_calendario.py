@@ -0,0 +1,74 @@
+"""Anos quentes e frios por execução (ingestao/calendario.py) contra a API local"""
+
+from datetime import datetime, timedelta, timezone
+
+from api_falsa import ApiFalsa
+from ingestao import cache_respostas
+from ingestao.cache_respostas import CacheRespostas
+from ingestao.calendario import planejar_anos
+from ingestao.pipeline import download_years
+
+HOJE = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+def nunca(ano):
+    return None
+
+
+def test_janela_ativa_vem_da_data():
+    plano = planejar_anos(2021, nunca, hoje=HOJE)
+    assert (plano.quentes, plano.frios, plano.adiados) == ([2025, 2026], [2021, 2022, 2023, 2024], [])
+    # Na virada do ano, o novo exercício entra e o mais antigo dos quentes esfria
+    plano = planejar_anos(2021, nunca, hoje=datetime(2027, 1, 1, tzinfo=timezone.utc))
+    assert plano.quentes == [2026, 2027]
+    assert plano.buscar == list(range(2021, 2028))
+
+
+def test_frios_so_com_verificacao_vencida_ou_sob_demanda():
+    verificados = {2021: HOJE - timedelta(days=29), 2022: HOJE - timedelta(days=30), 2023: HOJE}
+    plano = planejar_anos(2021, verificados.get, hoje=HOJE, intervalo_frio_dias=30)
+    assert (plano.frios, plano.adiados) == ([2022, 2024], [2021, 2023])
+
+    plano = planejar_anos(2021, verificados.get, hoje=HOJE, incluir_frios=True)
+    assert (plano.frios, plano.adiados) == ([2021, 2022, 2023, 2024], [])
+
+    # Lista explícita: só esses anos, todos buscados
+    plano = planejar_anos(2021, verificados.get, hoje=HOJE, anos=[2023, 2026, 2023])
+    assert (plano.quentes, plano.frios, plano.adiados) == ([2026], [2023], [])
+
+
+class Relogio(datetime):
+    """datetime com now() controlado pelo teste (verificado_em do cache)"""
+    agora = HOJE
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.agora
+
+
+def test_cadencia_dos_anos_frios(api, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_respostas, "datetime", Relogio)
+    cache = CacheRespostas(str(tmp_path / "cache.json"))
+
+    def executar(dias):
+        """Uma execução do job `dias` depois da primeira; devolve os anos consultados na API"""
+        ApiFalsa.requisicoes, ApiFalsa.nao_modificados = [], []
+        Relogio.agora = HOJE + timedelta(days=dias)
+        plano = planejar_anos(2024, lambda ano: cache.verificado_em(api.nome, ano), hoje=Relogio.agora,
+                              intervalo_frio_dias=30)
+        downloads, _ = download_years(api, plano.buscar, cache)
+        for download in downloads:
+            cache.atualizar(api.nome, download.ano, download.sha256, download.etag)
+            download.arquivo.close()
+        return sorted(int(p["ano"]) for _, _, p in ApiFalsa.requisicoes)
+
+    # 2024 é frio em 2026: consultado na primeira execução e depois só a cada 30 dias,
+    # contados da última consulta (com ou sem alteração)
+    assert executar(0) == [2024, 2025, 2026]
+    assert executar(1) == [2025, 2026]
+    assert executar(29) == [2025, 2026]
+    assert executar(30) == [2024, 2025, 2026]
+    assert sorted(ApiFalsa.nao_modificados) == [2024, 2025, 2026]
+    assert executar(31) == [2025, 2026]
+    assert executar(59) == [2025, 2026]
+    assert executar(60) == [2024, 2025, 2026]
@@ -0,0 +1,139 @@
+"""Carga em segundo plano e snapshot em disco do dashboard (dashboard/dados.py + dashboard/armazem.py)"""
+
+import threading
+import time
+
+import pyarrow as pa
+
+from armazem import ArmazemSnapshot
+from dados import GerenciadorDados
+
+
+def gerenciador(diretorio, esquema, tabelas):
+    """GerenciadorDados com carregadores que contam as consultas ao "BigQuery" """
+    consultas = []
+
+    def carregador(nome):
+        def carregar():
+            consultas.append(nome)
+            return tabelas[nome]
+        return carregar
+
+    def montar(carregadas):
+        # Como o montar_dados do app: falha com KeyError se faltar uma tabela
+        return {nome: carregadas[nome].num_rows for nome in tabelas}
+
+    dados = GerenciadorDados(
+        {nome: carregador(nome) for nome in tabelas},
+        armazem=ArmazemSnapshot(str(diretorio), esquema=esquema),
+        montar=montar,
+    )
+    return dados, consultas
+
+
+TABELAS = {"rollup": pa.table({"x": [1, 2]}), "registros": pa.table({"y": [1, 2, 3]})}
+
+
+def test_versao_valida_em_disco_e_aberta_sem_consultar(tmp_path):
+    primeiro, consultas = gerenciador(tmp_path, "e1", TABELAS)
+    primeiro.carregar()
+    assert len(consultas) == 2
+
+    segundo, consultas = gerenciador(tmp_path, "e1", TABELAS)
+    snapshot = segundo.carregar()
+    assert consultas == []
+    assert snapshot.versao == 1
+    assert dict(snapshot.dados) == {"rollup": 2, "registros": 3}
+
+
+def test_versao_de_outro_esquema_e_recriada(tmp_path):
+    # Gravado por uma versão anterior do código, só com o rollup
+    anterior, _ = gerenciador(tmp_path, None, {"rollup": TABELAS["rollup"]})
+    anterior.carregar()
+    assert "esquema" in ArmazemSnapshot(str(tmp_path)).manifesto()
+
+    atual, consultas = gerenciador(tmp_path, "e2", TABELAS)
+    snapshot = atual.carregar()
+    assert sorted(consultas) == ["registros", "rollup"]
+    assert snapshot.versao == 2
+    assert dict(snapshot.dados) == {"rollup": 2, "registros": 3}
+    assert ArmazemSnapshot(str(tmp_path)).manifesto()["esquema"] == "e2"
+
+
+def test_versao_que_falha_ao_abrir_e_recriada(tmp_path):
+    # Mesmo esquema declarado, mas sem uma das tabelas: KeyError no montar
+    anterior, _ = gerenciador(tmp_path, "e1", {"rollup": TABELAS["rollup"]})
+    anterior.carregar()
+
+    atual, consultas = gerenciador(tmp_path, "e1", TABELAS)
+    snapshot = atual.carregar()
+    assert sorted(consultas) == ["registros", "rollup"]
+    assert snapshot.versao == 2
+    assert dict(snapshot.dados) == {"rollup": 2, "registros": 3}
+    assert atual.ultimo_erro is None
+
+
+def test_arquivo_corrompido_e_recriado(tmp_path):
+    anterior, _ = gerenciador(tmp_path, "e1", TABELAS)
+    anterior.carregar()
+    manifesto = ArmazemSnapshot(str(tmp_path)).manifesto()
+    (tmp_path / manifesto["diretorio"] / "registros.arrow").write_bytes(b"truncado")
+
+    atual, consultas = gerenciador(tmp_path, "e1", TABELAS)
+    assert atual.carregar().versao == 2
+    assert len(consultas) == 2
+
+
+def test_boot_nao_espera_a_primeira_carga():
+    liberar = threading.Event()
+
+    def lento():
+        liberar.wait(5)
+        return pa.table({"x": [1]})
+
+    dados = GerenciadorDados({"rollup": lento}, intervalo_s=60)
+    inicio = time.monotonic()
+    dados.iniciar()
+    assert time.monotonic() - inicio < 1
+    assert not dados.snapshot.pronto and dados.estado()["pronto"] is False
+
+    liberar.set()
+    assert dados.aguardar(5)
+    assert dados.snapshot.versao == 1
+    dados.parar()
+
+
+def test_falha_na_recarga_mantem_o_snapshot_anterior():
+    respostas = [pa.table({"x": [1]}), RuntimeError("BigQuery fora do ar")]
+    publicados, falhou, liberar = threading.Semaphore(0), threading.Event(), threading.Event()
+
+    def carregar():
+        if not respostas:
+            # A carga seguinte só termina depois das verificações
+            liberar.wait(5)
+            return pa.table({"x": [1, 2]})
+        resposta = respostas.pop(0)
+        if isinstance(resposta, Exception):
+            falhou.set()
+            raise resposta
+        return resposta
+
+    dados = GerenciadorDados({"rollup": carregar}, intervalo_s=0.05, retentativa_s=0.05,
+                             ao_atualizar=lambda snapshot: publicados.release())
+    dados.iniciar()
+    assert publicados.acquire(timeout=5)
+    # Um callback que pegou a versão 1 continua com ela, sem ver a troca
+    anterior = dados.snapshot
+
+    assert falhou.wait(5)
+    while dados.ultimo_erro is None:
+        time.sleep(0.01)
+    assert dados.ultimo_erro == "RuntimeError: BigQuery fora do ar"
+    assert dados.snapshot is anterior
+
+    liberar.set()
+    assert publicados.acquire(timeout=5)
+    dados.parar()
+    assert dados.snapshot.versao == 2 and dados.snapshot.dados["rollup"].num_rows == 2
+    assert anterior.versao == 1 and anterior.dados["rollup"].num_rows == 1
+    assert dados.ultimo_erro is None
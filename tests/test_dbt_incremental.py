@@ -0,0 +1,176 @@
+"""
+Incremental x full refresh do projeto dbt no DuckDB (profiles/duckdb).
+
+Uma carga completa, um lote com correções que esvaziam meses inteiros
+(inclusive o grupo sem data_despesa) e registros novos sem data, e uma
+repetição sem dados novos. As tabelas incrementais precisam ficar iguais
+a um full refresh sobre o mesmo bruto.
+"""
+
+import re
+import shutil
+import subprocess
+from datetime import timedelta
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pytest
+
+pytest.importorskip("dbt.adapters.duckdb")
+if shutil.which("dbt") is None:
+    pytest.skip("dbt não está no PATH", allow_module_level=True)
+
+from bench_ingestao import registro  # noqa: E402
+from dbt_local import INICIO, carregar_raw, dbt, dbt_run, gerar_raw  # noqa: E402
+from ingestao.schemas import DESPESAS_PAGAS, com_controle, construir_tabela, hash_conteudo  # noqa: E402
+
+
+STAGING = "local_staging_queimados.despesas_pagas"
+GASTOS = "local_marts_queimados.gastos_por_secretaria"
+TABELAS = {
+    "local_intermediate_queimados.despesas_pagas_incremental": "*",
+    GASTOS: "* exclude (ultima_ingestao)",
+    "local_marts_queimados.rollup_mensal": "*",
+}
+
+
+def lote(registros, ingerido_em, alterados, lote_id) -> pa.Table:
+    tabela = construir_tabela(registros, DESPESAS_PAGAS)
+    marcados = np.array([i in alterados for i in range(len(registros))], dtype=bool)
+    return com_controle(tabela, hash_conteudo(tabela), marcados, ingerido_em, lote_id=lote_id)
+
+
+def com_data(i, ano, data):
+    r = registro(i, ano)
+    r["data_despesa"] = data
+    return r
+
+
+def lotes():
+    # Sozinho em jun/2023 e sozinho no grupo sem data: as correções esvaziam os dois
+    isolado = com_data(900, 2024, "2023-06-15 00:00:00.0")
+    sem_data = com_data(901, 2024, None)
+    base = pa.concat_tables([
+        gerar_raw(300),
+        lote([isolado, sem_data], INICIO, set(), "base-extra"),
+    ])
+
+    corrigidos = [
+        {**isolado, "data_despesa": "2024-05-10 00:00:00.0", "valor_despesa": "10,00"},
+        {**sem_data, "data_despesa": "2024-07-01 00:00:00.0"},
+        # Registro com data que perde a data, e registro novo sem data
+        com_data(5, 2025, None),
+        com_data(902, 2025, None),
+    ]
+    T1 = INICIO + timedelta(days=1)
+    delta = pa.concat_tables([
+        lote(corrigidos, T1, {0, 1, 2}, "delta-00000"),
+        gerar_raw(20, inicio=300, ingerido_em=T1, alterados=10, lote="delta-00001"),
+    ])
+    return base, delta
+
+
+def ler(diretorio, tabela, colunas):
+    con = duckdb.connect(str(diretorio / "bench.duckdb"), read_only=True)
+    try:
+        return sorted(map(str, con.execute(f"select {colunas} from {tabela}").fetchall()))
+    finally:
+        con.close()
+
+
+def executar(diretorio, sql):
+    con = duckdb.connect(str(diretorio / "bench.duckdb"))
+    try:
+        con.execute(sql)
+    finally:
+        con.close()
+
+
+def test_incremental_igual_ao_full_refresh(tmp_path):
+    incremental, completo = tmp_path / "incremental", tmp_path / "completo"
+    incremental.mkdir()
+    completo.mkdir()
+    base, delta = lotes()
+
+    carregar_raw(str(incremental), base, substituir=True)
+    dbt_run(str(incremental), "--full-refresh")
+    carregar_raw(str(incremental), delta, substituir=False)
+    dbt_run(str(incremental))
+    # Repetição sem dados novos relê a janela de ingestão: nada pode mudar
+    dbt_run(str(incremental))
+
+    carregar_raw(str(completo), pa.concat_tables([base, delta]), substituir=True)
+    dbt_run(str(completo), "--full-refresh")
+
+    for tabela, colunas in TABELAS.items():
+        esperado = ler(completo, tabela, colunas)
+        assert ler(incremental, tabela, colunas) == esperado, tabela
+
+    meses = ler(incremental, "local_marts_queimados.rollup_mensal", "distinct ano_mes")
+    assert "('2023-06',)" not in meses
+    assert "(None,)" in meses
+
+
+@pytest.mark.parametrize("tabela, colunas", [
+    # Staging como era antes da marca d'água
+    (STAGING, "ingerido_em, lote_id"),
+    # Intermediário como era antes do MERGE por partições tocadas
+    ("local_intermediate_queimados.despesas_pagas_incremental", "ingerido_em, registro_alterado, lote_id"),
+    # Mart como era antes da partição mensal
+    (GASTOS, "ultima_ingestao"),
+])
+def test_tabela_anterior_sem_colunas_de_controle_e_recriada(tmp_path, tabela, colunas):
+    base, delta = lotes()
+    carregar_raw(str(tmp_path), base, substituir=True)
+    dbt_run(str(tmp_path), "--full-refresh")
+    executar(tmp_path, f"create or replace table {tabela} as select * exclude ({colunas}) from {tabela}")
+    carregar_raw(str(tmp_path), delta, substituir=False)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        dbt_run(str(tmp_path))
+
+    dbt(str(tmp_path), "run-operation", "migrar_incrementais")
+    dbt_run(str(tmp_path))
+    # Tabelas já no formato: a migração não apaga nada
+    dbt(str(tmp_path), "run-operation", "migrar_incrementais")
+    dbt_run(str(tmp_path))
+
+    assert len(ler(tmp_path, STAGING, "*")) == base.num_rows + delta.num_rows
+    completo = tmp_path / "completo"
+    completo.mkdir()
+    carregar_raw(str(completo), pa.concat_tables([base, delta]), substituir=True)
+    dbt_run(str(completo), "--full-refresh")
+    for tabela, colunas in TABELAS.items():
+        assert ler(tmp_path, tabela, colunas) == ler(completo, tabela, colunas), tabela
+
+
+def test_so_registros_sem_ingerido_em_nao_sao_relidos(tmp_path):
+    # Registros anteriores às colunas de controle: ingerido_em e lote_id nulos
+    legado = gerar_raw(50)
+    legado = legado.set_column(
+        legado.schema.get_field_index("ingerido_em"), "ingerido_em",
+        pa.nulls(legado.num_rows, legado.schema.field("ingerido_em").type),
+    ).set_column(
+        legado.schema.get_field_index("lote_id"), "lote_id",
+        pa.nulls(legado.num_rows, pa.string()),
+    )
+    carregar_raw(str(tmp_path), legado, substituir=True)
+    dbt_run(str(tmp_path), "--full-refresh")
+    dbt_run(str(tmp_path))
+    dbt_run(str(tmp_path))
+    assert len(ler(tmp_path, STAGING, "*")) == legado.num_rows
+
+
+def test_pre_hook_sem_meses_nao_apaga(tmp_path):
+    # Primeira execução sem a tabela (o pre_hook não roda) e uma incremental
+    # sobre a tabela vazia: nenhum mês a recalcular, nenhum DELETE
+    carregar_raw(str(tmp_path), gerar_raw(0), substituir=True)
+    dbt_run(str(tmp_path))
+    dbt_run(str(tmp_path))
+    assert ler(tmp_path, GASTOS, "*") == []
+
+    log = (tmp_path / "logs" / "dbt.log").read_text(encoding="utf-8")
+    # meses_tocados roda no pre_hook e no modelo, só na execução incremental
+    assert re.findall(r'gastos_por_secretaria"?: (\d+) meses a recalcular', log) == ["0", "0"]
+    assert not re.search(r"delete from \S*gastos_por_secretaria\S* where \(\(?data_despesa", log)
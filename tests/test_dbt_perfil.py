@@ -0,0 +1,53 @@
+"""Trava de regressão do scripts/dbt_perfil.py sobre os run_results de benchmarks/fixtures/dbt"""
+
+import os
+import subprocess
+import sys
+
+from dbt_perfil import ler_run_results
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPT = os.path.join(RAIZ, "scripts", "dbt_perfil.py")
+BASE = os.path.join(RAIZ, "benchmarks", "fixtures", "dbt", "run_results_base.json")
+REGRESSAO = os.path.join(RAIZ, "benchmarks", "fixtures", "dbt", "run_results_regressao.json")
+
+
+def perfil(run_results, historico, *extra) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, SCRIPT, "--run-results", run_results, "--historico", str(historico), *extra],
+        capture_output=True, text=True,
+    )
+
+
+def linhas(historico) -> int:
+    with open(historico, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def test_base_passa_e_regressao_falha(tmp_path):
+    historico = tmp_path / "historico.jsonl"
+    modelos = len(ler_run_results(BASE))
+
+    # Sem histórico não há referência: passa e grava
+    assert perfil(BASE, historico).returncode == 0
+    assert perfil(BASE, historico).returncode == 0
+    assert linhas(historico) == 2 * modelos
+
+    execucao = perfil(REGRESSAO, historico)
+    assert execucao.returncode == 1, execucao.stdout
+    assert "regressão" in execucao.stdout
+    # A execução com regressão também entra no histórico
+    assert linhas(historico) == 3 * modelos
+
+
+def test_opcoes_sem_gravar_e_apenas_registrar(tmp_path):
+    historico = tmp_path / "historico.jsonl"
+    assert perfil(BASE, historico).returncode == 0
+
+    assert perfil(REGRESSAO, historico, "--sem-gravar").returncode == 1
+    assert linhas(historico) == len(ler_run_results(BASE))
+
+    assert perfil(REGRESSAO, historico, "--apenas-registrar").returncode == 0
+    # Tolerância acima do aumento: não é regressão
+    assert perfil(REGRESSAO, historico, "--sem-gravar", "--tolerancia-bytes", "1000",
+                  "--tolerancia-tempo", "1000").returncode == 0
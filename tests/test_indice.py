@@ -0,0 +1,96 @@
+"""Bitmaps dos filtros do header (dashboard/indice.py) comparados com a máscara do pandas"""
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from indice import IndiceFiltros
+from projecao import FILTROS_ROLLUP, compactar
+
+SECRETARIAS = ["SAUDE", "EDUCACAO", "OBRAS", "FAZENDA", None]
+FONTES = ["PROPRIOS", "FUNDEB", "SUS"]
+
+
+@pytest.fixture(scope="module")
+def rollup():
+    # 1003 linhas: o último byte do bitmap fica incompleto
+    rng = np.random.default_rng(7)
+    linhas = 1003
+    tabela = pa.table({
+        "ano_exercicio": rng.integers(2021, 2027, linhas),
+        "ano_mes": [f"2025-{m:02d}" for m in rng.integers(1, 13, linhas)],
+        "secretaria_padronizada": [SECRETARIAS[i] for i in rng.integers(0, 5, linhas)],
+        "funcao": [f"FUNCAO {i}" for i in rng.integers(0, 9, linhas)],
+        "fonte": [FONTES[i] for i in rng.integers(0, 3, linhas)],
+        "total_despesa": rng.random(linhas),
+    })
+    # Várias chunks, como vem do BigQuery; a fonte fica em texto (sem dicionário)
+    lotes = tabela.to_batches(max_chunksize=100)
+    tabela = compactar(pa.Table.from_batches(lotes))
+    return tabela.set_column(tabela.schema.get_field_index("fonte"), "fonte",
+                             pa.chunked_array([b.column("fonte") for b in lotes]))
+
+
+def esperado(rollup, selecao):
+    df = rollup.to_pandas()
+    mascara = np.ones(len(df), dtype=bool)
+    for filtro, valores in selecao.items():
+        if valores and filtro in FILTROS_ROLLUP:
+            mascara &= df[FILTROS_ROLLUP[filtro]].isin(valores).to_numpy()
+    return mascara
+
+
+SELECOES = [
+    {"ano": [2024]},
+    {"ano": [2021, 2026], "secretaria": ["SAUDE"]},
+    {"secretaria": ["SAUDE", "OBRAS"], "funcao": ["FUNCAO 1", "FUNCAO 8"], "fonte": ["SUS"]},
+    {"ano": [2022, 2023, 2024], "secretaria": ["EDUCACAO"], "funcao": ["FUNCAO 0"], "fonte": ["PROPRIOS", "FUNDEB"]},
+    # Valor inexistente não seleciona nada na dimensão
+    {"secretaria": ["NAO EXISTE"]},
+    {"funcao": ["FUNCAO 3", "NAO EXISTE"], "ano": [2025]},
+    # Dimensão vazia ou desconhecida é ignorada
+    {"ano": [], "secretaria": ["FAZENDA"], "outro": ["x"]},
+]
+
+
+@pytest.mark.parametrize("selecao", SELECOES)
+def test_mascara_igual_a_do_pandas(rollup, selecao):
+    mascara = IndiceFiltros(rollup, FILTROS_ROLLUP).mascara(selecao)
+    assert mascara.dtype == bool and len(mascara) == rollup.num_rows
+    np.testing.assert_array_equal(mascara, esperado(rollup, selecao))
+
+
+def test_selecoes_aleatorias(rollup):
+    indice = IndiceFiltros(rollup, FILTROS_ROLLUP)
+    valores = {
+        "ano": list(range(2020, 2028)),
+        "secretaria": SECRETARIAS[:-1],
+        "funcao": [f"FUNCAO {i}" for i in range(10)],
+        "fonte": FONTES,
+    }
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        selecao = {
+            filtro: [opcoes[i] for i in rng.choice(len(opcoes), size=rng.integers(0, 4), replace=False)]
+            for filtro, opcoes in valores.items()
+        }
+        mascara = indice.mascara(selecao)
+        if not any(selecao.values()):
+            assert mascara is None
+        else:
+            np.testing.assert_array_equal(mascara, esperado(rollup, selecao))
+
+
+def test_sem_filtro_ativo_seleciona_tudo(rollup):
+    indice = IndiceFiltros(rollup, FILTROS_ROLLUP)
+    assert indice.mascara({}) is None
+    assert indice.mascara({"ano": None, "secretaria": []}) is None
+
+
+def test_nulls_nao_entram_em_nenhum_bitmap(rollup):
+    indice = IndiceFiltros(rollup, FILTROS_ROLLUP)
+    secretarias = [s for s in SECRETARIAS if s]
+    mascara = indice.mascara({"secretaria": secretarias})
+    assert (~mascara).sum() == rollup["secretaria_padronizada"].null_count > 0
+    # Bitmaps empacotados: 1 bit por linha por valor
+    assert all(len(b) == (rollup.num_rows + 7) // 8 for b in indice.bitmaps["secretaria"].values())
@@ -0,0 +1,95 @@
+"""MERGE do modo de carga "merge" (ingestao/merge.py) executado no DuckDB"""
+
+import duckdb
+import pytest
+
+from ingestao.merge import montar_contagem_alterados, montar_merge
+
+
+COLUNAS = ["codigo_interno", "valor_despesa", "hash_conteudo", "registro_alterado", "lote_id"]
+
+
+def citar(nome):
+    return f'"{nome}"'
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute("""
+        create table raw (
+            codigo_interno bigint, valor_despesa decimal(38, 9), hash_conteudo bigint,
+            registro_alterado boolean, lote_id varchar
+        )
+    """)
+    con.execute("create table staging as select * from raw limit 0")
+    yield con
+    con.close()
+
+
+def carregar(con, linhas, **opcoes):
+    """Grava o lote no staging e roda o MERGE no raw"""
+    con.execute("delete from staging")
+    con.executemany("insert into staging values (?, ?, ?, ?, ?)", linhas)
+    con.execute(montar_merge("raw", "staging", COLUNAS, citar=citar, **opcoes))
+    return {linha[0]: linha[1:] for linha in con.execute("select * from raw order by 1").fetchall()}
+
+
+def com_hash(con, linhas):
+    return carregar(con, linhas, coluna_hash="hash_conteudo", coluna_alterado="registro_alterado")
+
+
+def test_insere_novos_sem_duplicar_nem_ids_nulos(con):
+    raw = com_hash(con, [
+        (1, 10, 100, False, "l1"),
+        (2, 20, 200, False, "l1"),
+        (2, 20, 200, False, "l1"),
+        (None, 30, 300, False, "l1"),
+    ])
+    assert raw == {1: (10, 100, False, "l1"), 2: (20, 200, False, "l1")}
+
+
+def test_lote_repetido_nao_muda_nada(con):
+    lote = [(1, 10, 100, False, "l1"), (2, 20, 200, False, "l1")]
+    primeiro = com_hash(con, lote)
+    assert com_hash(con, lote) == primeiro
+    assert con.execute("select count(*) from raw").fetchone()[0] == 2
+
+
+def test_atualiza_so_quando_o_hash_muda(con):
+    com_hash(con, [(1, 10, 100, False, "l1"), (2, 20, 200, False, "l1")])
+    raw = com_hash(con, [
+        (1, 15, 150, False, "l2"),   # conteúdo corrigido
+        (2, 20, 200, False, "l2"),   # mesmo conteúdo
+        (3, 30, 300, False, "l2"),   # novo
+    ])
+    assert raw == {
+        1: (15, 150, True, "l2"),
+        2: (20, 200, False, "l1"),
+        3: (30, 300, False, "l2"),
+    }
+
+
+def test_contagem_de_alterados_ignora_hash_adotado(con):
+    com_hash(con, [(1, 10, 100, False, "l1"), (2, 20, 200, False, "l1")])
+    con.execute("insert into raw values (3, 30, null, null, 'antigo')")
+    com_hash(con, [
+        (1, 15, 150, False, "l2"),   # conteúdo corrigido
+        (2, 20, 200, False, "l2"),   # mesmo conteúdo
+        (3, 30, 300, False, "l2"),   # antigo sem hash: só recebe o hash
+        (4, 40, 400, False, "l2"),   # novo
+    ])
+    alterados = con.execute(montar_contagem_alterados("raw", "staging", citar=citar)).fetchone()[0]
+    assert alterados == 1
+
+
+def test_registro_antigo_sem_hash_so_recebe_o_hash(con):
+    con.execute("insert into raw values (1, 10, null, null, 'antigo')")
+    raw = com_hash(con, [(1, 99, 100, False, "l2")])
+    assert raw == {1: (10, 100, None, "antigo")}
+
+
+def test_sem_coluna_de_hash_so_insere(con):
+    carregar(con, [(1, 10, 100, False, "l1")])
+    raw = carregar(con, [(1, 15, 150, False, "l2"), (2, 20, 200, False, "l2")])
+    assert raw == {1: (10, 100, False, "l1"), 2: (20, 200, False, "l2")}
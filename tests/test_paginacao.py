@@ -0,0 +1,121 @@
+"""
+Paginação da tabela detalhada sobre o snapshot (dashboard/paginacao.py).
+
+Registros com muitos empates de data e valor e alguns sem data, paginados
+como no callback do dashboard e comparados com filtro + ordenação do pandas.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from indice import IndiceFiltros
+from paginacao import (
+    estado_inicial, filtrar_tabela, navegar, ordenar, posicoes, recortar, total_paginas,
+)
+from projecao import FILTROS_REGISTROS, compactar
+
+
+@pytest.fixture(scope="module")
+def registros():
+    ids = np.arange(1, 131)
+    # Poucas datas e valores: muitos empates na chave de ordenação
+    datas = [None if i % 17 == 0 else date(2025, 1, 1) + timedelta(days=int(i % 4)) for i in ids]
+    tabela = pa.table({
+        "codigo_interno": ids,
+        "data_despesa": pa.array(datas, pa.date32()),
+        "ano": np.where(ids % 5 == 0, 2024, 2025),
+        "secretaria": np.where(ids % 3 == 0, "SAUDE", "EDUCACAO"),
+        "favorecido": [f"Fornecedor {i % 7}" for i in ids],
+        "valor_despesa": pa.array([f"{(i % 5) * 10.5:.2f}" for i in ids]).cast(pa.decimal128(38, 9)),
+    })
+    # Embaralhada, como sai do BigQuery sem order by
+    return ordenar(compactar(tabela.take(np.random.default_rng(1).permutation(len(ids)))))
+
+
+def esperado(registros, consulta=None, ordem=None):
+    df = registros.to_pandas(date_as_object=False)
+    if consulta:
+        df = df.query(consulta, engine="python")
+    chaves = ordem or [("data_despesa", False), ("valor_despesa", False), ("codigo_interno", False)]
+    # Ordem padrão como desempate, como na ordenação estável
+    df = df.sort_values(
+        ["data_despesa", "valor_despesa", "codigo_interno"], ascending=False, na_position="last", kind="stable"
+    )
+    df = df.sort_values([c for c, _ in chaves], ascending=[a for _, a in chaves], kind="stable")
+    return df["codigo_interno"].tolist()
+
+
+def percorrer(registros, *mascaras, ordem=None, tamanho=7):
+    """Avança página a página como o callback do dashboard"""
+    selecionadas = posicoes(registros, *mascaras, ordem=ordem)
+    paginas = total_paginas(len(selecionadas), tamanho)
+    estado, acao, vistas = estado_inicial(), None, []
+    while True:
+        estado = navegar(estado, acao, paginas)
+        if vistas and estado["pagina"] == len(vistas) - 1:
+            return vistas, selecionadas
+        vistas.append(recortar(registros, selecionadas, estado["pagina"], tamanho)["codigo_interno"].to_pylist())
+        acao = "proxima"
+
+
+def test_ordem_padrao_com_sem_data_no_fim(registros):
+    ids = registros["codigo_interno"].to_pylist()
+    assert ids == esperado(registros)
+    assert registros["data_despesa"].null_count == 7
+    assert registros["data_despesa"][-7:].null_count == 7
+
+
+def test_paginas_cobrem_tudo_sem_repetir(registros):
+    paginas, selecionadas = percorrer(registros)
+    assert [i for pagina in paginas for i in pagina] == esperado(registros)
+    assert all(len(pagina) == 7 for pagina in paginas[:-1])
+    assert len(paginas) == total_paginas(len(selecionadas), 7) == 19
+
+
+def test_paginas_com_mascara_do_indice(registros):
+    indice = IndiceFiltros(registros, FILTROS_REGISTROS)
+    mascara = indice.mascara({"ano": [2025], "secretaria": ["SAUDE"]})
+    paginas, selecionadas = percorrer(registros, mascara)
+    assert [i for pagina in paginas for i in pagina] == esperado(registros, "ano == 2025 and secretaria == 'SAUDE'")
+    assert len(selecionadas) == 35
+
+
+def test_ordenacao_do_cabecalho_vale_para_todas_as_paginas(registros):
+    ordem = [{"column_id": "secretaria", "direction": "asc"}, {"column_id": "valor_despesa", "direction": "asc"}]
+    paginas, _ = percorrer(registros, ordem=ordem)
+    assert [i for pagina in paginas for i in pagina] == esperado(
+        registros, ordem=[("secretaria", True), ("valor_despesa", True)]
+    )
+
+
+@pytest.mark.parametrize("filter_query, consulta", [
+    ('{favorecido} icontains "FORNECEDOR 3"', "favorecido == 'Fornecedor 3'"),
+    ("{valor_despesa} > 20 && {secretaria} contains saude", "valor_despesa > 20 and secretaria == 'SAUDE'"),
+    ("{ano} = 2024", "ano == 2024"),
+    ("{data_despesa} datestartswith 2025-01-02", "data_despesa.dt.strftime('%Y-%m-%d') == '2025-01-02'"),
+])
+def test_filtro_do_cabecalho(registros, filter_query, consulta):
+    mascara = filtrar_tabela(registros, filter_query)
+    paginas, _ = percorrer(registros, mascara)
+    assert [i for pagina in paginas for i in pagina] == esperado(registros, consulta)
+
+
+def test_filtro_invalido_nao_seleciona_nada(registros):
+    assert filtrar_tabela(registros, "") is None
+    assert not filtrar_tabela(registros, "{nao_existe} contains x").any()
+    assert not filtrar_tabela(registros, "{valor_despesa} > abc").any()
+    assert len(posicoes(registros, np.zeros(registros.num_rows, dtype=bool))) == 0
+
+
+def test_navegacao_fica_nos_limites():
+    assert navegar(None, "proxima", 3) == estado_inicial()
+    assert navegar({"pagina": 2}, None, 3) == estado_inicial()
+    assert navegar({"pagina": 2}, "proxima", 3) == {"pagina": 2}
+    assert navegar({"pagina": 0}, "anterior", 3) == {"pagina": 0}
+    assert navegar({"pagina": 1}, "anterior", 3) == {"pagina": 0}
+    # Recarga com menos registros: a página guardada volta para a última
+    assert navegar({"pagina": 9}, "proxima", 3) == {"pagina": 2}
+    assert total_paginas(0) == 1
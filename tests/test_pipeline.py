@@ -0,0 +1,142 @@
+"""Gravação dos lotes de um ano no sink (ingestao/pipeline.process_year)"""
+
+import io
+import json
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ingestao.checkpoint import Checkpoint
+from ingestao.fontes import FONTES
+from ingestao.indice_ids import IndiceIds
+from ingestao.metricas import Metricas
+from ingestao.pipeline import Download, process_year
+from ingestao.sinks import Gravacao, Sink
+
+FONTE = replace(FONTES["queimados_despesas_pagas"], url="http://localhost/apidados.rule")
+INGERIDO_EM = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+
+
+class SinkJobs(Sink):
+    """Como o append do BigQuery com job id fixo: lote repetido grava 0"""
+
+    def __init__(self):
+        self.lotes = {}
+
+    def escrever(self, tabela, lote_id=None):
+        if lote_id in self.lotes:
+            return 0
+        self.lotes[lote_id] = tabela
+        return tabela.num_rows
+
+
+def download(registros):
+    corpo = json.dumps({"dados": registros}).encode()
+    return Download(ano=2024, arquivo=io.BytesIO(corpo), sha256="ab" * 32)
+
+
+def registros(ids, valor="1,00"):
+    return [{"codigo_interno": i, "valor_despesa": valor, "data_despesa": "2024-03-01"} for i in ids]
+
+
+def test_conta_novos_e_alterados(tmp_path):
+    sink, indice = SinkJobs(), IndiceIds(str(tmp_path))
+    process_year(FONTE, sink, download(registros(range(10))), indice, batch_size=4, ingerido_em=INGERIDO_EM)
+
+    metricas = Metricas()
+    resultado = process_year(
+        FONTE, sink, download(registros(range(5, 15), valor="2,00")[:5] + registros(range(10, 15))),
+        indice, batch_size=4, ingerido_em=datetime(2026, 1, 6, tzinfo=timezone.utc), metricas=metricas,
+    )
+    assert (resultado.encontrados, resultado.inseridos, resultado.alterados) == (10, 5, 5)
+    assert metricas._contadores[FONTE.nome, "registros_gravados"] == 10
+
+
+def test_lote_ja_carregado_nao_conta_como_inserido(tmp_path):
+    sink = SinkJobs()
+    primeira = process_year(FONTE, sink, download(registros(range(10))), IndiceIds(str(tmp_path / "a")),
+                            batch_size=4, ingerido_em=INGERIDO_EM)
+    assert primeira.inseridos == 10
+
+    # Índice perdido: mesmos lotes (mesmo lote_id) reenviados, o sink não grava nada
+    metricas = Metricas()
+    repetida = process_year(FONTE, sink, download(registros(range(10))), IndiceIds(str(tmp_path / "b")),
+                            batch_size=4, ingerido_em=INGERIDO_EM, metricas=metricas)
+    assert (repetida.encontrados, repetida.inseridos, repetida.alterados) == (10, 0, 0)
+    assert metricas._contadores[FONTE.nome, "registros_gravados"] == 0
+    assert len(sink.lotes) == 3
+
+
+class SinkMerge(Sink):
+    """Como o MERGE: o lote inteiro vai ao destino, que separa novos de alterados"""
+    deduplica = True
+
+    def escrever(self, tabela, lote_id=None):
+        return Gravacao(inseridos=tabela.num_rows - 1, alterados=1)
+
+
+def test_sink_que_deduplica_separa_novos_de_alterados():
+    metricas = Metricas()
+    resultado = process_year(FONTE, SinkMerge(), download(registros(range(10))),
+                             batch_size=4, ingerido_em=INGERIDO_EM, metricas=metricas)
+    assert (resultado.encontrados, resultado.inseridos, resultado.alterados) == (10, 7, 3)
+    assert metricas._contadores[FONTE.nome, "registros_gravados"] == 10
+
+
+class Queda(Exception):
+    pass
+
+
+class SinkQueCai(SinkJobs):
+    """Derruba a execução na escrita do lote `cair_em` (antes ou depois de gravá-lo)"""
+
+    def __init__(self, cair_em=None, depois_de_gravar=False):
+        super().__init__()
+        self.cair_em = cair_em
+        self.depois_de_gravar = depois_de_gravar
+        self.escritas = []
+
+    def escrever(self, tabela, lote_id=None):
+        self.escritas.append(lote_id)
+        if len(self.escritas) - 1 == self.cair_em and not self.depois_de_gravar:
+            raise Queda(lote_id)
+        gravados = super().escrever(tabela, lote_id)
+        if len(self.escritas) - 1 == self.cair_em:
+            raise Queda(lote_id)
+        return gravados
+
+
+@pytest.mark.parametrize("depois_de_gravar", [False, True])
+def test_retomada_pula_os_lotes_carregados_sem_duplicar(tmp_path, depois_de_gravar):
+    ids = list(range(22))
+    checkpoint = Checkpoint(str(tmp_path / "checkpoints"))
+    sink = SinkQueCai(cair_em=3, depois_de_gravar=depois_de_gravar)
+    with pytest.raises(Queda):
+        process_year(FONTE, sink, download(registros(ids)), IndiceIds(str(tmp_path / "indice")),
+                     batch_size=5, ingerido_em=INGERIDO_EM, checkpoint=checkpoint)
+    assert checkpoint.obter(FONTE.nome, 2024)["lotes_carregados"] == 3
+    originais = sink.escritas
+
+    # Nova execução: índice e checkpoint relidos do disco, outro instante e
+    # outro batch_size pedido (o do checkpoint prevalece)
+    sink.cair_em, sink.escritas = None, []
+    metricas = Metricas()
+    resultado = process_year(
+        FONTE, sink, download(registros(ids)), IndiceIds(str(tmp_path / "indice")),
+        batch_size=1000, ingerido_em=INGERIDO_EM + timedelta(hours=2), metricas=metricas,
+        checkpoint=Checkpoint(str(tmp_path / "checkpoints")),
+    )
+
+    assert resultado.lotes_pulados == metricas._contadores[FONTE.nome, "lotes_pulados"] == 3
+    # Só os lotes 3 e 4, com os mesmos lote_id da execução original
+    assert len(sink.escritas) == 2 and sink.escritas[0] == originais[3]
+    assert resultado.encontrados == 7
+    # Lote 3 já gravado antes da queda: o sink não grava de novo nem conta como desta execução
+    assert resultado.inseridos == (2 if depois_de_gravar else 7)
+    # ingerido_em é o desta execução, para a janela incremental do dbt
+    assert sink.lotes[sink.escritas[1]]["ingerido_em"][0].as_py() == INGERIDO_EM + timedelta(hours=2)
+
+    gravados = [i for tabela in sink.lotes.values() for i in tabela["codigo_interno"].to_pylist()]
+    assert sorted(gravados) == ids
+    assert len(sink.lotes) == 5
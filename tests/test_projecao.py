@@ -0,0 +1,83 @@
+"""Tipos compactos do modelo do dashboard (dashboard/projecao.py): int32, AAAAMM e volta"""
+
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from projecao import chave_mes, compactar, para_pandas, rotulo_mes
+
+MESES = [f"{ano}-{mes:02d}" for ano in range(2019, 2027) for mes in range(1, 13)]
+
+
+def test_ano_mes_ida_e_volta():
+    chaves = chave_mes(pa.array(MESES + [None]))
+    assert chaves.type == pa.int32()
+    assert chaves[0].as_py() == 201901 and chaves[-2].as_py() == 202612
+    assert chaves.null_count == 1
+    assert [rotulo_mes(c) for c in chaves.to_pylist()[:-1]] == MESES
+    # A ordem numérica da chave é a ordem cronológica
+    assert sorted(chaves.to_pylist()[:-1]) == chaves.to_pylist()[:-1]
+
+
+@pytest.fixture
+def rollup():
+    return pa.table({
+        "ano_exercicio": pa.array([2024, 2025, None], pa.int64()),
+        "ano_mes": ["2024-12", "2025-01", "2025-10"],
+        "secretaria_padronizada": ["SAUDE", "EDUCACAO", "SAUDE"],
+        "total_registros": pa.array([3, None, 2_000_000_000], pa.int64()),
+        "total_despesa": pa.array([Decimal("1234567.89"), None, Decimal("0.01")], pa.decimal128(38, 9)),
+    })
+
+
+def test_compactar_tipos(rollup):
+    tabela = compactar(rollup)
+    tipos = {campo.name: campo.type for campo in tabela.schema}
+    assert tipos["ano_exercicio"] == tipos["ano_mes"] == tipos["total_registros"] == pa.int32()
+    assert tipos["total_despesa"] == pa.float64()
+    assert pa.types.is_dictionary(tipos["secretaria_padronizada"])
+
+    assert tabela["ano_mes"].to_pylist() == [202412, 202501, 202510]
+    # Ano ausente continua ausente; contagem e valor ausentes viram zero
+    assert tabela["ano_exercicio"].to_pylist() == [2024, 2025, None]
+    assert tabela["total_registros"].to_pylist() == [3, 0, 2_000_000_000]
+    # O cast de decimal128 para float64 pode errar no último bit, nunca nos centavos
+    assert tabela["total_despesa"].to_pylist() == pytest.approx([1234567.89, 0.0, 0.01], abs=1e-6)
+    # Compactar de novo (snapshot relido do disco) não muda nada
+    assert compactar(tabela).equals(tabela)
+
+
+def test_contagem_acima_de_int32_falha(rollup):
+    grande = rollup.set_column(3, "total_registros", pa.array([2**31, 0, 0], pa.int64()))
+    with pytest.raises(pa.ArrowInvalid):
+        compactar(grande)
+
+
+def test_para_pandas_e_volta_ao_rotulo(rollup):
+    df = para_pandas(compactar(rollup))
+    assert df["ano_exercicio"].dtype == pd.Int32Dtype()
+    assert df["ano_exercicio"].isna().tolist() == [False, False, True]
+    assert df["ano_mes"].dtype == pd.Int32Dtype()
+    assert isinstance(df["secretaria_padronizada"].dtype, pd.CategoricalDtype)
+    assert df["total_despesa"].dtype == "float64"
+    assert [rotulo_mes(c) for c in df["ano_mes"]] == rollup["ano_mes"].to_pylist()
+    # Totais com centavos exatos depois da soma
+    assert round(df["total_despesa"].sum(), 2) == 1234567.90
+
+
+def test_registros_com_datas():
+    registros = compactar(pa.table({
+        "ano": pa.array([2025, 2024], pa.int64()),
+        "data_despesa": pa.array([date(2025, 3, 1), None], pa.date32()),
+        "valor_despesa": pa.array([Decimal("10.50"), Decimal("0.10")], pa.decimal128(38, 9)),
+        "favorecido": ["A", None],
+    }))
+    df = para_pandas(registros)
+    assert df["ano"].tolist() == [2025, 2024]
+    assert pd.api.types.is_datetime64_any_dtype(df["data_despesa"])
+    assert df["data_despesa"].isna().tolist() == [False, True]
+    assert df["favorecido"].isna().tolist() == [False, True]
+    assert df["valor_despesa"].tolist() == pytest.approx([10.5, 0.1])
@@ -0,0 +1,28 @@
+"""Conversões pt-BR da ingestão (ingestao/ptbr.py)"""
+
+from datetime import date
+from decimal import Decimal
+
+from ingestao import ptbr
+
+
+def test_data_valida_e_invalida():
+    conversao = ptbr.data([
+        "2024-02-29 00:00:00.0", " 2024-01-05 10:30:00.0", "2024-13-01", "abc", None, "",
+    ])
+    assert conversao.valores.to_pylist() == [date(2024, 2, 29), date(2024, 1, 5), None, None, None, None]
+    assert conversao.falhas == 2
+
+
+def test_data_inexistente_nao_rola_para_o_mes_seguinte():
+    conversao = ptbr.data(["2024-02-30 00:00:00.0", "2023-02-29", "2024-04-31", "2024-04-30"])
+    assert conversao.valores.to_pylist() == [None, None, None, date(2024, 4, 30)]
+    assert conversao.falhas == 3
+
+
+def test_numerico_formato_ptbr():
+    conversao = ptbr.numerico(["1.234,56", "-0,5", 12.5, "1,2,3", None])
+    assert conversao.valores.to_pylist() == [
+        Decimal("1234.56"), Decimal("-0.5"), Decimal("12.5"), None, None,
+    ]
+    assert conversao.falhas == 1
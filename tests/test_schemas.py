@@ -0,0 +1,53 @@
+"""Hash de conteúdo por registro (ingestao/schemas.hash_conteudo)"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+
+from bench_ingestao import registro
+from ingestao.schemas import DESPESAS_PAGAS, com_controle, construir_tabela, hash_conteudo
+
+
+def hash_de(registros, posicao):
+    return hash_conteudo(construir_tabela(registros, DESPESAS_PAGAS))[posicao]
+
+
+def test_mesmo_registro_em_lotes_diferentes_tem_o_mesmo_hash():
+    alvo = registro(1, 2024)
+    sozinho = hash_de([alvo], 0)
+
+    # Nulls em colunas inteiras e decimais de outros registros do lote: o
+    # pandas inferiria float64/object para a coluna inteira
+    vizinhos = [
+        {**registro(2, 2024), "exercicio": None, "codigo_interno": None},
+        {**registro(3, 2025), "valor_despesa": None, "data_despesa": None},
+    ]
+    assert hash_de([vizinhos[0], alvo, vizinhos[1]], 1) == sozinho
+    assert hash_de([alvo] + [registro(i, 2025) for i in range(4, 50)], 0) == sozinho
+
+
+def test_conteudo_diferente_muda_o_hash():
+    alvo = registro(1, 2024)
+    hashes = {
+        hash_de([alvo], 0),
+        hash_de([{**alvo, "valor_despesa": "89,20"}], 0),
+        hash_de([{**alvo, "Estorno_do_Pagamento": "0,00"}], 0),
+        # Valor trocado de coluna: a linha do hash separa as colunas
+        hash_de([{**alvo, "orgao": "ORGAO 1FUNDEB", "fonte": None}], 0),
+    }
+    assert len(hashes) == 4
+
+
+def test_colunas_de_controle_e_ano_api_fora_do_hash():
+    tabela = construir_tabela([registro(1, 2024)], DESPESAS_PAGAS)
+    com = com_controle(tabela, hash_conteudo(tabela), np.array([True]),
+                       datetime(2026, 1, 5, tzinfo=timezone.utc), lote_id="l1")
+    outro_ano = tabela.set_column(tabela.schema.get_field_index("ano_api"), "ano_api", pa.array([2099]))
+    assert hash_conteudo(com)[0] == hash_conteudo(outro_ano)[0] == hash_conteudo(tabela)[0]
+
+
+def test_hash_fixo_entre_execucoes():
+    # Gravado no raw e no índice de ids: não pode mudar entre versões do
+    # pandas/pyarrow sem que todos os registros pareçam alterados
+    assert hash_de([registro(1, 2024)], 0) == 5337068684748139732
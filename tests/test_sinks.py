@@ -0,0 +1,147 @@
+"""Sinks do BigQuery: envio do lake (upload_lake) e contagem do MERGE"""
+
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow.parquet as pq
+from google.api_core.exceptions import Conflict
+from google.cloud.bigquery.job.query import DmlStats
+
+from bench_ingestao import registro
+from ingestao.fontes import FONTES
+from ingestao.schemas import com_controle, construir_tabela, hash_conteudo
+from ingestao.sinks import BigQuerySink, Gravacao, ParquetLakeSink, upload_lake
+
+FONTE = FONTES["queimados_despesas_pagas"]
+TABELA = "monitorpublico.raw.despesas_pagas"
+
+
+class JobFalso:
+    state = "DONE"
+    error_result = None
+
+    def result(self):
+        return self
+
+
+class ClienteJobs:
+    """Só a carga e o get_job do cliente do BigQuery: job id repetido dá 409"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.linhas = 0
+
+    def load_table_from_file(self, buffer, table_ref, job_config, job_id=None):
+        if job_id in self.jobs:
+            raise Conflict(f"Already Exists: Job {job_id}")
+        self.jobs[job_id] = JobFalso()
+        self.linhas += pq.read_table(buffer).num_rows
+        return self.jobs[job_id]
+
+    def get_job(self, job_id):
+        return self.jobs[job_id]
+
+
+def gravar_lote(raiz, ids, lote_id):
+    registros = [registro(i, 2024) for i in ids]
+    ParquetLakeSink(str(raiz)).escrever(construir_tabela(registros, FONTE.schema, ano_api=2024), lote_id=lote_id)
+
+
+def apagar_controles(raiz):
+    for diretorio, _, arquivos in os.walk(raiz):
+        if "_enviados.json" in arquivos:
+            os.remove(os.path.join(diretorio, "_enviados.json"))
+
+
+def test_repeticao_apos_queda_nao_duplica(tmp_path):
+    gravar_lote(tmp_path, range(40), "l1")
+    client = ClienteJobs()
+    assert upload_lake(client, str(tmp_path), TABELA, FONTE.schema_raw) == 40
+    jobs = set(client.jobs)
+
+    # Queda entre a carga e a gravação de _enviados.json: tudo parece pendente
+    apagar_controles(tmp_path)
+    assert upload_lake(client, str(tmp_path), TABELA, FONTE.schema_raw) == 0
+    assert client.linhas == 40
+    assert set(client.jobs) == jobs
+
+    # E a partição fica marcada como enviada
+    assert upload_lake(client, str(tmp_path), TABELA, FONTE.schema_raw) == 0
+
+
+def test_arquivos_novos_geram_outro_job(tmp_path):
+    gravar_lote(tmp_path, range(40), "l1")
+    client = ClienteJobs()
+    upload_lake(client, str(tmp_path), TABELA, FONTE.schema_raw)
+    jobs = set(client.jobs)
+
+    gravar_lote(tmp_path, range(40, 50), "l2")
+    assert upload_lake(client, str(tmp_path), TABELA, FONTE.schema_raw) == 10
+    assert client.linhas == 50
+    novos = set(client.jobs) - jobs
+    assert novos and all(job.startswith("lake_ano_2024_mes_") for job in novos)
+
+
+def test_job_anterior_com_erro_e_repetido(tmp_path):
+    gravar_lote(tmp_path, range(10), "l1")
+    client = ClienteJobs()
+    upload_lake(client, str(tmp_path), TABELA, FONTE.schema_raw)
+    for job in client.jobs.values():
+        job.error_result = {"reason": "invalid"}
+    client.linhas = 0
+
+    apagar_controles(tmp_path)
+    assert upload_lake(client, str(tmp_path), TABELA, FONTE.schema_raw) == 10
+    assert client.linhas == 10
+
+
+class JobMerge(JobFalso):
+    def __init__(self, dml_stats, linhas=()):
+        self.dml_stats = dml_stats
+        self.linhas = linhas
+
+    def result(self):
+        return iter(self.linhas)
+
+
+class ClienteMerge(ClienteJobs):
+    """Carga da staging, MERGE com estatísticas e a contagem dos alterados"""
+
+    def __init__(self, estatisticas, alterados):
+        super().__init__()
+        self.respostas = [JobMerge(estatisticas), JobMerge(None, [(alterados,)])]
+        self.consultas = []
+
+    def get_table(self, table_ref):
+        return type("Tabela", (), {"expires": None})()
+
+    def update_table(self, tabela, campos):
+        pass
+
+    def delete_table(self, table_ref, not_found_ok=False):
+        pass
+
+    def query(self, sql):
+        self.consultas.append(sql)
+        return self.respostas[len(self.consultas) - 1]
+
+
+def merge(client, ids):
+    tabela = construir_tabela([registro(i, 2024) for i in ids], FONTE.schema, ano_api=2024)
+    tabela = com_controle(tabela, hash_conteudo(tabela), np.zeros(len(ids), dtype=bool),
+                          datetime(2026, 1, 5, tzinfo=timezone.utc), lote_id="l2")
+    return BigQuerySink(client, TABELA, FONTE.schema_raw, modo="merge").escrever(tabela, "l2")
+
+
+def test_merge_separa_inseridos_de_alterados():
+    # 2 atualizados pelo MERGE, dos quais só 1 com conteúdo novo (o outro só recebeu o hash)
+    client = ClienteMerge(DmlStats(inserted_row_count=3, updated_row_count=2), alterados=1)
+    assert merge(client, range(10)) == Gravacao(inseridos=3, alterados=1)
+    assert "COUNTIF" in client.consultas[1]
+
+
+def test_merge_sem_atualizacoes_nao_conta_alterados():
+    client = ClienteMerge(DmlStats(inserted_row_count=10), alterados=0)
+    assert merge(client, range(10)) == Gravacao(inseridos=10, alterados=0)
+    assert len(client.consultas) == 1